@@ -0,0 +1,126 @@
+"""
+Check the time each command spends importing modules, and the modules it
+must not import, against per-command budgets.
+
+Each command is run in a fresh interpreter with `python -X importtime`, in
+a directory with a small Compose file, and the modules the interpreter
+already imports at startup are left out. The exit status is 1 if any
+command goes over its budget.
+
+    python -m benchmarks.cli_import [--repeat R] [--scale S]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import yaml
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_MAIN = 'from compose.cli.main import main; main()'
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \| *(\S+)$')
+
+# The modules which only the commands talking to the Docker daemon need
+DAEMON_MODULES = ('compose.bundle', 'compose.project', 'compose.service')
+CONFIG_MODULES = ('jsonschema', 'yaml')
+DOCKER_MODULES = ('docker', 'requests')
+
+# (command, budget in milliseconds, modules the command must not import)
+BUDGETS = [
+    (['version', '--short'], 150, DAEMON_MODULES + CONFIG_MODULES + DOCKER_MODULES),
+    (['help'], 150, DAEMON_MODULES + CONFIG_MODULES + DOCKER_MODULES),
+    (['help', 'up'], 150, DAEMON_MODULES + CONFIG_MODULES + DOCKER_MODULES),
+    (['version'], 600, DAEMON_MODULES + CONFIG_MODULES),
+    (['config', '-q'], 800, DAEMON_MODULES),
+    (['config', '--services'], 800, DAEMON_MODULES),
+]
+
+COMPOSE_FILE = {
+    'version': '2',
+    'services': {
+        'web': {'image': 'busybox', 'ports': ['8000:8000'], 'links': ['db']},
+        'db': {'image': 'redis', 'volumes': ['data:/data']},
+    },
+    'volumes': {'data': {}},
+}
+
+
+def imported_modules(args, directory):
+    """Run `python -X importtime` and return a dict of the name of each
+    module it imported to the time spent importing it, in microseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=directory,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError('{} failed:\n{}'.format(' '.join(args), stderr.decode('utf-8')))
+
+    modules = {}
+    for line in stderr.decode('utf-8').splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            modules[match.group(2)] = int(match.group(1))
+    return modules
+
+
+def command_imports(command, directory, startup, repeat):
+    """Return the modules the command imported, and the least time it
+    spent importing them over `repeat` runs, in milliseconds.
+    """
+    times = []
+    for _ in range(repeat):
+        modules = imported_modules(['-c', RUN_MAIN] + command, directory)
+        modules = dict(
+            (name, time) for name, time in modules.items() if name not in startup)
+        times.append(sum(modules.values()) / 1000.0)
+    return set(modules), min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--scale', type=float, default=1.0,
+        help='multiply the budgets, for slower or faster machines')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    over_budget = False
+    try:
+        with open(os.path.join(directory, 'docker-compose.yml'), 'w') as fh:
+            yaml.safe_dump(COMPOSE_FILE, fh, default_flow_style=False)
+        startup = set(imported_modules(['-c', 'pass'], directory))
+
+        print('{:<20} {:>8} {:>8} {:>8}  {}'.format(
+            'command', 'modules', 'import', 'budget', 'unexpected modules'))
+        for command, budget, forbidden in BUDGETS:
+            modules, milliseconds = command_imports(command, directory, startup, args.repeat)
+            budget *= args.scale
+            unexpected = sorted(name for name in forbidden if name in modules)
+            over_budget = over_budget or bool(unexpected) or milliseconds > budget
+            print('{:<20} {:>8} {:>6.0f}ms {:>6.0f}ms  {}'.format(
+                ' '.join(command), len(modules), milliseconds, budget,
+                ', '.join(unexpected) or '-'))
+    finally:
+        shutil.rmtree(directory)
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
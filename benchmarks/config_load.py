@@ -0,0 +1,139 @@
+"""
+Time `config.load` on large generated Compose files.
+
+Each file defines N services with the usual mix of options, and every
+service depends on, and links to, a few of the services defined before
+it. Loading the files, and validating their services alone, are timed
+with the memoized functions of the config package, and with the original
+uncached functions they replaced.
+
+    python -m benchmarks.config_load [--services N ...] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import timeit
+
+import yaml
+
+from compose.config import config
+from compose.config import validation
+from compose.config.environment import Environment
+
+
+def build_service(index):
+    service = {
+        'image': 'example/service{}:latest'.format(index),
+        'command': 'run --worker {}'.format(index),
+        'environment': {
+            'INDEX': str(index),
+            'DATABASE_URL': 'postgres://db/service${INSTANCE_SUFFIX}',
+        },
+        'ports': ['{}:80'.format(8000 + index), '9000'],
+        'volumes': ['./data/{}:/data'.format(index), '/var/cache'],
+        'labels': {'com.example.index': str(index)},
+        'mem_limit': '64m',
+        'restart': 'on-failure',
+    }
+    deps = ['service{}'.format(dep) for dep in range(max(0, index - 3), index)]
+    if deps:
+        service['depends_on'] = deps
+        service['links'] = deps[-1:]
+    return service
+
+
+def build_compose_file(services):
+    return {
+        'version': '2',
+        'services': {
+            'service{}'.format(index): build_service(index)
+            for index in range(services)
+        },
+    }
+
+
+def write_project(directory, services):
+    with open(os.path.join(directory, 'docker-compose.yml'), 'w') as fh:
+        yaml.safe_dump(build_compose_file(services), fh, default_flow_style=False)
+    with open(os.path.join(directory, '.env'), 'w') as fh:
+        fh.write('INSTANCE_SUFFIX=_1\n')
+
+
+MEMOIZED = [
+    (validation, 'load_jsonschema'),
+    (validation, 'get_config_validator'),
+    (validation, 'get_service_constraints_validator'),
+]
+
+
+@contextlib.contextmanager
+def uncached():
+    """Replace the memoized functions of the config loading by the original
+    ones for the duration of the block.
+    """
+    originals = [(module, name, getattr(module, name)) for module, name in MEMOIZED]
+    for module, name, func in originals:
+        setattr(module, name, func.uncached)
+    try:
+        yield
+    finally:
+        for module, name, func in originals:
+            setattr(module, name, func)
+
+
+def load(directory):
+    environment = Environment.from_env_file(directory)
+    return config.load(config.find(directory, None, environment))
+
+
+def validate(services):
+    for name, service in services.items():
+        validation.validate_service_constraints(service, name, '2.0')
+
+
+def timed(func, repeat, cached=True):
+    def run():
+        if cached:
+            return func()
+        with uncached():
+            return func()
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('{:>8} {:>12} {:>12} {:>8} {:>12} {:>12} {:>8}'.format(
+        'services', 'load', 'load cached', 'speedup',
+        'validate', 'cached', 'speedup'))
+    for services in args.services:
+        directory = tempfile.mkdtemp()
+        try:
+            write_project(directory, services)
+            service_dicts = build_compose_file(services)['services']
+            load(directory)
+            results = [
+                timed(lambda: load(directory), args.repeat, cached=False),
+                timed(lambda: load(directory), args.repeat),
+                timed(lambda: validate(service_dicts), args.repeat, cached=False),
+                timed(lambda: validate(service_dicts), args.repeat),
+            ]
+        finally:
+            shutil.rmtree(directory)
+        print('{:>8} {:>11.3f}s {:>11.3f}s {:>7.1f}x {:>11.3f}s {:>11.3f}s {:>7.1f}x'.format(
+            services,
+            results[0], results[1], results[0] / results[1],
+            results[2], results[3], results[2] / results[3]))
+
+
+if __name__ == '__main__':
+    main()
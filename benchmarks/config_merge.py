@@ -0,0 +1,80 @@
+"""
+Time merging the services of a generated Compose file with several
+override files, one pass over all the files against merging the files
+pairwise, one after the other.
+
+    python -m benchmarks.config_merge [--services N] [--files F ...] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import timeit
+
+from benchmarks.config_load import build_compose_file
+from compose.config import config
+from compose.config.config import V2_0
+
+
+def build_override(services, layer):
+    return {
+        'version': '2',
+        'services': {
+            'service{}'.format(index): {
+                'environment': ['LAYER={}'.format(layer), 'INDEX_{}={}'.format(layer, index)],
+                'labels': {'com.example.layer': str(layer)},
+                'ports': ['{}'.format(10000 + layer)],
+                'volumes': ['./layer{}:/data'.format(layer), '/layer{}'.format(layer)],
+                'dns': '10.0.0.{}'.format(layer),
+            }
+            for index in range(services)
+        },
+    }
+
+
+def build_config_files(services, files):
+    contents = [build_compose_file(services)] + [
+        build_override(services, layer) for layer in range(1, files)
+    ]
+    return [
+        config.ConfigFile('docker-compose.{}.yml'.format(index), content)
+        for index, content in enumerate(contents)
+    ]
+
+
+def merge_pairwise(config_files):
+    service_configs = [config_file.get_service_dicts() for config_file in config_files]
+    merged = service_configs[0]
+    for override in service_configs[1:]:
+        merged = {
+            name: config.merge_service_dicts_from_files(
+                merged.get(name, {}), override.get(name, {}), V2_0)
+            for name in set(merged) | set(override)
+        }
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, default=300)
+    parser.add_argument('--files', type=int, nargs='+', default=[2, 3, 4, 5, 6])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>8} {:>6} {:>10} {:>10} {:>8}'.format(
+        'services', 'files', 'pairwise', 'one pass', 'speedup'))
+    for files in args.files:
+        config_files = build_config_files(args.services, files)
+        assert merge_pairwise(config_files) == config.merge_service_configs(config_files, V2_0)
+        pairwise = min(timeit.repeat(
+            lambda: merge_pairwise(config_files), number=1, repeat=args.repeat))
+        one_pass = min(timeit.repeat(
+            lambda: config.merge_service_configs(config_files, V2_0),
+            number=1, repeat=args.repeat))
+        print('{:>8} {:>6} {:>9.3f}s {:>9.3f}s {:>7.1f}x'.format(
+            args.services, files, pairwise, one_pass, pairwise / one_pass))
+
+
+if __name__ == '__main__':
+    main()
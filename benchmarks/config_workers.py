@@ -0,0 +1,57 @@
+"""
+Time building the services of large generated Compose files with
+different numbers of worker processes.
+
+The files are loaded and interpolated once, and `load_services` is timed
+with each number of workers, as COMPOSE_CONFIG_WORKERS would set it.
+
+    python -m benchmarks.config_workers [--services N ...] [--workers W ...] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import shutil
+import tempfile
+import timeit
+
+from benchmarks.config_load import write_project
+from compose.config import config
+from compose.config.environment import Environment
+
+
+def prepare(directory):
+    environment = Environment.from_env_file(directory)
+    config_details = config.find(directory, None, environment)
+    config_file = config.process_config_file(config_details.config_files[0], environment)
+    return config_details._replace(config_files=[config_file]), config_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, nargs='+', default=[250, 1000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('{:>8} {:>8} {:>10} {:>8}'.format('services', 'workers', 'build', 'speedup'))
+    for services in args.services:
+        directory = tempfile.mkdtemp()
+        try:
+            write_project(directory, services)
+            config_details, config_file = prepare(directory)
+            baseline = None
+            for workers in args.workers:
+                seconds = min(timeit.repeat(
+                    lambda: config.load_services(config_details, config_file, workers=workers),
+                    number=1, repeat=args.repeat))
+                baseline = baseline or seconds
+                print('{:>8} {:>8} {:>9.3f}s {:>7.1f}x'.format(
+                    services, workers, seconds, baseline / seconds))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Measure the memory held per container and per service of a project.
+
+The containers are listed with `Project.containers`, from a stub client
+which returns the output of a Docker 1.12 daemon, and the fields `ps`
+shows are read from each of them, which inspects them. The bytes still
+allocated while the containers are kept are divided by their number, for
+the full containers and for the trimmed view, which only keeps the fields
+compose reads. The same is measured for the services of a project.
+
+    python -m benchmarks.container_memory [--containers N] [--services S]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from compose.const import LABEL_CONFIG_HASH
+from compose.const import LABEL_CONTAINER_NUMBER
+from compose.const import LABEL_ONE_OFF
+from compose.const import LABEL_PROJECT
+from compose.const import LABEL_SERVICE
+from compose.const import LABEL_VERSION
+from compose.project import Project
+from compose.service import NetworkMode
+from compose.service import Service
+
+
+PROJECT = 'bench'
+
+
+def labels(index):
+    return {
+        LABEL_PROJECT: PROJECT,
+        LABEL_SERVICE: 'service{}'.format(index % 10),
+        LABEL_ONE_OFF: 'False',
+        LABEL_CONTAINER_NUMBER: str(index // 10 + 1),
+        LABEL_VERSION: '1.9.0dev',
+        LABEL_CONFIG_HASH: '{:064x}'.format(index),
+        'com.example.index': str(index),
+    }
+
+
+def container_name(index):
+    return '{}_service{}_{}'.format(PROJECT, index % 10, index // 10 + 1)
+
+
+def list_output(index):
+    """The output of GET /containers/json for a container."""
+    return {
+        'Id': '{:064x}'.format(index),
+        'Names': ['/' + container_name(index)],
+        'Image': 'example/service:latest',
+        'ImageID': 'sha256:' + '{:064x}'.format(1),
+        'Command': 'run --worker {}'.format(index),
+        'Created': 1477958400,
+        'Ports': [{'PrivatePort': 80, 'PublicPort': 8000 + index, 'Type': 'tcp', 'IP': '0.0.0.0'}],
+        'Labels': labels(index),
+        'State': 'running',
+        'Status': 'Up 2 hours',
+        'HostConfig': {'NetworkMode': 'bench_default'},
+        'NetworkSettings': {'Networks': {'bench_default': {
+            'NetworkID': '{:064x}'.format(2),
+            'EndpointID': '{:064x}'.format(index),
+            'Gateway': '172.18.0.1',
+            'IPAddress': '172.18.{}.{}'.format(index // 250, index % 250 + 2),
+            'IPPrefixLen': 16,
+            'MacAddress': '02:42:ac:12:00:02',
+        }}},
+        'Mounts': [],
+    }
+
+
+def inspect_output(index):
+    """The output of GET /containers/:id/json for a container."""
+    container_id = '{:064x}'.format(index)
+    network = list_output(index)['NetworkSettings']['Networks']['bench_default']
+    return {
+        'Id': container_id,
+        'Created': '2016-11-01T00:00:00.000000000Z',
+        'Path': 'run',
+        'Args': ['--worker', str(index)],
+        'State': {
+            'Status': 'running', 'Running': True, 'Paused': False, 'Restarting': False,
+            'OOMKilled': False, 'Dead': False, 'Pid': 1000 + index, 'ExitCode': 0,
+            'Error': '', 'StartedAt': '2016-11-01T00:00:01.000000000Z',
+            'FinishedAt': '0001-01-01T00:00:00Z',
+        },
+        'Image': 'sha256:' + '{:064x}'.format(1),
+        'ResolvConfPath': '/var/lib/docker/containers/{}/resolv.conf'.format(container_id),
+        'HostnamePath': '/var/lib/docker/containers/{}/hostname'.format(container_id),
+        'HostsPath': '/var/lib/docker/containers/{}/hosts'.format(container_id),
+        'LogPath': '/var/lib/docker/containers/{0}/{0}-json.log'.format(container_id),
+        'Name': '/' + container_name(index),
+        'RestartCount': 0,
+        'Driver': 'overlay2',
+        'MountLabel': '',
+        'ProcessLabel': '',
+        'AppArmorProfile': '',
+        'ExecIDs': None,
+        'HostConfig': {
+            'Binds': ['/srv/data/{}:/data:rw'.format(index)],
+            'ContainerIDFile': '',
+            'LogConfig': {'Type': 'json-file', 'Config': {}},
+            'NetworkMode': 'bench_default',
+            'PortBindings': {'80/tcp': [{'HostIp': '', 'HostPort': str(8000 + index)}]},
+            'RestartPolicy': {'Name': '', 'MaximumRetryCount': 0},
+            'AutoRemove': False,
+            'VolumeDriver': '',
+            'VolumesFrom': [],
+            'CapAdd': None,
+            'CapDrop': None,
+            'Dns': [],
+            'DnsOptions': [],
+            'DnsSearch': [],
+            'ExtraHosts': None,
+            'GroupAdd': None,
+            'IpcMode': '',
+            'Cgroup': '',
+            'Links': None,
+            'OomScoreAdj': 0,
+            'PidMode': '',
+            'Privileged': False,
+            'PublishAllPorts': False,
+            'ReadonlyRootfs': False,
+            'SecurityOpt': None,
+            'UTSMode': '',
+            'UsernsMode': '',
+            'ShmSize': 67108864,
+            'Runtime': 'runc',
+            'ConsoleSize': [0, 0],
+            'Isolation': '',
+            'CpuShares': 0,
+            'Memory': 0,
+            'CgroupParent': '',
+            'BlkioWeight': 0,
+            'BlkioWeightDevice': None,
+            'BlkioDeviceReadBps': None,
+            'BlkioDeviceWriteBps': None,
+            'BlkioDeviceReadIOps': None,
+            'BlkioDeviceWriteIOps': None,
+            'CpuPeriod': 0,
+            'CpuQuota': 0,
+            'CpusetCpus': '',
+            'CpusetMems': '',
+            'Devices': None,
+            'DiskQuota': 0,
+            'KernelMemory': 0,
+            'MemoryReservation': 0,
+            'MemorySwap': 0,
+            'MemorySwappiness': -1,
+            'OomKillDisable': False,
+            'PidsLimit': 0,
+            'Ulimits': None,
+        },
+        'GraphDriver': {
+            'Name': 'overlay2',
+            'Data': {
+                'LowerDir': '/var/lib/docker/overlay2/{}-init/diff'.format(container_id),
+                'MergedDir': '/var/lib/docker/overlay2/{}/merged'.format(container_id),
+                'UpperDir': '/var/lib/docker/overlay2/{}/diff'.format(container_id),
+                'WorkDir': '/var/lib/docker/overlay2/{}/work'.format(container_id),
+            },
+        },
+        'Mounts': [{
+            'Source': '/srv/data/{}'.format(index),
+            'Destination': '/data',
+            'Mode': 'rw',
+            'RW': True,
+            'Propagation': 'rprivate',
+        }],
+        'Config': {
+            'Hostname': container_id[:12],
+            'Domainname': '',
+            'User': '',
+            'AttachStdin': False,
+            'AttachStdout': False,
+            'AttachStderr': False,
+            'ExposedPorts': {'80/tcp': {}},
+            'Tty': False,
+            'OpenStdin': False,
+            'StdinOnce': False,
+            'Env': [
+                'INDEX={}'.format(index),
+                'DATABASE_URL=postgres://db/service',
+                'PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
+            ],
+            'Cmd': ['run', '--worker', str(index)],
+            'Image': 'example/service:latest',
+            'Volumes': {'/data': {}},
+            'WorkingDir': '',
+            'Entrypoint': None,
+            'OnBuild': None,
+            'Labels': labels(index),
+        },
+        'NetworkSettings': {
+            'Bridge': '',
+            'SandboxID': '{:064x}'.format(index + 1),
+            'HairpinMode': False,
+            'LinkLocalIPv6Address': '',
+            'LinkLocalIPv6PrefixLen': 0,
+            'Ports': {'80/tcp': [{'HostIp': '0.0.0.0', 'HostPort': str(8000 + index)}]},
+            'SandboxKey': '/var/run/docker/netns/{}'.format(container_id[:12]),
+            'SecondaryIPAddresses': None,
+            'SecondaryIPv6Addresses': None,
+            'EndpointID': '',
+            'Gateway': '',
+            'GlobalIPv6Address': '',
+            'GlobalIPv6PrefixLen': 0,
+            'IPAddress': '',
+            'IPPrefixLen': 0,
+            'IPv6Gateway': '',
+            'MacAddress': '',
+            'Networks': {'bench_default': dict(
+                network,
+                IPAMConfig=None,
+                Links=None,
+                Aliases=['service{}'.format(index % 10), container_id[:12]],
+                IPv6Gateway='',
+                GlobalIPv6Address='',
+                GlobalIPv6PrefixLen=0,
+            )},
+        },
+    }
+
+
+class StubClient(object):
+    """Return the outputs of the daemon as JSON decoded from text, like
+    docker-py does.
+    """
+
+    def __init__(self, count):
+        self.list_text = json.dumps([list_output(index) for index in range(count)])
+        self.inspect_texts = dict(
+            ('{:064x}'.format(index), json.dumps(inspect_output(index)))
+            for index in range(count))
+
+    def containers(self, all=False, filters=None):
+        return json.loads(self.list_text)
+
+    def inspect_container(self, container_id):
+        return json.loads(self.inspect_texts[container_id])
+
+
+def build_service(index, client):
+    return Service(
+        'service{}'.format(index),
+        client=client,
+        project=PROJECT,
+        use_networking=True,
+        networks={'bench_default': {'aliases': ['service{}'.format(index)]}},
+        network_mode=NetworkMode('bench_default'),
+        image='example/service:latest',
+        command=['run', '--worker', str(index)],
+        environment={'INDEX': str(index), 'DATABASE_URL': 'postgres://db/service'},
+        ports=['{}:80'.format(8000 + index)],
+        labels={'com.example.index': str(index)},
+    )
+
+
+def allocated_bytes(build):
+    """Return what `build` returned and the bytes it still holds."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def read_ps_fields(containers):
+    for container in containers:
+        container.name_without_project
+        container.human_readable_command
+        container.human_readable_state
+        container.human_readable_ports
+
+
+def measure_containers(count, **options):
+    client = StubClient(count)
+    project = Project(PROJECT, [build_service(index, client) for index in range(10)], client)
+
+    def build():
+        containers = project.containers(stopped=True, **options)
+        read_ps_fields(containers)
+        return containers
+
+    containers, allocated = allocated_bytes(build)
+    assert len(containers) == count
+    return allocated / count
+
+
+def measure_services(count):
+    services, allocated = allocated_bytes(
+        lambda: [build_service(index, None) for index in range(count)])
+    return allocated / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--containers', type=int, default=2000)
+    parser.add_argument('--services', type=int, default=1000)
+    args = parser.parse_args()
+
+    full = measure_containers(args.containers)
+    trimmed = measure_containers(args.containers, trimmed=True)
+    print('{:<24} {:>10}'.format('object', 'bytes'))
+    print('{:<24} {:>10.0f}'.format('container', full))
+    print('{:<24} {:>10.0f}  ({:.0%} of the full container)'.format(
+        'container, trimmed', trimmed, trimmed / full))
+    print('{:<24} {:>10.0f}'.format('service', measure_services(args.services)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Time the commands of a project against a simulated Docker daemon, and
+compare the times with the previous runs.
+
+Each repetition starts a fake Docker daemon in this process, from
+tests.fake_daemon, with the given latency, jitter and failure rate, and
+runs these commands through the command line entry points, on a project
+of N generated services and one service to build:
+
+    config -q, up -d, scale (every service to M replicas), ps,
+    ps --format json, logs -f, pull, build, down -v
+
+The median time of each command is appended to a history file, as a JSON
+line along with the revision and the parameters, and compared with the
+last run with the same parameters. The exit status is 1 when a command is
+slower than in that run by more than the threshold.
+
+    python -m benchmarks.daemon_suite [--services N] [--replicas M]
+        [--latency S] [--jitter S] [--failure-rate F] [--seed SEED]
+        [--log-lines L] [--progress-lines P] [--repeat R]
+        [--history FILE] [--threshold T]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.config_load import build_compose_file
+from compose.cli.main import perform_command
+from compose.cli.server import get_dispatcher
+from compose.cli.server import process_environment
+from compose.cli.server import working_directory
+from tests.fake_daemon import FakeDaemon
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Changes smaller than this are noise, whatever the threshold
+MIN_REGRESSION = 0.005
+
+
+def commands(services, replicas):
+    return [
+        ('config', ['config', '-q']),
+        ('up', ['up', '-d']),
+        ('scale', ['scale'] + [
+            'service{}={}'.format(index, replicas) for index in range(services)]),
+        ('ps', ['ps']),
+        ('ps-json', ['ps', '--format', 'json']),
+        ('logs', ['logs', '-f']),
+        ('pull', ['pull']),
+        ('build', ['build']),
+        ('down', ['down', '-v']),
+    ]
+
+
+def write_project(directory, services):
+    compose_file = build_compose_file(services)
+    compose_file['services']['builder'] = {'build': '.', 'image': 'bench/builder'}
+    with open(os.path.join(directory, 'docker-compose.yml'), 'w') as fh:
+        yaml.safe_dump(compose_file, fh, default_flow_style=False)
+    with open(os.path.join(directory, '.env'), 'w') as fh:
+        fh.write('INSTANCE_SUFFIX=_1\n')
+    with open(os.path.join(directory, 'Dockerfile'), 'w') as fh:
+        fh.write('FROM busybox\n')
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard the output of the block, including what is written to the
+    streams bound before it, like the output of the log printer, and the
+    output of the processes it runs, like `stty` for the width of tables.
+    """
+    streams = sys.stdout, sys.stderr
+    for stream in streams:
+        stream.flush()
+    saved_fds = [(fd, os.dup(fd)) for fd in (1, 2)]
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = sys.stderr = devnull
+        for fd, _ in saved_fds:
+            os.dup2(devnull.fileno(), fd)
+        try:
+            yield
+        finally:
+            for stream in streams:
+                stream.flush()
+            for fd, saved_fd in saved_fds:
+                os.dup2(saved_fd, fd)
+                os.close(saved_fd)
+            sys.stdout, sys.stderr = streams
+
+
+def run_command(argv):
+    """Run a command as the command line does, and return how long it took,
+    and whether it failed.
+    """
+    start = time.time()
+    try:
+        with quiet():
+            perform_command(*get_dispatcher().parse(argv))
+        failed = False
+    except (Exception, SystemExit):
+        failed = True
+    return time.time() - start, failed
+
+
+def run_suite(args, directory):
+    """Run the commands `args.repeat` times, each time against a new fake
+    daemon, and return the times and the failures of each command.
+    """
+    times = {}
+    failures = {}
+    for repetition in range(args.repeat):
+        daemon = FakeDaemon(
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            seed=None if args.seed is None else args.seed + repetition,
+            log_lines=args.log_lines,
+            progress_lines=args.progress_lines)
+        environment = dict(
+            os.environ, DOCKER_HOST=daemon.base_url, COMPOSE_PROJECT_NAME='bench')
+        with daemon, process_environment(environment), working_directory(directory):
+            for name, argv in commands(args.services, args.replicas):
+                seconds, failed = run_command(argv)
+                times.setdefault(name, []).append(seconds)
+                failures[name] = failures.get(name, 0) + failed
+    return times, failures
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def get_revision():
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('utf-8').strip()
+
+
+def read_history(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def previous_run(history, parameters):
+    for run in reversed(history):
+        if run['parameters'] == parameters:
+            return run
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, default=20)
+    parser.add_argument('--replicas', type=int, default=3)
+    parser.add_argument(
+        '--latency', type=float, default=0.001,
+        help='seconds each request of the daemon takes')
+    parser.add_argument(
+        '--jitter', type=float, default=0.0,
+        help='up to how many more seconds each request of the daemon takes')
+    parser.add_argument(
+        '--failure-rate', type=float, default=0.0,
+        help='the share of the requests of the daemon which fail')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--log-lines', type=int, default=100)
+    parser.add_argument('--progress-lines', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--history', default='daemon_suite_history.jsonl')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='the slowdown over the previous run which is a regression')
+    args = parser.parse_args()
+
+    parameters = dict(
+        (name, getattr(args, name)) for name in (
+            'services', 'replicas', 'latency', 'jitter', 'failure_rate', 'seed',
+            'log_lines', 'progress_lines', 'repeat'))
+
+    directory = tempfile.mkdtemp()
+    try:
+        write_project(directory, args.services)
+        times, failures = run_suite(args, directory)
+    finally:
+        shutil.rmtree(directory)
+
+    run = {
+        'date': datetime.datetime.utcnow().isoformat() + 'Z',
+        'revision': get_revision(),
+        'python': sys.version.split()[0],
+        'parameters': parameters,
+        'results': dict(
+            (name, {'median': median(values), 'min': min(values), 'failures': failures[name]})
+            for name, values in times.items()),
+    }
+    history = read_history(args.history)
+    previous = previous_run(history, parameters)
+    with open(args.history, 'a') as fh:
+        fh.write(json.dumps(run, sort_keys=True) + '\n')
+
+    print('{:<8} {:>10} {:>10} {:>9} {:>10} {:>8}'.format(
+        'command', 'median', 'min', 'failures', 'previous', 'change'))
+    regressions = []
+    for name, _ in commands(args.services, args.replicas):
+        result = run['results'][name]
+        line = '{:<8} {:>9.3f}s {:>9.3f}s {:>9}'.format(
+            name, result['median'], result['min'], result['failures'])
+        if previous and name in previous['results']:
+            before = previous['results'][name]['median']
+            change = result['median'] / before - 1 if before else 0
+            line += ' {:>9.3f}s {:>+7.0%}'.format(before, change)
+            if change > args.threshold and result['median'] - before > MIN_REGRESSION:
+                regressions.append(name)
+                line += '  regression'
+        print(line)
+
+    if previous:
+        print('Compared with {} of {}'.format(previous['revision'], previous['date']))
+    if regressions:
+        print('Slower than the previous run by more than {:.0%}: {}'.format(
+            args.threshold, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the CPU time spent on the lines of `logs --grep` when they are
+filtered in the tailer threads before formatting, with formatting every
+line and filtering the output afterwards like `logs | grep` does.
+
+    python -m benchmarks.log_filter [--lines N] [--match-ratio R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import time
+
+from compose.cli.log_printer import build_line_matcher
+from compose.cli.log_printer import build_log_presenters
+from compose.cli.log_printer import LogFilter
+from compose.cli.log_printer import LogQueue
+from compose.cli.log_printer import QueueItem
+from compose.container import Container
+
+NEEDLE = 'connection refused'
+
+process_time = getattr(time, 'process_time', None) or time.clock
+
+
+def build_lines(count, match_ratio):
+    every = max(1, int(1 / match_ratio)) if match_ratio else count + 1
+    return [
+        '2016-09-26T10:46:15.{:09d}Z GET /items/{} 200 {}\n'.format(
+            index, index, NEEDLE if index % every == 0 else 'ok')
+        for index in range(count)
+    ]
+
+
+def build_container():
+    return Container(None, {
+        'Id': 'abc',
+        'Name': '/project_web_1',
+        'Config': {'Labels': {'com.docker.compose.container-number': '1'}},
+    }, has_been_inspected=True)
+
+
+def format_then_grep(container, lines, matcher):
+    presenter = next(build_log_presenters(['web'], False))
+    queue = LogQueue(buffer_size=len(lines) + 1)
+    for line in lines:
+        queue.put(QueueItem.new(presenter.present(container, line)), container)
+    return sum(1 for item in queue.buffers[container] if matcher(item.item))
+
+
+def grep_then_format(container, lines, matcher):
+    presenter = next(build_log_presenters(['web'], False))
+    queue = LogQueue(buffer_size=len(lines) + 1)
+    log_filter = LogFilter(matcher=matcher)
+    for line in log_filter(lines):
+        queue.put(QueueItem.new(presenter.present(container, line)), container)
+    return len(queue.buffers.get(container, ()))
+
+
+def measure(func, *args):
+    start = process_time()
+    result = func(*args)
+    return process_time() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--match-ratio', type=float, default=0.001)
+    args = parser.parse_args()
+
+    container = build_container()
+    lines = build_lines(args.lines, args.match_ratio)
+    matchers = [
+        ('one text', build_line_matcher([NEEDLE])),
+        ('text and regexes', build_line_matcher([NEEDLE], [r' 5\d\d ', r'timeout|reset'])),
+    ]
+
+    print('{:<18} {:>14} {:>14} {:>8} {:>8}'.format(
+        'matcher', 'format+grep s', 'grep+format s', 'saved', 'matches'))
+    for name, matcher in matchers:
+        before, expected = measure(format_then_grep, container, lines, matcher)
+        after, matches = measure(grep_then_format, container, lines, matcher)
+        assert matches == expected
+        print('{:<18} {:>14.3f} {:>14.3f} {:>7.0%} {:>8}'.format(
+            name, before, after, 1 - after / before, matches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Time `docker-compose ps` run cold, in a new process, and warm, forwarded
+to a `docker-compose server` which keeps the project and the containers
+of the project loaded.
+
+The commands talk to a fake Docker daemon on a unix socket, which knows
+one container of the project, so that the times don't include the daemon.
+
+    python -m benchmarks.server_ps [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from compose.const import LABEL_CONTAINER_NUMBER
+from compose.const import LABEL_ONE_OFF
+from compose.const import LABEL_PROJECT
+from compose.const import LABEL_SERVICE
+from tests.fake_daemon import FakeDaemon
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_MAIN = 'from compose.cli.main import main; main()'
+
+CONTAINER = {
+    'Id': 'container1',
+    'Name': '/bench_web_1',
+    'Config': {
+        'Image': 'busybox',
+        'Cmd': ['top'],
+        'Entrypoint': None,
+        'Labels': {
+            LABEL_PROJECT: 'bench',
+            LABEL_SERVICE: 'web',
+            LABEL_ONE_OFF: 'False',
+            LABEL_CONTAINER_NUMBER: '1',
+        },
+    },
+    'State': {'Running': True, 'Paused': False, 'Restarting': False, 'ExitCode': 0},
+    'NetworkSettings': {'Ports': {}},
+}
+
+
+def run(args, directory, env):
+    start = time.time()
+    process = subprocess.Popen(
+        [sys.executable, '-c', RUN_MAIN] + args,
+        cwd=directory,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError('{} failed:\n{}'.format(' '.join(args), stderr.decode('utf-8')))
+    return time.time() - start
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def wait_for_socket(path, process, timeout=30):
+    deadline = time.time() + timeout
+    while not os.path.exists(path):
+        if process.poll() is not None or time.time() > deadline:
+            raise RuntimeError('The compose server did not start')
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    socket_path = os.path.join(directory, 'compose.sock')
+    try:
+        with open(os.path.join(directory, 'docker-compose.yml'), 'w') as fh:
+            fh.write("version: '2'\nservices:\n  web:\n    image: busybox\n")
+
+        with FakeDaemon([CONTAINER]) as daemon:
+            env = dict(
+                os.environ,
+                PYTHONPATH=ROOT,
+                DOCKER_HOST=daemon.base_url,
+                COMPOSE_PROJECT_NAME='bench')
+            env.pop('COMPOSE_SERVER', None)
+            cold = median([run(['ps'], directory, env) for _ in range(args.repeat)])
+
+            devnull = open(os.devnull, 'w')
+            server = subprocess.Popen(
+                [sys.executable, '-c', RUN_MAIN, 'server', '--socket', socket_path],
+                cwd=directory,
+                env=env,
+                stderr=devnull)
+            try:
+                wait_for_socket(socket_path, server)
+                env['COMPOSE_SERVER'] = socket_path
+                first = run(['ps'], directory, env)
+                requests = len(daemon.requests)
+                warm = median([run(['ps'], directory, env) for _ in range(args.repeat)])
+                warm_requests = (len(daemon.requests) - requests) / float(args.repeat)
+            finally:
+                server.terminate()
+                server.wait()
+                devnull.close()
+
+        print('{:<24} {:>10}'.format('ps', 'median'))
+        print('{:<24} {:>9.3f}s'.format('cold', cold))
+        print('{:<24} {:>9.3f}s'.format('server, first command', first))
+        print('{:<24} {:>9.3f}s'.format('server, warm', warm))
+        print('speedup {:.1f}x, {:.1f} daemon requests per warm command'.format(
+            cold / warm, warm_requests))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
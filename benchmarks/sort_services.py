@@ -0,0 +1,57 @@
+"""
+Time sorting generated projects with many services and dense links by
+their dependencies.
+
+    python -m benchmarks.sort_services [--services N ...] [--links L] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import random
+import timeit
+
+from compose.config.sort_services import sort_service_dicts
+from compose.config.types import VolumeFromSpec
+
+
+def build_services(count, links, seed=0):
+    """Return `count` service dicts, each with up to `links` dependencies on
+    the services before it, in a shuffled order.
+    """
+    rand = random.Random(seed)
+    services = []
+    for index in range(count):
+        names = ['service{}'.format(i) for i in rand.sample(range(index), min(index, links))]
+        service = {'name': 'service{}'.format(index)}
+        if names:
+            service['links'] = ['{}:alias{}'.format(name, i) for i, name in enumerate(names[0::3])]
+            service['depends_on'] = names[1::3]
+            service['volumes_from'] = [VolumeFromSpec(name, 'rw', 'service') for name in names[2::3]]
+        services.append(service)
+    rand.shuffle(services)
+    return services
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--links', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('{:>8} {:>8} {:>10} {:>12}'.format('services', 'edges', 'sort', 'per edge'))
+    for count in args.services:
+        services = build_services(count, args.links)
+        edges = sum(
+            len(s.get('links', [])) + len(s.get('depends_on', [])) + len(s.get('volumes_from', []))
+            for s in services)
+        seconds = min(timeit.repeat(
+            lambda: sort_service_dicts(services), number=1, repeat=args.repeat))
+        print('{:>8} {:>8} {:>9.3f}s {:>10.2f}us'.format(
+            count, edges, seconds, seconds / max(edges, 1) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
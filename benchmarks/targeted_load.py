@@ -0,0 +1,56 @@
+"""
+Time loading a large generated Compose file for a command which works on
+one service, like `logs`, `exec` or `port`, with the full load and with
+the targeted load of the service and its dependencies.
+
+Every generated service depends on the three services defined before it,
+so the service picked sets how many services the targeted load needs.
+
+    python -m benchmarks.targeted_load [--services N] [--pick I ...] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import shutil
+import tempfile
+import timeit
+
+from benchmarks.config_load import write_project
+from compose.config import config
+from compose.config.environment import Environment
+
+
+def load(directory, service_names=None):
+    environment = Environment.from_env_file(directory)
+    return config.load(config.find(directory, None, environment), service_names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--pick', type=int, nargs='+', default=[0, 10, 100, 999])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        write_project(directory, args.services)
+        full = min(timeit.repeat(lambda: load(directory), number=1, repeat=args.repeat))
+
+        print('{:>12} {:>8} {:>10} {:>10} {:>8}'.format(
+            'service', 'loaded', 'full', 'targeted', 'speedup'))
+        for index in args.pick:
+            service_names = ['service{}'.format(index)]
+            loaded = len(load(directory, service_names).services)
+            targeted = min(timeit.repeat(
+                lambda: load(directory, service_names), number=1, repeat=args.repeat))
+            print('{:>12} {:>8} {:>9.3f}s {:>9.3f}s {:>7.1f}x'.format(
+                service_names[0], loaded, full, targeted, full / targeted))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare parsing large generated Compose files with the pure Python YAML
+loader and with the loader `load_yaml` uses, which is libyaml's when
+PyYAML was built with it.
+
+    python -m benchmarks.yaml_load [--services N ...] [--repeat R]
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+import yaml
+
+from benchmarks.config_load import write_project
+from compose.config import config
+
+
+def parse(filename, loader):
+    with open(filename, 'r') as fh:
+        return yaml.load(fh, Loader=loader)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, nargs='+', default=[100, 400, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('loader used by load_yaml: {}'.format(config.SafeLoader.__name__))
+    print('{:>8} {:>10} {:>12} {:>12} {:>8}'.format(
+        'services', 'size', 'SafeLoader', 'load_yaml', 'speedup'))
+    for services in args.services:
+        directory = tempfile.mkdtemp()
+        try:
+            write_project(directory, services)
+            filename = os.path.join(directory, 'docker-compose.yml')
+            size = os.path.getsize(filename)
+            python = min(timeit.repeat(
+                lambda: parse(filename, yaml.SafeLoader), number=1, repeat=args.repeat))
+            loaded = min(timeit.repeat(
+                lambda: config.load_yaml(filename), number=1, repeat=args.repeat))
+        finally:
+            shutil.rmtree(directory)
+        print('{:>8} {:>9}K {:>11.3f}s {:>11.3f}s {:>7.1f}x'.format(
+            services, size // 1024, python, loaded, python / loaded))
+
+
+if __name__ == '__main__':
+    main()
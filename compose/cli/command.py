@@ -1,27 +1,28 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import atexit
 import logging
 import os
 import re
 import ssl
+import sys
 
 import six
 
 from . import errors
 from . import verbose_proxy
-from .. import config
+from ..config.cache import load_cached
 from ..config.environment import Environment
 from ..const import API_VERSIONS
-from ..project import Project
-from .docker_client import docker_client
-from .docker_client import tls_config_from_options
+from ..const import PARALLEL_LIMIT
 from .utils import get_version_info
 
 log = logging.getLogger(__name__)
 
 
-def project_from_options(project_dir, options):
+def project_from_options(project_dir, options, service_names=None):
+    from .docker_client import tls_config_from_options
     environment = Environment.from_env_file(project_dir)
     host = options.get('--host')
     if host is not None:
@@ -33,7 +34,8 @@ def project_from_options(project_dir, options):
         verbose=options.get('--verbose'),
         host=host,
         tls_config=tls_config_from_options(options),
-        environment=environment
+        environment=environment,
+        service_names=service_names,
     )
 
 
@@ -42,9 +44,8 @@ def get_config_from_options(base_dir, options):
     config_path = get_config_path_from_options(
         base_dir, options, environment
     )
-    return config.load(
-        config.find(base_dir, config_path, environment)
-    )
+    _, config_data = load_cached(base_dir, config_path, environment)
+    return config_data
 
 
 def get_config_path_from_options(base_dir, options, environment):
@@ -75,32 +76,85 @@ def get_tls_version(environment):
     return getattr(ssl, tls_attr_name)
 
 
+def get_parallel_limit(environment):
+    """Return the most operations run in parallel, and connections kept open
+    to the daemon, from COMPOSE_PARALLEL_LIMIT.
+    """
+    parallel_limit = environment.get('COMPOSE_PARALLEL_LIMIT')
+    if not parallel_limit:
+        return PARALLEL_LIMIT
+    if parallel_limit.isdigit() and int(parallel_limit) > 0:
+        return int(parallel_limit)
+    raise errors.UserError("COMPOSE_PARALLEL_LIMIT must be a positive number")
+
+
 def get_client(environment, verbose=False, version=None, tls_config=None, host=None,
                tls_version=None):
+    from .docker_client import docker_client
+    from .docker_client import LazyClient
 
-    client = docker_client(
-        version=version, tls_config=tls_config, host=host,
-        environment=environment, tls_version=get_tls_version(environment)
-    )
-    if verbose:
-        version_info = six.iteritems(client.version())
-        log.info(get_version_info('full'))
-        log.info("Docker base_url: %s", client.base_url)
-        log.info("Docker version: %s",
-                 ", ".join("%s=%s" % item for item in version_info))
-        return verbose_proxy.VerboseProxy('docker', client)
-    return client
+    profile = get_call_profile(environment)
+    parallel_limit = get_parallel_limit(environment)
+
+    def create_client():
+        client = docker_client(
+            version=version, tls_config=tls_config, host=host,
+            environment=environment, tls_version=get_tls_version(environment),
+            parallel_limit=parallel_limit
+        )
+        if profile:
+            client = verbose_proxy.ProfilingProxy(client, profile)
+        if verbose:
+            version_info = six.iteritems(client.version())
+            log.info(get_version_info('full'))
+            log.info("Docker base_url: %s", client.base_url)
+            log.info("Docker version: %s",
+                     ", ".join("%s=%s" % item for item in version_info))
+            return verbose_proxy.VerboseProxy('docker', client)
+        return client
+
+    return LazyClient(create_client)
+
+
+# The CallProfile of the docker clients for each file it's written to
+call_profiles = {}
+
+
+def get_call_profile(environment):
+    """Return the CallProfile the docker clients record their calls in, when
+    COMPOSE_PROFILE or COMPOSE_PROFILE_FILE is set. Its summary is printed
+    when the process exits, and it's written to COMPOSE_PROFILE_FILE in the
+    Chrome trace format.
+    """
+    filename = environment.get('COMPOSE_PROFILE_FILE')
+    if not filename and not environment.get_boolean('COMPOSE_PROFILE'):
+        return None
+
+    if filename:
+        filename = os.path.abspath(filename)
+    if filename not in call_profiles:
+        call_profiles[filename] = verbose_proxy.CallProfile()
+        atexit.register(report_call_profile, call_profiles[filename], filename)
+    return call_profiles[filename]
+
+
+def report_call_profile(profile, filename):
+    if not profile.calls:
+        return
+    sys.stderr.write(profile.format_summary() + '\n')
+    if filename:
+        profile.write(filename)
+        sys.stderr.write('Wrote the profile of the docker calls to {}\n'.format(filename))
 
 
 def get_project(project_dir, config_path=None, project_name=None, verbose=False,
-                host=None, tls_config=None, environment=None):
+                host=None, tls_config=None, environment=None, service_names=None):
+    from ..project import Project
     if not environment:
         environment = Environment.from_env_file(project_dir)
-    config_details = config.find(project_dir, config_path, environment)
-    project_name = get_project_name(
-        config_details.working_dir, project_name, environment
-    )
-    config_data = config.load(config_details)
+    working_dir, config_data = load_cached(
+        project_dir, config_path, environment, service_names)
+    project_name = get_project_name(working_dir, project_name, environment)
 
     api_version = environment.get(
         'COMPOSE_API_VERSION',
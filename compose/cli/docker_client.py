@@ -1,14 +1,22 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import functools
 import logging
+import threading
 
 from docker import Client
 from docker.errors import TLSParameterError
+from docker.ssladapter.ssladapter import SSLAdapter
 from docker.tls import TLSConfig
+from docker.transport import UnixAdapter
+from docker.transport.unixconn import UnixHTTPConnectionPool
 from docker.utils import kwargs_from_env
+from requests.adapters import BaseAdapter
+from requests.adapters import HTTPAdapter
 
 from ..const import HTTP_TIMEOUT
+from ..const import PARALLEL_LIMIT
 from .errors import UserError
 from .utils import generate_user_agent
 from .utils import unquote_path
@@ -42,10 +50,11 @@ def tls_config_from_options(options):
 
 
 def docker_client(environment, version=None, tls_config=None, host=None,
-                  tls_version=None):
+                  tls_version=None, parallel_limit=PARALLEL_LIMIT):
     """
     Returns a docker-py client configured using environment variables
-    according to the same logic as the official Docker client.
+    according to the same logic as the official Docker client, which keeps
+    up to `parallel_limit` connections to the daemon open.
     """
     try:
         kwargs = kwargs_from_env(environment=environment, ssl_version=tls_version)
@@ -71,4 +80,112 @@ def docker_client(environment, version=None, tls_config=None, host=None,
 
     kwargs['user_agent'] = generate_user_agent()
 
-    return Client(**kwargs)
+    client = Client(**kwargs)
+    mount_connection_pools(client, parallel_limit)
+    return client
+
+
+def mount_connection_pools(client, maxsize):
+    """Replace the transport adapters of a docker-py client with adapters
+    which keep up to `maxsize` connections to the daemon open for the short
+    API calls, and send each streaming call through a connection of its own.
+    """
+    for prefix, adapter in list(client.adapters.items()):
+        create_adapter = get_adapter_factory(adapter)
+        if create_adapter is not None:
+            client.mount(prefix, ConnectionPoolAdapter(create_adapter, maxsize))
+
+
+def get_adapter_factory(adapter):
+    """Return a function which creates an adapter like `adapter`, given the
+    size of its connection pool, or None for the adapters which are left
+    as they are (named pipes).
+    """
+    if isinstance(adapter, UnixAdapter):
+        return functools.partial(UnixSocketAdapter, adapter.socket_path, adapter.timeout)
+    if isinstance(adapter, SSLAdapter):
+        return functools.partial(
+            SSLAdapter,
+            ssl_version=adapter.ssl_version,
+            assert_hostname=adapter.assert_hostname,
+            assert_fingerprint=adapter.assert_fingerprint)
+    if type(adapter) is HTTPAdapter:
+        return HTTPAdapter
+    return None
+
+
+class UnixSocketAdapter(UnixAdapter):
+    """Keep one pool of connections to the socket. docker-py's adapter keeps a
+    pool for each URL, so nearly every request opens a new connection.
+    """
+
+    def __init__(self, socket_url, timeout=60, pool_maxsize=10):
+        super(UnixSocketAdapter, self).__init__(socket_url, timeout)
+        self.pool_maxsize = pool_maxsize
+
+    def get_connection(self, url, proxies=None):
+        with self.pools.lock:
+            pool = self.pools.get(self.socket_path)
+            if pool is None:
+                pool = UnixHTTPConnectionPool(
+                    url, self.socket_path, self.timeout, maxsize=self.pool_maxsize)
+                self.pools[self.socket_path] = pool
+        return pool
+
+
+class ConnectionPoolAdapter(BaseAdapter):
+    """Send the short API calls through a pool of up to `maxsize` connections
+    shared by the threads of parallel operations.
+
+    A streaming call (logs, events, attach, build, pull, push) holds its
+    connection for as long as it runs, and the daemon doesn't always accept
+    another request on it afterwards, so each one is sent through a new
+    connection, which is closed at the end of the response rather than put
+    back in the pool. The calls which upgrade their connection (attach,
+    exec) keep the Connection header docker-py sets.
+    """
+
+    def __init__(self, create_adapter, maxsize):
+        super(ConnectionPoolAdapter, self).__init__()
+        self.create_adapter = create_adapter
+        self.adapter = create_adapter(pool_maxsize=maxsize)
+
+    def send(self, request, stream=False, **kwargs):
+        if not stream:
+            return self.adapter.send(request, stream=False, **kwargs)
+
+        request.headers.setdefault('Connection', 'close')
+        adapter = self.create_adapter(pool_maxsize=1)
+        try:
+            return adapter.send(request, stream=True, **kwargs)
+        finally:
+            # The connection of the response stays open, and is closed
+            # instead of being put back in the closed pool
+            adapter.close()
+
+    def close(self):
+        self.adapter.close()
+
+
+class LazyClient(object):
+    """Proxy to a docker client which is only created on the first access to
+    one of its attributes, so that a project which is never asked to talk to
+    the daemon never connects to it, or negotiates its API version.
+    """
+
+    def __init__(self, create_client):
+        self.create_client = create_client
+        self.client = None
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = self.create_client()
+        return getattr(self.client, name)
+
+    def close(self):
+        """Close the connections of the client, if it was created."""
+        if self.client is not None:
+            self.client.close()
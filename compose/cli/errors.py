@@ -6,12 +6,6 @@ import logging
 import socket
 from textwrap import dedent
 
-from docker.errors import APIError
-from requests.exceptions import ConnectionError as RequestsConnectionError
-from requests.exceptions import ReadTimeout
-from requests.exceptions import SSLError
-from requests.packages.urllib3.exceptions import ReadTimeoutError
-
 from ..const import API_VERSION_TO_ENGINE_VERSION
 from .utils import call_silently
 from .utils import is_docker_for_mac_installed
@@ -40,6 +34,13 @@ class ConnectionError(Exception):
 
 @contextlib.contextmanager
 def handle_connection_errors(client):
+    # Imported here so that importing UserError doesn't import docker-py
+    from docker.errors import APIError
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+    from requests.exceptions import ReadTimeout
+    from requests.exceptions import SSLError
+    from requests.packages.urllib3.exceptions import ReadTimeoutError
+
     try:
         yield
     except SSLError as e:
@@ -1,12 +1,21 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import calendar
+import datetime
+import heapq
+import json
+import logging
+import re
 import sys
+from collections import Counter
+from collections import deque
 from collections import namedtuple
 from itertools import cycle
+from threading import Condition
 from threading import Thread
 
-from docker.errors import APIError
+import enum
 from six.moves import _thread as thread
 from six.moves.queue import Empty
 from six.moves.queue import Queue
@@ -14,10 +23,31 @@ from six.moves.queue import Queue
 from . import colors
 from compose import utils
 from compose.cli.signals import ShutdownException
+from compose.const import LABEL_CONTAINER_NUMBER
 from compose.utils import split_buffer
 
 
+log = logging.getLogger(__name__)
+
+DEFAULT_LOG_BUFFER_SIZE = 1000
+
+# The prefix docker adds to each line when timestamps are requested
+TIMESTAMP_PATTERN = re.compile(
+    r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:\d\d)) ')
+
+# The stream of the lines read from a stream with both stdout and stderr
+UNKNOWN_STREAM = 'unknown'
+
+
+@enum.unique
+class LogFormat(enum.Enum):
+    """How log lines are written to the output."""
+    text = 'text'
+    json = 'json'
+
+
 class LogPresenter(object):
+    split_streams = False
 
     def __init__(self, prefix_width, color_func):
         self.prefix_width = prefix_width
@@ -29,12 +59,187 @@ class LogPresenter(object):
             prefix=self.color_func(prefix + ' |'),
             line=line)
 
+    def present_message(self, container, message):
+        return self.color_func(message)
+
+
+class JsonLogPresenter(object):
+    """Present each log line as a JSON object on a line of its own.
+
+    Lines are tailed separately from stdout and stderr when possible, so
+    `stream` can be reported. It is "unknown" for lines read from a stream
+    which was attached before the containers were started, and `None` for
+    messages from compose itself. Those lines have no timestamp from the
+    daemon, so they are stamped with the time they are received.
+    """
+    split_streams = True
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def for_stream(self, stream):
+        return JsonLogPresenter(stream)
+
+    def present(self, container, line):
+        timestamp, message = split_timestamp(line)
+        return self.dump(container, self.stream or UNKNOWN_STREAM, timestamp, message)
+
+    def present_message(self, container, message):
+        return self.dump(container, None, None, message)
+
+    def dump(self, container, stream, timestamp, message):
+        number = container.labels.get(LABEL_CONTAINER_NUMBER)
+        return json.dumps({
+            'container': container.name,
+            'service': container.service,
+            'number': int(number) if number else None,
+            'stream': stream,
+            'timestamp': timestamp or received_timestamp(),
+            'message': message.rstrip('\r\n'),
+        }, sort_keys=True) + '\n'
+
+
+def received_timestamp():
+    """Return the current time in the format of docker timestamps."""
+    return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def split_timestamp(line):
+    """Split the timestamp docker prefixes to a line when `timestamps` is
+    set from the rest of the line. The timestamp is `None` if there isn't one.
+    """
+    match = TIMESTAMP_PATTERN.match(line)
+    if not match:
+        return None, line
+    return match.group(1), line[match.end():]
+
+
+def timestamp_key(timestamp):
+    """Return a key which sorts docker timestamps chronologically.
+
+    Docker trims trailing zeros from the fraction of a second, so the
+    fraction is padded back to nanoseconds. Lines without a timestamp sort
+    first.
+    """
+    if timestamp is None:
+        return ''
+    if timestamp.endswith('Z'):
+        seconds, _, fraction = timestamp[:-1].partition('.')
+        return '{}.{:0<9}'.format(seconds, fraction)
+
+    seconds, offset = timestamp[:-6], timestamp[-6:]
+    seconds, _, fraction = seconds.partition('.')
+    moment = datetime.datetime.strptime(seconds, '%Y-%m-%dT%H:%M:%S')
+    delta = datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+    moment = moment - delta if offset[0] == '+' else moment + delta
+    return '{}.{:0<9}'.format(moment.strftime('%Y-%m-%dT%H:%M:%S'), fraction)
+
+
+def datetime_key(moment):
+    """Return the `timestamp_key` of a naive UTC datetime."""
+    return '{}.{:06d}000'.format(moment.strftime('%Y-%m-%dT%H:%M:%S'), moment.microsecond)
 
-def build_log_presenters(service_names, monochrome):
+
+class LogFilter(object):
+    """Select which lines of a container's log are shown.
+
+    `since` and `until` are naive UTC datetimes bounding the lines to show.
+    The lines read must carry docker timestamps when either of them is set;
+    they are removed again before presenting unless `timestamps` is set.
+
+    `matcher` is a function from `build_line_matcher`, only the lines it
+    matches are shown, or only the ones it doesn't if `invert` is set. Lines
+    are filtered before they are presented, so lines which aren't shown
+    cost as little as possible.
+    """
+
+    def __init__(self, since=None, until=None, timestamps=True, matcher=None, invert=False):
+        self.since = datetime_key(since) if since else None
+        self.until = datetime_key(until) if until else None
+        self.timestamps = timestamps
+        self.matcher = matcher
+        self.invert = invert
+
+    def __call__(self, lines):
+        if self.needs_timestamps:
+            lines = self.window(lines)
+        if self.matcher is not None:
+            lines = self.match(lines)
+        return lines
+
+    def window(self, lines):
+        for line in lines:
+            key = timestamp_key(split_timestamp(line)[0])
+            if self.since is not None and key < self.since:
+                continue
+            if self.until is not None and key > self.until:
+                # Lines of a container come in order, there is nothing left to show
+                return
+            yield line
+
+    def match(self, lines):
+        matcher, invert = self.matcher, self.invert
+        if not (self.timestamps or self.needs_timestamps):
+            return (line for line in lines if bool(matcher(line)) is not invert)
+
+        # Don't match against the timestamps docker added to the lines
+        return (
+            line for line in lines
+            if bool(matcher(split_timestamp(line)[1])) is not invert
+        )
+
+    @property
+    def needs_timestamps(self):
+        return self.since is not None or self.until is not None
+
+    def display(self, line):
+        if self.timestamps:
+            return line
+        return split_timestamp(line)[1]
+
+    @property
+    def api_since(self):
+        """The whole second to pass as `since` to the logs API, which is
+        precise enough since lines are filtered here as well.
+        """
+        if self.since is None:
+            return None
+        return calendar.timegm(
+            datetime.datetime.strptime(self.since[:19], '%Y-%m-%dT%H:%M:%S').timetuple())
+
+
+def build_line_matcher(texts=(), patterns=()):
+    """Return a function which tells whether a line contains any of the
+    `texts` or matches any of the regular expression `patterns`, or `None`
+    when there is nothing to match.
+
+    Everything is compiled into a single regular expression, so each line
+    is searched once whatever the number of patterns, except for a single
+    text which is looked up directly. Raises `re.error` for an invalid
+    pattern.
+    """
+    if not texts and not patterns:
+        return None
+
+    if len(texts) == 1 and not patterns:
+        text = texts[0]
+        return lambda line: text in line
+
+    regex = re.compile('|'.join(
+        ['(?:{})'.format(pattern) for pattern in patterns] +
+        [re.escape(text) for text in texts]))
+    return regex.search
+
+
+def build_log_presenters(service_names, monochrome, log_format=LogFormat.text):
     """Return an iterable of functions.
 
     Each function can be used to format the logs output of a container.
     """
+    if log_format is LogFormat.json:
+        while True:
+            yield JsonLogPresenter()
+
     prefix_width = max_name_width(service_names)
 
     def no_color(text):
@@ -54,6 +259,123 @@ def max_name_width(service_names, max_index_width=3):
     return max(len(name) for name in service_names) + max_index_width
 
 
+@enum.unique
+class OverflowPolicy(enum.Enum):
+    """What to do with new log lines when a container's buffer is full."""
+    block = 'block'
+    drop_oldest = 'drop-oldest'
+    summarize = 'summarize'
+
+
+class LogQueue(object):
+    """A bounded queue of log lines from many containers.
+
+    Each container gets its own buffer of at most `buffer_size` lines and
+    the buffers are read in turn, so a noisy container can neither starve
+    the others nor grow memory without bound when the output is slow.
+
+    When a buffer is full the `overflow` policy either makes the tailer wait
+    for room (`block`), discards the oldest buffered line (`drop-oldest`) or
+    discards new lines and reports how many were lost once there is room
+    again (`summarize`). Stop and exception items are never discarded.
+
+    `dropped` and `delayed` count, per container, the lines that were
+    discarded and the lines which had to wait for room in the buffer.
+    """
+
+    def __init__(self, buffer_size=DEFAULT_LOG_BUFFER_SIZE, overflow=OverflowPolicy.block):
+        self.buffer_size = buffer_size
+        self.overflow = overflow
+        self.buffers = {}
+        self.sources = deque()
+        self.pending = Counter()
+        self.dropped = Counter()
+        self.delayed = Counter()
+        self.condition = Condition()
+
+    def put(self, item, source=None, presenter=None):
+        with self.condition:
+            if item.item is not None and len(self._buffer(source)) >= self.buffer_size:
+                if not self._make_room(source):
+                    return
+
+            buffer = self._buffer(source)
+            if self.pending[source]:
+                message = dropped_lines_message(source, self.pending.pop(source))
+                if presenter is not None:
+                    message = presenter.present_message(source, message)
+                buffer.append(QueueItem.new(message))
+
+            buffer.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        with self.condition:
+            item = self._next_item()
+            if item is None:
+                self.condition.wait(timeout)
+                item = self._next_item()
+            if item is None:
+                raise Empty()
+
+            self.condition.notify_all()
+            return item
+
+    def _buffer(self, source):
+        buffer = self.buffers.get(source)
+        if buffer is None:
+            buffer = self.buffers[source] = deque()
+            self.sources.append(source)
+        return buffer
+
+    def _make_room(self, source):
+        name = source_name(source)
+
+        if self.overflow is OverflowPolicy.block:
+            self.delayed[name] += 1
+            while len(self._buffer(source)) >= self.buffer_size:
+                self.condition.wait()
+            return True
+
+        self.dropped[name] += 1
+
+        if self.overflow is OverflowPolicy.drop_oldest:
+            buffer = self._buffer(source)
+            for index, queued in enumerate(buffer):
+                if queued.item is not None:
+                    del buffer[index]
+                    return True
+            return True
+
+        self.pending[source] += 1
+        return False
+
+    def _next_item(self):
+        for _ in range(len(self.sources)):
+            source = self.sources[0]
+            self.sources.rotate(-1)
+            buffer = self.buffers[source]
+            if not buffer:
+                continue
+
+            item = buffer.popleft()
+            if not buffer and (item.is_stop or item.exc):
+                # The tailer for this source is done, forget about it
+                del self.buffers[source]
+                self.sources.remove(source)
+            return item
+
+        return None
+
+
+def source_name(source):
+    return getattr(source, 'name_without_project', source)
+
+
+def dropped_lines_message(source, count):
+    return "WARNING: {} log lines from {} were dropped\n".format(count, source_name(source))
+
+
 class LogPrinter(object):
     """Print logs from many containers to a single output stream."""
 
@@ -63,20 +385,25 @@ class LogPrinter(object):
                  event_stream,
                  output=sys.stdout,
                  cascade_stop=False,
-                 log_args=None):
+                 log_args=None,
+                 buffer_size=DEFAULT_LOG_BUFFER_SIZE,
+                 overflow=OverflowPolicy.block,
+                 log_filter=None):
         self.containers = containers
         self.presenters = presenters
         self.event_stream = event_stream
         self.output = utils.get_output_stream(output)
         self.cascade_stop = cascade_stop
         self.log_args = log_args or {}
+        self.queue = LogQueue(buffer_size, overflow)
+        self.log_filter = log_filter or LogFilter()
 
     def run(self):
         if not self.containers:
             return
 
-        queue = Queue()
-        thread_args = queue, self.log_args
+        queue = self.queue
+        thread_args = queue, self.log_args, self.log_filter
         thread_map = build_thread_map(self.containers, self.presenters, thread_args)
         start_producer_thread((
             thread_map,
@@ -90,7 +417,7 @@ class LogPrinter(object):
             if not line:
                 if not thread_map:
                     # There are no running containers left to tail, so exit
-                    return
+                    break
                 # We got an empty line because of a timeout, but there are still
                 # active containers to tail, so continue
                 continue
@@ -98,6 +425,103 @@ class LogPrinter(object):
             self.output.write(line)
             self.output.flush()
 
+        for name, count in sorted(self.queue.dropped.items()):
+            log.warn("%s log lines from %s were dropped because the output "
+                     "could not keep up", count, name)
+
+
+class MergedLogPrinter(object):
+    """Print the logs of many containers in chronological order.
+
+    The logs are read concurrently, each into a buffer of at most
+    `buffer_size` lines, and the buffers are merged on the timestamps of
+    their lines. Only the logs up to now are printed, they are not followed.
+    """
+
+    def __init__(self,
+                 containers,
+                 presenters,
+                 output=sys.stdout,
+                 log_args=None,
+                 buffer_size=DEFAULT_LOG_BUFFER_SIZE,
+                 log_filter=None):
+        self.containers = containers
+        self.presenters = presenters
+        self.output = utils.get_output_stream(output)
+        self.log_args = dict(log_args or {}, follow=False, timestamps=True)
+        self.buffer_size = buffer_size
+        self.log_filter = log_filter or LogFilter()
+
+    def run(self):
+        streams = []
+        for container in self.containers:
+            presenter = next(self.presenters)
+            for generator, log_args, stream_presenter in log_sources(
+                    container, presenter, self.log_args):
+                queue = Queue(maxsize=self.buffer_size)
+                build_reader_thread(
+                    container, generator, log_args, stream_presenter, queue, self.log_filter)
+                streams.append(read_queue(queue, len(streams)))
+
+        for _, _, line in heapq.merge(*streams):
+            self.output.write(line)
+            self.output.flush()
+
+
+def log_sources(container, presenter, log_args):
+    """Return the log generators to read for a container along with their
+    log args and presenter. stdout and stderr are read separately if the
+    presenter reports the stream of each line.
+    """
+    if presenter.split_streams and container.log_stream is None and container.has_api_logs:
+        return [
+            (build_log_generator, stream_log_args(log_args, stream), presenter.for_stream(stream))
+            for stream in ('stdout', 'stderr')
+        ]
+    return [(get_log_generator(container), log_args, presenter)]
+
+
+def stream_log_args(log_args, stream):
+    return dict(log_args, stdout=stream == 'stdout', stderr=stream == 'stderr')
+
+
+def build_reader_thread(container, generator, log_args, presenter, queue, log_filter):
+    reader = Thread(
+        target=read_container_logs,
+        args=(container, generator, log_args, presenter, queue, log_filter))
+    reader.daemon = True
+    reader.start()
+    return reader
+
+
+def read_container_logs(container, generator, log_args, presenter, queue, log_filter):
+    """Put `(key, line)` items for the lines of a container on `queue`,
+    where `key` sorts the lines chronologically.
+    """
+    try:
+        for line in log_filter(generator(container, log_args)):
+            key = timestamp_key(split_timestamp(line)[0])
+            line = presenter.present(container, log_filter.display(line))
+            queue.put(QueueItem.new((key, line)))
+    except Exception as e:
+        queue.put(QueueItem.exception(e))
+        return
+    queue.put(QueueItem.stop())
+
+
+def read_queue(queue, index):
+    """Yield `(key, index, line)` from a queue filled by `read_container_logs`.
+    The index keeps the merge stable for lines with the same timestamp.
+    """
+    while True:
+        item = queue.get()
+        if item.exc:
+            raise item.exc
+        if item.is_stop:
+            return
+        key, line = item.item
+        yield key, index, line
+
 
 def remove_stopped_threads(thread_map):
     for container_id, tailer_thread in list(thread_map.items()):
@@ -105,10 +529,10 @@ def remove_stopped_threads(thread_map):
             thread_map.pop(container_id, None)
 
 
-def build_thread(container, presenter, queue, log_args):
+def build_thread(container, presenter, queue, log_args, log_filter=None):
     tailer = Thread(
         target=tail_container_logs,
-        args=(container, presenter, queue, log_args))
+        args=(container, presenter, queue, log_args, log_filter))
     tailer.daemon = True
     tailer.start()
     return tailer
@@ -136,19 +560,56 @@ class QueueItem(namedtuple('_QueueItem', 'item is_stop exc')):
         return cls(None, True, None)
 
 
-def tail_container_logs(container, presenter, queue, log_args):
-    generator = get_log_generator(container)
+def tail_container_logs(container, presenter, queue, log_args, log_filter=None):
+    log_filter = log_filter or LogFilter()
 
     try:
-        for item in generator(container, log_args):
-            queue.put(QueueItem.new(presenter.present(container, item)))
+        sources = log_sources(container, presenter, log_args)
+        if len(sources) > 1:
+            tail_container_streams(container, sources, queue, log_filter)
+        else:
+            (generator, log_args, presenter), = sources
+            lines = log_filter(generator(container, log_args))
+            put_log_lines(lines, container, presenter, queue, log_filter)
     except Exception as e:
-        queue.put(QueueItem.exception(e))
+        queue.put(QueueItem.exception(e), container, presenter)
         return
 
     if log_args.get('follow'):
-        queue.put(QueueItem.new(presenter.color_func(wait_on_exit(container))))
-    queue.put(QueueItem.stop())
+        message = presenter.present_message(container, wait_on_exit(container))
+        queue.put(QueueItem.new(message), container, presenter)
+    queue.put(QueueItem.stop(), container, presenter)
+
+
+def tail_container_streams(container, sources, queue, log_filter):
+    """Tail the streams of a container concurrently, so every line can be
+    presented along with the stream it was written to.
+    """
+    errors = []
+
+    def tail_stream(generator, log_args, presenter):
+        try:
+            lines = log_filter(generator(container, log_args))
+            put_log_lines(lines, container, presenter, queue, log_filter)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [Thread(target=tail_stream, args=source) for source in sources[1:]]
+    for stream_thread in threads:
+        stream_thread.daemon = True
+        stream_thread.start()
+    tail_stream(*sources[0])
+    for stream_thread in threads:
+        stream_thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def put_log_lines(lines, container, presenter, queue, log_filter):
+    for line in lines:
+        line = presenter.present(container, log_filter.display(line))
+        queue.put(QueueItem.new(line), container, presenter)
 
 
 def get_log_generator(container):
@@ -169,7 +630,9 @@ def build_log_generator(container, log_args):
     # if the container doesn't have a log_stream we need to attach to container
     # before log printer starts running
     if container.log_stream is None:
-        stream = container.logs(stdout=True, stderr=True, stream=True, **log_args)
+        options = {'stdout': True, 'stderr': True}
+        options.update(log_args)
+        stream = container.logs(stream=True, **options)
     else:
         stream = container.log_stream
 
@@ -177,6 +640,7 @@ def build_log_generator(container, log_args):
 
 
 def wait_on_exit(container):
+    from docker.errors import APIError
     try:
         exit_code = container.wait()
         return "%s exited with code %s\n" % (container.name, exit_code)
@@ -6,50 +6,48 @@ import contextlib
 import functools
 import json
 import logging
+import os
 import pipes
 import re
 import subprocess
 import sys
+from collections import OrderedDict
 from inspect import getdoc
 from operator import attrgetter
 
+import six
+
 from . import errors
 from . import signals
 from .. import __version__
-from ..bundle import get_image_digests
-from ..bundle import MissingDigests
-from ..bundle import serialize_bundle
-from ..config import ConfigurationError
-from ..config import parse_environment
-from ..config.environment import Environment
-from ..config.serialize import serialize_config
+from .. import tracing
 from ..const import DEFAULT_TIMEOUT
 from ..const import IS_WINDOWS_PLATFORM
+from ..errors import OperationFailedError
 from ..errors import StreamParseError
 from ..progress_stream import StreamOutputError
-from ..project import NoSuchService
-from ..project import OneOffFilter
-from ..project import ProjectError
-from ..service import BuildAction
-from ..service import BuildError
-from ..service import ConvergenceStrategy
-from ..service import ImageType
-from ..service import NeedsBuildError
-from ..service import OperationFailedError
-from .command import get_config_from_options
-from .command import project_from_options
 from .docopt_command import DocoptDispatcher
 from .docopt_command import get_handler
 from .docopt_command import NoSuchCommand
 from .errors import UserError
 from .formatter import ConsoleWarningFormatter
 from .formatter import Formatter
+from .log_printer import build_line_matcher
 from .log_printer import build_log_presenters
+from .log_printer import DEFAULT_LOG_BUFFER_SIZE
+from .log_printer import LogFormat
+from .log_printer import LogFilter
 from .log_printer import LogPrinter
+from .log_printer import MergedLogPrinter
+from .log_printer import OverflowPolicy
 from .utils import get_version_info
+from .utils import parse_log_time
 from .utils import yesno
 
 
+# The configuration, the project and the bundle modules, and docker-py
+# through them, are only imported by the commands which use them, so that
+# commands like `version`, `help` or `config` don't pay for importing them.
 if not IS_WINDOWS_PLATFORM:
     from dockerpty.pty import PseudoTerminal, RunOperation, ExecOperation
 
@@ -65,21 +63,34 @@ def main():
     except (KeyboardInterrupt, signals.ShutdownException):
         log.error("Aborting.")
         sys.exit(1)
-    except (UserError, NoSuchService, ConfigurationError,
-            ProjectError, OperationFailedError) as e:
-        log.error(e.msg)
+    except Exception as e:
+        if not log_command_error(e):
+            raise
         sys.exit(1)
-    except BuildError as e:
+
+
+def log_command_error(e):
+    """Log an error a command failed with, and return False if it is an
+    unexpected error which should be raised with its traceback.
+    """
+    from ..config import ConfigurationError
+    from ..project import NoSuchService
+    from ..project import ProjectError
+    from ..service import BuildError
+    from ..service import NeedsBuildError
+
+    if isinstance(e, (UserError, NoSuchService, ConfigurationError,
+                      ProjectError, OperationFailedError)):
+        log.error(e.msg)
+    elif isinstance(e, BuildError):
         log.error("Service '%s' failed to build: %s" % (e.service.name, e.reason))
-        sys.exit(1)
-    except StreamOutputError as e:
+    elif isinstance(e, StreamOutputError):
         log.error(e)
-        sys.exit(1)
-    except NeedsBuildError as e:
+    elif isinstance(e, NeedsBuildError):
         log.error("Service '%s' needs to be built, but --no-build was passed." % e.service.name)
-        sys.exit(1)
-    except (errors.ConnectionError, StreamParseError):
-        sys.exit(1)
+    elif not isinstance(e, (errors.ConnectionError, StreamParseError)):
+        return False
+    return True
 
 
 def dispatch():
@@ -96,24 +107,127 @@ def dispatch():
         sys.exit(1)
 
     setup_console_handler(console_handler, options.get('--verbose'))
-    return functools.partial(perform_command, options, handler, command_options)
+    command = functools.partial(perform_command, options, handler, command_options)
+
+    server_socket = os.environ.get('COMPOSE_SERVER')
+    if server_socket and not IS_WINDOWS_PLATFORM:
+        from .server import can_forward
+        from .server import forward_command
+        if can_forward(options['COMMAND'], command_options):
+            return functools.partial(forward_command, server_socket, sys.argv[1:], command)
+    return command
 
 
-def perform_command(options, handler, command_options):
-    if options['COMMAND'] in ('help', 'version'):
+def perform_command(options, handler, command_options, get_project=None):
+    if options['COMMAND'] in ('help', 'version', 'server'):
         # Skip looking up the compose file.
         handler(command_options)
         return
 
-    if options['COMMAND'] in ('config', 'bundle'):
-        command = TopLevelCommand(None)
-        handler(command, options, command_options)
+    with trace_command(options['COMMAND']):
+        if options['COMMAND'] in ('config', 'bundle'):
+            command = TopLevelCommand(None)
+            handler(command, options, command_options)
+            return
+
+        from ..config.environment import Environment
+        from ..parallel import limit_parallel_operations
+        from .command import get_parallel_limit
+        if get_project is None:
+            from .command import project_from_options as get_project
+        parallel_limit = get_parallel_limit(Environment.from_env_file('.'))
+        with tracing.span('load project'):
+            project = get_project(
+                '.', options, get_targeted_service_names(options['COMMAND'], command_options))
+        command = TopLevelCommand(project)
+        with errors.handle_connection_errors(project.client), \
+                limit_parallel_operations(parallel_limit):
+            handler(command, command_options)
+
+
+@contextlib.contextmanager
+def report_timings(enabled):
+    """Print the critical path of the parallel operations run in the block,
+    when enabled.
+    """
+    if not enabled:
+        yield
+        return
+
+    from ..parallel import record_timings
+    with record_timings() as timings:
+        try:
+            yield
+        finally:
+            print_timings(timings)
+
+
+def print_timings(timings):
+    headers = ['Critical path', 'Ready', 'Started', 'Ended', 'Waited for a slot', 'Ran']
+
+    def seconds(value):
+        return '{:.2f}s'.format(value)
+
+    for timing in sorted(timings, key=attrgetter('start_time')):
+        path = timing.critical_path()
+        if not path:
+            continue
+
+        rows = [
+            [
+                timing.names[obj],
+                seconds(timing.ready_times[obj] - timing.start_time),
+                seconds(timing.start_times[obj] - timing.start_time),
+                seconds(timing.end_times[obj] - timing.start_time),
+                seconds(timing.slot_wait(obj)),
+                seconds(timing.end_times[obj] - timing.start_times[obj]),
+            ]
+            for obj in path
+        ]
+        print("{} {} objects took {}".format(
+            timing.msg or 'Processing', len(timing.objects), seconds(timing.duration)),
+            file=sys.stderr)
+        print(Formatter().table(headers, rows), file=sys.stderr)
+        print("Waited for a parallel slot: {} on the critical path, {} in total\n".format(
+            seconds(timing.total_slot_wait(path)), seconds(timing.total_slot_wait())),
+            file=sys.stderr)
+
+
+@contextlib.contextmanager
+def trace_command(command):
+    """Record the spans of the command in COMPOSE_TRACE_FILE, when it's set,
+    in the format set by COMPOSE_TRACE_FORMAT.
+    """
+    from ..config.environment import Environment
+
+    environment = Environment.from_env_file('.')
+    filename = environment.get('COMPOSE_TRACE_FILE')
+    if not filename:
+        yield
         return
 
-    project = project_from_options('.', options)
-    command = TopLevelCommand(project)
-    with errors.handle_connection_errors(project.client):
-        handler(command, command_options)
+    trace_format = environment.get('COMPOSE_TRACE_FORMAT') or 'chrome'
+    if trace_format not in tracing.FORMATS:
+        raise UserError("COMPOSE_TRACE_FORMAT must be one of: {}".format(
+            ', '.join(tracing.FORMATS)))
+
+    with tracing.record(filename, trace_format), tracing.span(command, category='command'):
+        yield
+
+
+# Commands which only work on the services they're given, so only these
+# services and their dependencies need to be loaded
+TARGETED_COMMANDS = ('exec', 'logs', 'port', 'ps')
+
+
+def get_targeted_service_names(command, command_options):
+    if command not in TARGETED_COMMANDS:
+        return None
+
+    service_names = command_options.get('SERVICE')
+    if isinstance(service_names, six.string_types):
+        return [service_names]
+    return service_names or None
 
 
 def setup_logging():
@@ -189,6 +303,7 @@ class TopLevelCommand(object):
       rm                 Remove stopped containers
       run                Run a one-off command
       scale              Set number of containers for a service
+      server             Run the commands of docker-compose clients in a long running process
       start              Start services
       stop               Stop services
       unpause            Unpause services
@@ -240,6 +355,12 @@ class TopLevelCommand(object):
             -o, --output PATH          Path to write the bundle file to.
                                        Defaults to "<project name>.dab".
         """
+        from ..bundle import get_image_digests
+        from ..bundle import MissingDigests
+        from ..bundle import serialize_bundle
+        from .command import get_config_from_options
+        from .command import project_from_options
+
         self.project = project_from_options('.', config_options)
         compose_config = get_config_from_options(self.project_dir, config_options)
 
@@ -302,6 +423,9 @@ class TopLevelCommand(object):
             --services      Print the service names, one per line.
 
         """
+        from ..config.serialize import serialize_config
+        from .command import get_config_from_options
+
         compose_config = get_config_from_options(self.project_dir, config_options)
 
         if options['--quiet']:
@@ -496,7 +620,7 @@ class TopLevelCommand(object):
         """
         View output from containers.
 
-        Usage: logs [options] [SERVICE...]
+        Usage: logs [options] [--grep TEXT...] [--regex PATTERN...] [SERVICE...]
 
         Options:
             --no-color          Produce monochrome output.
@@ -504,7 +628,30 @@ class TopLevelCommand(object):
             -t, --timestamps    Show timestamps.
             --tail="all"        Number of lines to show from the end of the logs
                                 for each container.
+            --format FORMAT     Output format, "text" or "json". The json format
+                                writes one object per line and always includes
+                                timestamps. (default: text)
+            --since SINCE       Only show logs since a unix timestamp, a RFC 3339
+                                date or time, or a relative duration like 42m.
+            --until UNTIL       Only show logs before a unix timestamp, a RFC 3339
+                                date or time, or a relative duration like 42m.
+                                Incompatible with --follow.
+            --merge             Show the logs of all containers in chronological
+                                order. Incompatible with --follow.
+            --grep TEXT         Only show lines containing TEXT. Can be given
+                                more than once to show lines containing any.
+            --regex PATTERN     Only show lines matching the regular expression
+                                PATTERN. Can be given more than once.
+            --invert-match      Show the lines which match neither the --grep
+                                texts nor the --regex patterns.
         """
+        log_format = log_format_from_opts(options)
+        if options['--follow'] and options['--until']:
+            raise UserError("--until and --follow cannot be combined.")
+        if options['--follow'] and options['--merge']:
+            raise UserError("--merge and --follow cannot be combined.")
+
+        log_filter = log_filter_from_opts(options, log_format)
         containers = self.project.containers(service_names=options['SERVICE'], stopped=True)
 
         tail = options['--tail']
@@ -516,15 +663,32 @@ class TopLevelCommand(object):
         log_args = {
             'follow': options['--follow'],
             'tail': tail,
-            'timestamps': options['--timestamps']
+            'timestamps': log_filter.timestamps or log_filter.needs_timestamps,
         }
-        print("Attaching to", list_containers(containers))
+        if log_filter.since:
+            log_args['since'] = log_filter.api_since
+
+        if options['--merge']:
+            from ..config.environment import Environment
+            buffer_size, _ = log_buffer_options_from_env(Environment.from_env_file('.'))
+            MergedLogPrinter(
+                containers,
+                build_log_presenters(self.project.service_names, options['--no-color'], log_format),
+                log_args=log_args,
+                buffer_size=buffer_size,
+                log_filter=log_filter).run()
+            return
+
+        if log_format is LogFormat.text:
+            print("Attaching to", list_containers(containers))
         log_printer_from_project(
             self.project,
             containers,
             options['--no-color'],
             log_args,
-            event_stream=self.project.events(service_names=options['SERVICE'])).run()
+            event_stream=self.project.events(service_names=options['SERVICE']),
+            log_format=log_format,
+            log_filter=log_filter).run()
 
     def pause(self, options):
         """
@@ -563,12 +727,36 @@ class TopLevelCommand(object):
         Usage: ps [options] [SERVICE...]
 
         Options:
-            -q    Only display IDs
+            -q                 Only display IDs
+            --format FORMAT    Format the output, "table" or "json", which is
+                               read from a single list of the containers.
+                               [default: table]
+            --fields FIELDS    The fields of the containers in the JSON
+                               output, separated by commas, like
+                               "name,state,ports". All of them by default.
+            --services         Group the containers by service.
         """
+        ps_format = ps_format_from_opts(options)
+        if ps_format == 'json' and not options['-q']:
+            fields = ps_fields_from_opts(options)
+            summaries = self.project.container_summaries(service_names=options['SERVICE'])
+            if options['--services']:
+                output = group_by_service(
+                    summaries, options['SERVICE'] or self.project.service_names, fields)
+            else:
+                output = [select_fields(summary, fields) for summary in summaries]
+            print(json.dumps(output))
+            return
+        if options['--fields']:
+            raise UserError("--fields flag can only be used with --format json")
+
+        from ..project import OneOffFilter
         containers = sorted(
             self.project.containers(service_names=options['SERVICE'], stopped=True) +
             self.project.containers(service_names=options['SERVICE'], one_off=OneOffFilter.only),
             key=attrgetter('name'))
+        if options['--services']:
+            containers.sort(key=attrgetter('service'))
 
         if options['-q']:
             for container in containers:
@@ -580,17 +768,22 @@ class TopLevelCommand(object):
                 'State',
                 'Ports',
             ]
+            if options['--services']:
+                headers.insert(0, 'Service')
             rows = []
             for container in containers:
                 command = container.human_readable_command
                 if len(command) > 30:
                     command = '%s ...' % command[:26]
-                rows.append([
+                row = [
                     container.name,
                     command,
                     container.human_readable_state,
                     container.human_readable_ports,
-                ])
+                ]
+                if options['--services']:
+                    row.insert(0, container.service)
+                rows.append(row)
             print(Formatter().table(headers, rows))
 
     def pull(self, options):
@@ -642,6 +835,7 @@ class TopLevelCommand(object):
                 '--all flag is obsolete. This is now the default behavior '
                 'of `docker-compose rm`'
             )
+        from ..project import OneOffFilter
         one_off = OneOffFilter.include
 
         all_containers = self.project.containers(
@@ -724,6 +918,8 @@ class TopLevelCommand(object):
         Options:
           -t, --timeout TIMEOUT      Specify a shutdown timeout in seconds.
                                      (default: 10)
+          --timings                  Print how long the parallel operations took,
+                                     and the dependencies which bounded them.
         """
         timeout = int(options.get('--timeout') or DEFAULT_TIMEOUT)
 
@@ -736,7 +932,8 @@ class TopLevelCommand(object):
             except ValueError:
                 raise UserError('Number of containers for service "%s" is not a '
                                 'number' % service_name)
-            self.project.get_service(service_name).scale(num, timeout=timeout)
+            with report_timings(options['--timings']):
+                self.project.get_service(service_name).scale(num, timeout=timeout)
 
     def start(self, options):
         """
@@ -758,9 +955,12 @@ class TopLevelCommand(object):
         Options:
           -t, --timeout TIMEOUT      Specify a shutdown timeout in seconds.
                                      (default: 10)
+          --timings                  Print how long the parallel operations took,
+                                     and the dependencies which bounded them.
         """
         timeout = int(options.get('--timeout') or DEFAULT_TIMEOUT)
-        self.project.stop(service_names=options['SERVICE'], timeout=timeout)
+        with report_timings(options['--timings']):
+            self.project.stop(service_names=options['SERVICE'], timeout=timeout)
 
     def restart(self, options):
         """
@@ -811,6 +1011,11 @@ class TopLevelCommand(object):
                                        print new container names.
                                        Incompatible with --abort-on-container-exit.
             --no-color                 Produce monochrome output.
+            --format FORMAT            Format of the attached output, "text" or "json".
+                                       The containers are attached before they
+                                       start, so json lines have the time they
+                                       are received, and an "unknown" stream.
+                                       (default: text)
             --no-deps                  Don't start linked services.
             --force-recreate           Recreate containers even if their configuration
                                        and image haven't changed.
@@ -826,6 +1031,8 @@ class TopLevelCommand(object):
                                        running. (default: 10)
             --remove-orphans           Remove containers for services not
                                        defined in the Compose file
+            --timings                  Print how long the parallel operations took,
+                                       and the dependencies which bounded them.
         """
         start_deps = not options['--no-deps']
         cascade_stop = options['--abort-on-container-exit']
@@ -833,37 +1040,69 @@ class TopLevelCommand(object):
         timeout = int(options.get('--timeout') or DEFAULT_TIMEOUT)
         remove_orphans = options['--remove-orphans']
         detached = options.get('-d')
+        log_format = log_format_from_opts(options)
 
         if detached and cascade_stop:
             raise UserError("--abort-on-container-exit and -d cannot be combined.")
 
         with up_shutdown_context(self.project, service_names, timeout, detached):
-            to_attach = self.project.up(
-                service_names=service_names,
-                start_deps=start_deps,
-                strategy=convergence_strategy_from_opts(options),
-                do_build=build_action_from_opts(options),
-                timeout=timeout,
-                detached=detached,
-                remove_orphans=remove_orphans)
+            with report_timings(options['--timings']):
+                to_attach = self.project.up(
+                    service_names=service_names,
+                    start_deps=start_deps,
+                    strategy=convergence_strategy_from_opts(options),
+                    do_build=build_action_from_opts(options),
+                    timeout=timeout,
+                    detached=detached,
+                    remove_orphans=remove_orphans)
 
             if detached:
                 return
 
-            log_printer = log_printer_from_project(
-                self.project,
-                filter_containers_to_service_names(to_attach, service_names),
-                options['--no-color'],
-                {'follow': True},
-                cascade_stop,
-                event_stream=self.project.events(service_names=service_names))
-            print("Attaching to", list_containers(log_printer.containers))
-            log_printer.run()
+            with tracing.span('attach logs'):
+                log_printer = log_printer_from_project(
+                    self.project,
+                    filter_containers_to_service_names(to_attach, service_names),
+                    options['--no-color'],
+                    {'follow': True, 'timestamps': log_format is LogFormat.json},
+                    cascade_stop,
+                    event_stream=self.project.events(service_names=service_names),
+                    log_format=log_format)
+                if log_format is LogFormat.text:
+                    print("Attaching to", list_containers(log_printer.containers))
+                log_printer.run()
 
             if cascade_stop:
                 print("Aborting on container exit...")
                 self.project.stop(service_names=service_names, timeout=timeout)
 
+    @classmethod
+    def server(cls, options):
+        """
+        Run the commands of docker-compose clients in a long running process,
+        which keeps the projects it loaded, its connections to the Docker
+        daemon and the containers it listed between the commands.
+
+        When COMPOSE_SERVER is set to the socket of a server, docker-compose
+        sends it the commands which don't prompt, attach to containers or
+        follow their output, and runs them itself when no server listens on
+        the socket.
+
+        Usage: server [--socket PATH]
+
+        Options:
+            --socket PATH   Unix socket to listen on. Defaults to $COMPOSE_SERVER.
+        """
+        if IS_WINDOWS_PLATFORM:
+            raise UserError("The compose server isn't supported on Windows.")
+
+        socket_path = options['--socket'] or os.environ.get('COMPOSE_SERVER')
+        if not socket_path:
+            raise UserError("Pass the socket to listen on with --socket, or set COMPOSE_SERVER.")
+
+        from .server import serve
+        serve(socket_path)
+
     @classmethod
     def version(cls, options):
         """
@@ -886,6 +1125,7 @@ def convergence_strategy_from_opts(options):
     if force_recreate and no_recreate:
         raise UserError("--force-recreate and --no-recreate cannot be combined.")
 
+    from ..service import ConvergenceStrategy
     if force_recreate:
         return ConvergenceStrategy.always
 
@@ -896,6 +1136,7 @@ def convergence_strategy_from_opts(options):
 
 
 def image_type_from_opt(flag, value):
+    from ..service import ImageType
     if not value:
         return ImageType.none
     try:
@@ -904,10 +1145,81 @@ def image_type_from_opt(flag, value):
         raise UserError("%s flag must be one of: all, local" % flag)
 
 
+def log_format_from_opts(options):
+    value = options.get('--format') or LogFormat.text.value
+    try:
+        return LogFormat(value)
+    except ValueError:
+        raise UserError("--format flag must be one of: {}".format(
+            ", ".join(log_format.value for log_format in LogFormat)))
+
+
+PS_FORMATS = ('table', 'json')
+
+
+def ps_format_from_opts(options):
+    value = options.get('--format') or 'table'
+    if value not in PS_FORMATS:
+        raise UserError("--format flag must be one of: {}".format(", ".join(PS_FORMATS)))
+    return value
+
+
+def ps_fields_from_opts(options):
+    from ..container import SUMMARY_FIELDS
+    if not options.get('--fields'):
+        return SUMMARY_FIELDS
+
+    fields = [field.strip() for field in options['--fields'].split(',') if field.strip()]
+    if not fields or any(field not in SUMMARY_FIELDS for field in fields):
+        raise UserError("--fields flag must be fields among: {}".format(
+            ", ".join(SUMMARY_FIELDS)))
+    return fields
+
+
+def select_fields(summary, fields):
+    return OrderedDict((field, summary[field]) for field in fields)
+
+
+def group_by_service(summaries, service_names, fields):
+    """Return the summaries of containers, with their `fields`, by service,
+    with an empty list for the services without containers.
+    """
+    groups = OrderedDict((name, []) for name in service_names)
+    for summary in summaries:
+        groups[summary['service']].append(select_fields(summary, fields))
+    return groups
+
+
+def log_filter_from_opts(options, log_format):
+    times = {}
+    for flag in ('--since', '--until'):
+        if not options.get(flag):
+            continue
+        try:
+            times[flag] = parse_log_time(options[flag])
+        except ValueError:
+            raise UserError(
+                "{} flag must be a unix timestamp, a RFC 3339 date or time, "
+                "or a duration like 42m".format(flag))
+
+    try:
+        matcher = build_line_matcher(options.get('--grep') or (), options.get('--regex') or ())
+    except re.error as e:
+        raise UserError("--regex flag must be a valid regular expression: {}".format(e))
+
+    return LogFilter(
+        since=times.get('--since'),
+        until=times.get('--until'),
+        timestamps=bool(options.get('--timestamps')) or log_format is LogFormat.json,
+        matcher=matcher,
+        invert=bool(options.get('--invert-match')))
+
+
 def build_action_from_opts(options):
     if options['--build'] and options['--no-build']:
         raise UserError("--build and --no-build can not be combined.")
 
+    from ..service import BuildAction
     if options['--build']:
         return BuildAction.force
 
@@ -926,6 +1238,8 @@ def build_container_options(options, detach, command):
     }
 
     if options['-e']:
+        from ..config import parse_environment
+        from ..config.environment import Environment
         container_options['environment'] = Environment.from_command_line(
             parse_environment(options['-e'])
         )
@@ -955,6 +1269,7 @@ def build_container_options(options, detach, command):
 
 
 def run_one_off_container(container_options, project, service, options):
+    from ..service import ConvergenceStrategy
     if not options['--no-deps']:
         deps = service.get_dependency_names()
         if deps:
@@ -1015,13 +1330,40 @@ def log_printer_from_project(
     log_args,
     cascade_stop=False,
     event_stream=None,
+    log_format=LogFormat.text,
+    log_filter=None,
 ):
+    from ..config.environment import Environment
+    buffer_size, overflow = log_buffer_options_from_env(Environment.from_env_file('.'))
     return LogPrinter(
         containers,
-        build_log_presenters(project.service_names, monochrome),
+        build_log_presenters(project.service_names, monochrome, log_format),
         event_stream or project.events(),
         cascade_stop=cascade_stop,
-        log_args=log_args)
+        log_args=log_args,
+        buffer_size=buffer_size,
+        overflow=overflow,
+        log_filter=log_filter)
+
+
+def log_buffer_options_from_env(environment):
+    buffer_size = environment.get('COMPOSE_LOG_BUFFER_SIZE')
+    if not buffer_size:
+        buffer_size = DEFAULT_LOG_BUFFER_SIZE
+    elif buffer_size.isdigit() and int(buffer_size) > 0:
+        buffer_size = int(buffer_size)
+    else:
+        raise UserError("COMPOSE_LOG_BUFFER_SIZE must be a positive number")
+
+    overflow = environment.get('COMPOSE_LOG_OVERFLOW') or OverflowPolicy.block.value
+    try:
+        overflow = OverflowPolicy(overflow)
+    except ValueError:
+        raise UserError(
+            "COMPOSE_LOG_OVERFLOW must be one of: {}".format(
+                ", ".join(policy.value for policy in OverflowPolicy)))
+
+    return buffer_size, overflow
 
 
 def filter_containers_to_service_names(containers, service_names):
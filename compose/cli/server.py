@@ -0,0 +1,437 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import contextlib
+import copy
+import functools
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+from collections import OrderedDict
+
+import six
+from six.moves import socketserver
+
+from .errors import UserError
+
+log = logging.getLogger(__name__)
+
+# Commands which neither prompt, attach to containers nor follow their
+# output, so that a server can run them for a thin client
+SERVER_COMMANDS = (
+    'config', 'create', 'down', 'kill', 'pause', 'port', 'ps', 'pull', 'push',
+    'restart', 'scale', 'start', 'stop', 'unpause',
+)
+
+
+def can_forward(command, command_options):
+    if command == 'up':
+        return bool(command_options.get('-d'))
+    if command == 'rm':
+        return bool(command_options.get('--force'))
+    return command in SERVER_COMMANDS
+
+
+def forward_command(socket_path, argv, run_locally):
+    """Send a command to the server listening on `socket_path` and write its
+    output, or call `run_locally` when no server listens on the socket.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        sock.close()
+        return run_locally()
+
+    with contextlib.closing(sock):
+        send_message(sock.makefile('wb'), 'command', {
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'environment': dict(os.environ),
+            'tty': {'stdout': sys.stdout.isatty(), 'stderr': sys.stderr.isatty()},
+        })
+        for kind, data in read_messages(sock.makefile('rb')):
+            if kind == 'exit':
+                if data:
+                    sys.exit(data)
+                return
+            stream = getattr(sys, kind)
+            stream.write(data)
+            stream.flush()
+
+    raise UserError("The compose server at {} stopped before the command ended.".format(
+        socket_path))
+
+
+def send_message(stream, kind, data):
+    stream.write(json.dumps([kind, data]).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def read_messages(stream):
+    for line in iter(stream.readline, b''):
+        kind, data = json.loads(line.decode('utf-8'))
+        yield kind, data
+
+
+class OutputStream(object):
+    """Stand in for sys.stdout or sys.stderr, which sends what a command
+    writes to the client.
+    """
+
+    encoding = 'utf-8'
+
+    def __init__(self, send, name, tty):
+        self.send = send
+        self.name = name
+        self.tty = tty
+
+    def write(self, data):
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8', 'replace')
+        self.send(self.name, data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.tty
+
+
+class SnapshotClient(object):
+    """Proxy to a docker client which keeps the containers it listed and
+    inspected, until the daemon reports an event about the containers of the
+    project, or a call which may change containers is made through it.
+    """
+
+    cached_calls = ('containers', 'inspect_container')
+    # The calls which don't change containers
+    read_calls = (
+        'events', 'images', 'info', 'inspect_image', 'inspect_network',
+        'inspect_volume', 'logs', 'networks', 'port', 'top', 'version', 'volumes',
+    )
+
+    def __init__(self, client, project_name):
+        self.client = client
+        self.project_name = project_name
+        self.results = {}
+        self.generation = 0
+        self.watching = False
+        self.closed = False
+        self.lock = threading.Lock()
+        self.watch_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not six.callable(attr) or name in self.read_calls:
+            return attr
+        if name in self.cached_calls:
+            return functools.partial(self.cached_call, name)
+        return functools.partial(self.changing_call, name)
+
+    def cached_call(self, name, *args, **kwargs):
+        key = (name, repr(args), repr(sorted(kwargs.items())))
+        with self.lock:
+            if self.watching and key in self.results:
+                return copy.deepcopy(self.results[key])
+            generation = self.generation
+
+        self.watch()
+        result = getattr(self.client, name)(*args, **kwargs)
+        with self.lock:
+            if self.watching and generation == self.generation:
+                self.results[key] = copy.deepcopy(result)
+        return result
+
+    def changing_call(self, name, *args, **kwargs):
+        self.invalidate()
+        try:
+            return getattr(self.client, name)(*args, **kwargs)
+        finally:
+            self.invalidate()
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+            self.results.clear()
+
+    def watch(self):
+        """Follow the events of the containers of the project, if it isn't
+        already, so that the results can be cached.
+        """
+        from ..const import LABEL_PROJECT
+
+        with self.watch_lock:
+            if self.watching or self.closed:
+                return
+            try:
+                events = self.client.events(
+                    decode=True,
+                    filters={'label': '{}={}'.format(LABEL_PROJECT, self.project_name)})
+            except Exception as e:
+                log.debug("Can't follow the events of the daemon: %s", e)
+                return
+
+            thread = threading.Thread(target=self.follow, args=(events,))
+            thread.daemon = True
+            thread.start()
+            with self.lock:
+                self.watching = True
+
+    def follow(self, events):
+        try:
+            for _ in events:
+                self.invalidate()
+                if self.closed:
+                    break
+        except Exception as e:
+            log.debug("Stopped following the events of the daemon: %s", e)
+        finally:
+            with self.lock:
+                self.watching = False
+            self.invalidate()
+
+    def close_snapshot(self):
+        self.closed = True
+        self.invalidate()
+
+    def close(self):
+        """Stop caching the results, and close the connections of the client."""
+        self.close_snapshot()
+        self.client.close()
+
+
+class ProjectCache(object):
+    """The projects loaded for the commands, by project directory and options,
+    the least recently used first. A project is used again while none of the
+    files its configuration was read from has changed, and the environment
+    variables its configuration and its client used have the same values.
+    When there are more than `size` projects, the least recently used are
+    closed.
+    """
+
+    def __init__(self, size=8):
+        self.size = size
+        self.projects = OrderedDict()
+
+    def get_project(self, project_dir, options, service_names=None):
+        from ..config.cache import RecordingEnvironment
+        from ..config.config import ConfigDetails
+        from ..config.config import ConfigFile
+        from ..config.config import get_config_filenames
+        from ..config.config import load
+        from ..config.environment import Environment
+        from .command import get_config_path_from_options
+
+        environment = Environment.from_env_file(project_dir)
+        config_path = get_config_path_from_options(project_dir, options, environment)
+        filenames = [
+            os.path.abspath(f) for f in get_config_filenames(project_dir, config_path)]
+
+        key = json.dumps([
+            os.path.abspath(project_dir),
+            sorted((name, value) for name, value in options.items() if name.startswith('-')),
+        ])
+        cached = self.projects.pop(key, None)
+        if cached is not None:
+            if cached.is_fresh(filenames, environment):
+                for name in cached.environment.missing_keys:
+                    # Warn about the unset variables like a new load would
+                    environment[name]
+                self.projects[key] = cached
+                return cached.project
+            cached.close()
+
+        recorder = RecordingEnvironment(environment)
+        config_details = ConfigDetails(
+            os.path.dirname(filenames[0]),
+            [ConfigFile.from_filename(f) for f in filenames],
+            recorder)
+        config_data = load(config_details)
+        project = self.build_project(config_details.working_dir, config_data, options, recorder)
+
+        self.projects[key] = CachedProject(project, filenames, recorder)
+        while len(self.projects) > self.size:
+            _, evicted = self.projects.popitem(last=False)
+            evicted.close()
+        return project
+
+    def build_project(self, working_dir, config_data, options, environment):
+        from ..const import API_VERSIONS
+        from ..project import Project
+        from .command import get_client
+        from .command import get_project_name
+        from .docker_client import tls_config_from_options
+
+        project_name = get_project_name(working_dir, options.get('--project-name'), environment)
+        host = options.get('--host')
+        if host is not None:
+            host = host.lstrip('=')
+        client = get_client(
+            environment,
+            verbose=options.get('--verbose'),
+            version=environment.get('COMPOSE_API_VERSION', API_VERSIONS[config_data.version]),
+            tls_config=tls_config_from_options(options),
+            host=host)
+        return Project.from_config(project_name, config_data, SnapshotClient(client, project_name))
+
+
+class CachedProject(object):
+    """A project of a ProjectCache, the Compose files it was loaded from, and
+    the RecordingEnvironment its configuration and its client read from.
+    """
+
+    def __init__(self, project, filenames, environment):
+        from ..config.cache import file_stamps
+
+        self.project = project
+        self.filenames = filenames
+        self.environment = environment
+        self.files = file_stamps(filenames + environment.files)
+
+    def is_fresh(self, filenames, environment):
+        from ..config.cache import is_fresh
+
+        return filenames == self.filenames and is_fresh({
+            'variables': self.environment.used_variables,
+            'files': self.files,
+        }, environment)
+
+    def close(self):
+        self.project.client.close()
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """Run the commands thin clients send on a unix socket, one at a time,
+    in the working directory and with the environment of the client.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, socket_path):
+        # Only the user running the server may send it commands
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, socket_path, CommandHandler)
+        finally:
+            os.umask(umask)
+        self.projects = ProjectCache()
+
+    def run_command(self, request, send):
+        from . import main
+
+        with redirect_output(send, request['tty']), \
+                process_environment(request['environment']), \
+                working_directory(request['cwd']):
+            try:
+                options, handler, command_options = get_dispatcher().parse(request['argv'])
+                main.setup_console_handler(main.console_handler, options.get('--verbose'))
+                main.perform_command(
+                    options, handler, command_options, self.projects.get_project)
+            except SystemExit as e:
+                return get_exit_code(e.code)
+            except Exception as e:
+                if not main.log_command_error(e):
+                    log.exception("Unexpected error running %s", ' '.join(request['argv']))
+                return 1
+        return 0
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        _, request = json.loads(line.decode('utf-8'))
+        lock = threading.Lock()
+
+        def send(kind, data):
+            with lock:
+                send_message(self.wfile, kind, data)
+
+        send('exit', self.server.run_command(request, send))
+
+
+def get_dispatcher():
+    from . import main
+    from .docopt_command import DocoptDispatcher
+    from .utils import get_version_info
+
+    return DocoptDispatcher(
+        main.TopLevelCommand,
+        {'options_first': True, 'version': get_version_info('compose')})
+
+
+def get_exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write('{}\n'.format(code))
+    return 1
+
+
+@contextlib.contextmanager
+def redirect_output(send, tty):
+    from .main import console_handler
+
+    streams = sys.stdout, sys.stderr, console_handler.stream
+    sys.stdout = OutputStream(send, 'stdout', tty['stdout'])
+    sys.stderr = console_handler.stream = OutputStream(send, 'stderr', tty['stderr'])
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr, console_handler.stream = streams
+
+
+@contextlib.contextmanager
+def process_environment(environment):
+    saved = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(environment)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    saved = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(saved)
+
+
+def serve(socket_path):
+    """Run a CommandServer on `socket_path` until it is interrupted."""
+    if os.path.exists(socket_path):
+        if is_listening(socket_path):
+            raise UserError("A compose server already listens on {}.".format(socket_path))
+        os.unlink(socket_path)
+
+    server = CommandServer(socket_path)
+    log.info("Listening on %s", socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def is_listening(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        sock.close()
@@ -2,13 +2,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
+import calendar
+import datetime
 import os
 import platform
+import re
 import ssl
 import subprocess
 import sys
-
-import docker
+import time
 
 import compose
 from ..const import IS_WINDOWS_PLATFORM
@@ -86,6 +88,7 @@ def get_version_info(scope):
     if scope == 'compose':
         return versioninfo
     if scope == 'full':
+        import docker
         return (
             "{}\n"
             "docker-py version: {}\n"
@@ -115,6 +118,7 @@ def is_docker_for_mac_installed():
 
 
 def generate_user_agent():
+    import docker
     parts = [
         "docker-compose/{}".format(compose.__version__),
         "docker-py/{}".format(docker.__version__),
@@ -135,3 +139,58 @@ def unquote_path(s):
     if s[0] == '"' and s[-1] == '"':
         return s[1:-1]
     return s
+
+
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ns|us|ms|s|m|h)')
+DURATION_UNITS = {
+    'ns': 1e-9,
+    'us': 1e-6,
+    'ms': 1e-3,
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+}
+
+
+def parse_log_time(value, now=None):
+    """
+    Parse a point in time given to `logs --since` or `--until` and return it
+    as a naive UTC datetime.
+
+    The value can be a unix timestamp, a relative duration like "42m" or
+    "1h30m" which is subtracted from `now`, or a RFC 3339 date or time.
+    Times without a timezone are in the local timezone, like in the docker
+    client. Raises ValueError when the value can't be parsed.
+    """
+    now = now or datetime.datetime.utcnow()
+
+    if re.match(r'^\d+(\.\d+)?$', value):
+        return datetime.datetime.utcfromtimestamp(float(value))
+
+    if re.match(r'^(\d+(\.\d+)?(ns|us|ms|s|m|h))+$', value):
+        seconds = sum(
+            float(amount) * DURATION_UNITS[unit]
+            for amount, unit in DURATION_PATTERN.findall(value))
+        return now - datetime.timedelta(seconds=seconds)
+
+    match = re.match(
+        r'^(\d{4}-\d\d-\d\d)(?:T(\d\d:\d\d(?::\d\d)?)(\.\d+)?)?(Z|[+-]\d\d:\d\d)?$',
+        value)
+    if not match:
+        raise ValueError("invalid time: {}".format(value))
+
+    date, clock, fraction, zone = match.groups()
+    clock = clock or '00:00:00'
+    if len(clock) == 5:
+        clock += ':00'
+    moment = datetime.datetime.strptime(date + 'T' + clock, '%Y-%m-%dT%H:%M:%S')
+    if fraction:
+        moment = moment.replace(microsecond=int(fraction[1:7].ljust(6, '0')))
+
+    if zone is None:
+        offset = time.mktime(moment.timetuple()) - calendar.timegm(moment.timetuple())
+        return moment + datetime.timedelta(seconds=offset)
+    if zone != 'Z':
+        offset = datetime.timedelta(hours=int(zone[1:3]), minutes=int(zone[4:6]))
+        return moment - offset if zone[0] == '+' else moment + offset
+    return moment
@@ -2,12 +2,20 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import functools
+import json
 import logging
+import math
+import os
 import pprint
+import threading
+import time
+import types
 from itertools import chain
 
 import six
 
+from .formatter import Formatter
+
 
 def format_call(args, kwargs):
     args = (repr(a) for a in args)
@@ -58,3 +66,190 @@ class VerboseProxy(object):
                       call_name,
                       format_return(result, self.max_lines))
         return result
+
+
+class ProfilingProxy(object):
+    """Proxy all function calls to another object and record each call in a
+    CallProfile. Generators returned by the calls are recorded until they
+    are exhausted or closed.
+    """
+
+    def __init__(self, obj, profile):
+        self.obj = obj
+        self.profile = profile
+
+    def __getattr__(self, name):
+        attr = getattr(self.obj, name)
+
+        if not six.callable(attr):
+            return attr
+
+        return functools.partial(self.proxy_callable, name)
+
+    def proxy_callable(self, call_name, *args, **kwargs):
+        call = self.profile.call_started(call_name)
+        try:
+            result = getattr(self.obj, call_name)(*args, **kwargs)
+        except Exception:
+            call.failed = True
+            self.profile.call_ended(call)
+            raise
+
+        call.returned = time.time()
+        if isinstance(result, types.GeneratorType):
+            return self.proxy_stream(call, result)
+        self.profile.call_ended(call)
+        return result
+
+    def proxy_stream(self, call, stream):
+        call.streamed = 0
+        try:
+            for chunk in stream:
+                call.streamed += chunk_size(chunk)
+                yield chunk
+        except Exception:
+            call.failed = True
+            raise
+        finally:
+            self.profile.call_ended(call)
+
+
+def chunk_size(chunk):
+    if isinstance(chunk, six.binary_type):
+        return len(chunk)
+    if isinstance(chunk, six.text_type):
+        return len(chunk.encode('utf-8'))
+    # Streams decoded from JSON
+    return len(json.dumps(chunk))
+
+
+class Call(object):
+
+    def __init__(self, name, start, concurrency):
+        self.name = name
+        self.start = start
+        self.returned = self.end = None
+        self.concurrency = concurrency
+        self.streamed = None
+        self.failed = False
+        self.thread = threading.current_thread().ident
+
+    @property
+    def latency(self):
+        return (self.returned or self.end) - self.start
+
+
+class CallProfile(object):
+    """The calls made through ProfilingProxy: how long each took to return,
+    how many bytes the streams they returned carried, and how many calls,
+    including open streams, were running when it started.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = time.time()
+        self.running = 0
+        self.calls = []
+
+    def call_started(self, name):
+        with self.lock:
+            self.running += 1
+            return Call(name, time.time(), self.running)
+
+    def call_ended(self, call):
+        call.end = time.time()
+        with self.lock:
+            self.running -= 1
+            self.calls.append(call)
+
+    def summary(self):
+        """Return the count, latencies in milliseconds, bytes streamed and
+        highest concurrency of the calls to each method, by decreasing total
+        latency.
+        """
+        with self.lock:
+            calls = list(self.calls)
+
+        by_name = {}
+        for call in calls:
+            by_name.setdefault(call.name, []).append(call)
+
+        summary = []
+        for name, calls in by_name.items():
+            latencies = sorted(call.latency * 1000 for call in calls)
+            summary.append({
+                'call': name,
+                'count': len(calls),
+                'failed': sum(1 for call in calls if call.failed),
+                'total': sum(latencies),
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1],
+                'streamed': sum(call.streamed or 0 for call in calls),
+                'concurrency': max(call.concurrency for call in calls),
+            })
+        return sorted(summary, key=lambda item: item['total'], reverse=True)
+
+    def format_summary(self):
+        headers = [
+            'Call', 'Count', 'Failed', 'Total ms', 'p50 ms', 'p95 ms', 'p99 ms',
+            'Max ms', 'Streamed bytes', 'Concurrency',
+        ]
+        rows = [
+            [
+                item['call'], item['count'], item['failed'],
+                '{:.1f}'.format(item['total']),
+                '{:.1f}'.format(item['p50']),
+                '{:.1f}'.format(item['p95']),
+                '{:.1f}'.format(item['p99']),
+                '{:.1f}'.format(item['max']),
+                item['streamed'], item['concurrency'],
+            ]
+            for item in self.summary()
+        ]
+        return Formatter().table(headers, rows)
+
+    def trace_events(self):
+        """Return the calls as complete events of the Chrome trace format,
+        which last until the streams they returned were read.
+        """
+        with self.lock:
+            calls = list(self.calls)
+
+        pid = os.getpid()
+        return [
+            {
+                'name': call.name,
+                'cat': 'docker',
+                'ph': 'X',
+                'ts': int((call.start - self.origin) * 1000000),
+                'dur': int((call.end - call.start) * 1000000),
+                'pid': pid,
+                'tid': call.thread,
+                'args': {
+                    'latency_ms': round(call.latency * 1000, 3),
+                    'streamed': call.streamed,
+                    'concurrency': call.concurrency,
+                    'failed': call.failed,
+                },
+            }
+            for call in calls
+        ]
+
+    def write(self, filename):
+        """Write the calls to `filename` in the Chrome trace format, along
+        with their summary, which trace viewers ignore.
+        """
+        with open(filename, 'w') as fh:
+            json.dump({
+                'traceEvents': self.trace_events(),
+                'displayTimeUnit': 'ms',
+                'calls': self.summary(),
+            }, fh, indent=2)
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a sorted list of values."""
+    rank = int(math.ceil(fraction * len(values)))
+    return values[max(rank, 1) - 1]
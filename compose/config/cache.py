@@ -0,0 +1,190 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+
+import six
+from six.moves import cPickle as pickle
+
+from .. import __version__
+from .config import ConfigDetails
+from .config import ConfigFile
+from .config import find
+from .config import get_config_filenames
+from .config import load
+from .environment import Environment
+from .environment import HOME_VARIABLES
+
+
+log = logging.getLogger(__name__)
+
+
+class RecordingEnvironment(Environment):
+    """An environment which records the variables that are looked up in it,
+    and the files besides the Compose files that the configuration is read
+    from, so a cached configuration can tell when it is out of date.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingEnvironment, self).__init__(*args, **kwargs)
+        self.used_variables = {}
+        self.files = []
+
+    def record_variable(self, key):
+        if key not in self.used_variables:
+            self.used_variables[key] = super(RecordingEnvironment, self).get(key)
+
+    def record_file(self, filename):
+        if filename not in self.files:
+            self.files.append(filename)
+
+    def record_home(self):
+        for key in HOME_VARIABLES:
+            self.record_variable(key)
+
+    def merge_recorded(self, other):
+        super(RecordingEnvironment, self).merge_recorded(other)
+        for key, value in six.iteritems(other.used_variables):
+            self.used_variables.setdefault(key, value)
+        for filename in other.files:
+            self.record_file(filename)
+
+    def __getitem__(self, key):
+        self.record_variable(key)
+        return super(RecordingEnvironment, self).__getitem__(key)
+
+    def __contains__(self, key):
+        self.record_variable(key)
+        return super(RecordingEnvironment, self).__contains__(key)
+
+    def get(self, key, *args, **kwargs):
+        self.record_variable(key)
+        return super(RecordingEnvironment, self).get(key, *args, **kwargs)
+
+
+class ConfigCache(object):
+    """A cache of loaded configurations, stored in `directory`.
+
+    An entry is found from the Compose files which are loaded. It is used
+    if none of the files the configuration was read from, including
+    extended files and `env_file`s, has changed since, and if the
+    environment variables used by the configuration have the same values.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def load(self, base_dir, filenames, environment):
+        """Return the working directory and the configuration of the Compose
+        files, loading them only when there is no up to date cache entry.
+        """
+        filenames = [os.path.abspath(f) for f in get_config_filenames(base_dir, filenames)]
+        path = self.entry_path(filenames)
+
+        entry = self.read(path)
+        if entry is not None and is_fresh(entry, environment):
+            log.debug("Using cached configuration %s", path)
+            for key in entry['missing_keys']:
+                # Warn about the unset variables like a new load would
+                environment[key]
+            return entry['working_dir'], entry['config']
+
+        recorder = RecordingEnvironment(environment)
+        config_details = ConfigDetails(
+            os.path.dirname(filenames[0]),
+            [ConfigFile.from_filename(f) for f in filenames],
+            recorder)
+        config = load(config_details)
+        environment.missing_keys.extend(
+            key for key in recorder.missing_keys if key not in environment.missing_keys)
+
+        self.write(path, {
+            'working_dir': config_details.working_dir,
+            'config': config,
+            'files': file_stamps(filenames + recorder.files),
+            'variables': recorder.used_variables,
+            'missing_keys': recorder.missing_keys,
+        })
+        return config_details.working_dir, config
+
+    def entry_path(self, filenames):
+        key = hashlib.sha256()
+        for part in [__version__, sys.version] + filenames:
+            key.update(part.encode('utf-8'))
+            key.update(b'\0')
+        return os.path.join(self.directory, key.hexdigest())
+
+    def read(self, path):
+        try:
+            with open(path, 'rb') as fh:
+                return pickle.load(fh)
+        except (IOError, OSError):
+            return None
+        except Exception as e:
+            log.debug("Ignoring unreadable cache entry %s: %s", path, e)
+            return None
+
+    def write(self, path, entry):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(entry, fh, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, path)
+        except (IOError, OSError, pickle.PicklingError) as e:
+            log.debug("Could not write cache entry %s: %s", path, e)
+
+
+def file_stamp(filename):
+    """Return the modification time, size and digest of the contents of a
+    file, or None if it can't be read.
+    """
+    try:
+        stat = os.stat(filename)
+        with open(filename, 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+    return stat.st_mtime, stat.st_size, digest
+
+
+def file_stamps(filenames):
+    return dict((filename, file_stamp(filename)) for filename in filenames)
+
+
+def is_fresh(entry, environment):
+    for key, value in six.iteritems(entry['variables']):
+        if environment.get(key) != value:
+            return False
+
+    for filename, stamp in six.iteritems(entry['files']):
+        if stamp is None or file_stamp(filename) != stamp:
+            return False
+
+    return True
+
+
+def get_cache_directory(environment):
+    cache_home = environment.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'docker-compose', 'config')
+
+
+def load_cached(base_dir, filenames, environment, service_names=None):
+    """Return the working directory and the configuration of the Compose
+    files. The configuration is cached when COMPOSE_CONFIG_CACHE is set.
+
+    Without the cache, only the services named `service_names`, if given,
+    and their dependencies are loaded. The cache always holds the full
+    configuration.
+    """
+    if filenames == ['-'] or not environment.get_boolean('COMPOSE_CONFIG_CACHE'):
+        config_details = find(base_dir, filenames, environment)
+        return config_details.working_dir, load(config_details, service_names)
+
+    return ConfigCache(get_cache_directory(environment)).load(base_dir, filenames, environment)
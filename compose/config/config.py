@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 import functools
 import logging
+import multiprocessing
 import os
 import string
 import sys
@@ -119,6 +120,9 @@ DEFAULT_OVERRIDE_FILENAME = 'docker-compose.override.yml'
 
 log = logging.getLogger(__name__)
 
+# The libyaml loader is much faster on large files
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class ConfigDetails(namedtuple('_ConfigDetails', 'working_dir config_files environment')):
     """
@@ -230,17 +234,22 @@ def find(base_dir, filenames, environment):
             environment
         )
 
+    filenames = get_config_filenames(base_dir, filenames)
+    return ConfigDetails(
+        os.path.dirname(filenames[0]),
+        [ConfigFile.from_filename(f) for f in filenames],
+        environment
+    )
+
+
+def get_config_filenames(base_dir, filenames):
     if filenames:
         filenames = [os.path.join(base_dir, f) for f in filenames]
     else:
         filenames = get_default_config_files(base_dir)
 
     log.debug("Using configuration files: {}".format(",".join(filenames)))
-    return ConfigDetails(
-        os.path.dirname(filenames[0]),
-        [ConfigFile.from_filename(f) for f in filenames],
-        environment
-    )
+    return filenames
 
 
 def validate_config_version(config_files):
@@ -298,14 +307,20 @@ def find_candidates_in_parent_dirs(filenames, path):
     return (candidates, path)
 
 
-def load(config_details):
+def load(config_details, service_names=None):
     """Load the configuration from a working directory and a list of
     configuration files.  Files are loaded in order, and merged on top
     of each other to create the final configuration.
 
+    When `service_names` is given, only these services, the services they
+    depend on, and the networks they use are loaded.
+
     Return a fully interpolated, extended and validated configuration.
     """
     validate_config_version(config_details.config_files)
+    if service_names:
+        config_details = select_services(config_details, service_names)
+    extends_cache = ExtendsCache(config_details.config_files)
 
     processed_files = [
         process_config_file(config_file, config_details.environment)
@@ -320,15 +335,101 @@ def load(config_details):
     networks = load_mapping(
         config_details.config_files, 'get_networks', 'Network'
     )
-    service_dicts = load_services(config_details, main_file)
+    service_dicts = load_services(config_details, main_file, extends_cache)
 
     if main_file.version != V1:
         for service_dict in service_dicts:
             match_named_volumes(service_dict, volumes)
 
+    if service_names:
+        used_networks = set(['default']).union(*[
+            service_dict.get('networks', {}) for service_dict in service_dicts
+        ])
+        networks = dict(
+            (name, network) for name, network in networks.items() if name in used_networks
+        )
+
     return Config(main_file.version, service_dicts, volumes, networks)
 
 
+def select_services(config_details, service_names):
+    """Return the config details with only the services named `service_names`,
+    and the services they depend on or extend, in the config files.
+
+    The files are returned unchanged when the services can't be told apart
+    before the files are interpolated and validated, so the full load
+    reports the errors.
+    """
+    loaded_files = set(
+        os.path.abspath(config_file.filename)
+        for config_file in config_details.config_files if config_file.filename)
+    references = {}
+    try:
+        for config_file in config_details.config_files:
+            for name, service_dict in config_file.get_service_dicts().items():
+                references.setdefault(name, set()).update(get_service_references(
+                    service_dict, config_details.working_dir, loaded_files))
+        if any('$' in name for names in references.values() for name in names):
+            return config_details
+    except (AttributeError, TypeError):
+        return config_details
+
+    selected = set()
+    names = [name for name in service_names if name in references]
+    while names:
+        name = names.pop()
+        if name not in selected:
+            selected.add(name)
+            names.extend(ref for ref in references[name] if ref in references)
+
+    return config_details._replace(config_files=[
+        config_file._replace(config=select_config_file_services(config_file, selected))
+        for config_file in config_details.config_files
+    ])
+
+
+def get_service_references(service_dict, working_dir='.', loaded_files=()):
+    """Return the names of the services which a service dict of a Compose
+    file, which isn't validated yet, may depend on or extend. The services
+    extended in other files are only references when the file is one of
+    the `loaded_files`.
+    """
+    names = set(link.split(':')[0] for link in service_dict.get('links') or [])
+    names.update(service_dict.get('depends_on') or [])
+
+    for volume_from in service_dict.get('volumes_from') or []:
+        parts = volume_from.split(':')
+        if parts[0] in ('service', 'container') and len(parts) > 1:
+            names.add(parts[1])
+        else:
+            names.add(parts[0])
+
+    for field in ('network_mode', 'net'):
+        _, _, name = (service_dict.get(field) or '').partition(':')
+        if name:
+            names.add(name)
+
+    extends = service_dict.get('extends')
+    if isinstance(extends, six.string_types):
+        names.add(extends)
+    elif extends and ('file' not in extends or
+                      expand_path(working_dir, extends['file']) in loaded_files):
+        names.add(extends.get('service'))
+
+    return names
+
+
+def select_config_file_services(config_file, names):
+    services = dict(
+        (name, service_dict)
+        for name, service_dict in config_file.get_service_dicts().items()
+        if name in names
+    )
+    if config_file.version == V1:
+        return services
+    return dict(config_file.config, services=services)
+
+
 def load_mapping(config_files, get_func, entity_type):
     mapping = {}
 
@@ -338,6 +439,8 @@ def load_mapping(config_files, get_func, entity_type):
             if not config:
                 continue
 
+            # Interpolation may return the dicts of the Compose file unchanged
+            config = dict(config)
             external = config.get('external')
             if external:
                 if len(config.keys()) > 1:
@@ -367,53 +470,148 @@ def load_mapping(config_files, get_func, entity_type):
     return mapping
 
 
-def load_services(config_details, config_file):
-    def build_service(service_name, service_dict, service_names):
-        service_config = ServiceConfig.with_abs_paths(
-            config_details.working_dir,
-            config_file.filename,
-            service_name,
-            service_dict)
-        resolver = ServiceExtendsResolver(
-            service_config, config_file, environment=config_details.environment
-        )
-        service_dict = process_service(resolver.run())
+def load_services(config_details, config_file, extends_cache=None, workers=None):
+    """Return the sorted service dicts of the configuration.
 
-        service_config = service_config._replace(config=service_dict)
-        validate_service(service_config, service_names, config_file.version)
-        service_dict = finalize_service(
-            service_config,
-            service_names,
-            config_file.version,
-            config_details.environment)
-        return service_dict
+    With more than one worker, which is read from COMPOSE_CONFIG_WORKERS
+    when `workers` isn't given, the services are built in a pool of
+    processes.
+    """
+    extends_cache = extends_cache or ExtendsCache(config_details.config_files)
+    if workers is None:
+        workers = get_config_workers(config_details.environment)
 
     def build_services(service_config):
-        service_names = service_config.keys()
-        return sort_service_dicts([
-            build_service(name, service_dict, service_names)
-            for name, service_dict in service_config.items()
-        ])
+        service_names = list(service_config.keys())
+        service_items = list(service_config.items())
+        if workers > 1 and len(service_items) > 1:
+            service_dicts = build_service_dicts_in_pool(
+                workers, config_details, config_file, extends_cache, service_items,
+                service_names)
+            raise_service_errors(
+                [error for error in service_dicts if isinstance(error, ConfigurationError)])
+        else:
+            service_dicts = [
+                build_service(
+                    config_details, config_file, extends_cache, name, service_dict,
+                    service_names)
+                for name, service_dict in service_items
+            ]
+        return sort_service_dicts(service_dicts)
+
+    return build_services(
+        merge_service_configs(config_details.config_files, config_file.version))
+
+
+def merge_service_configs(config_files, version):
+    """Return the service dicts of the config files, each merged on top of
+    the previous ones.
+    """
+    service_configs = [file.get_service_dicts() for file in config_files]
+    if len(service_configs) == 1:
+        return service_configs[0]
+
+    return {
+        name: merge_all_service_dicts_from_files(
+            [service_config[name] for service_config in service_configs if name in service_config],
+            version)
+        for name in set().union(*service_configs)
+    }
+
+
+def get_config_workers(environment):
+    value = environment.get('COMPOSE_CONFIG_WORKERS')
+    if not value:
+        return 1
+    try:
+        return int(value)
+    except ValueError:
+        raise ConfigurationError(
+            "COMPOSE_CONFIG_WORKERS must be a number of processes, not '{}'".format(value))
+
+
+def build_service(config_details, config_file, extends_cache, service_name,
+                  service_dict, service_names):
+    service_config = ServiceConfig.with_abs_paths(
+        config_details.working_dir,
+        config_file.filename,
+        service_name,
+        service_dict)
+    resolver = ServiceExtendsResolver(
+        service_config,
+        config_file,
+        environment=config_details.environment,
+        extends_cache=extends_cache,
+    )
+    service_dict = process_service(resolver.run(), config_details.environment)
+
+    service_config = service_config._replace(config=service_dict)
+    validate_service(service_config, service_names, config_file.version)
+    service_dict = finalize_service(
+        service_config,
+        service_names,
+        config_file.version,
+        config_details.environment)
+    return service_dict
 
-    def merge_services(base, override):
-        all_service_names = set(base) | set(override)
-        return {
-            name: merge_service_dicts_from_files(
-                base.get(name, {}),
-                override.get(name, {}),
-                config_file.version)
-            for name in all_service_names
-        }
-
-    service_configs = [
-        file.get_service_dicts() for file in config_details.config_files
+
+def build_service_dicts(config_details, config_file, extends_cache, service_items,
+                        service_names):
+    """Return the service dict of each of the `(name, service_dict)` pairs in
+    `service_items`, or the ConfigurationError raised when building it.
+    """
+    service_dicts = []
+    for name, service_dict in service_items:
+        try:
+            service_dicts.append(build_service(
+                config_details, config_file, extends_cache, name, service_dict, service_names))
+        except ConfigurationError as e:
+            service_dicts.append(e)
+    return service_dicts
+
+
+def build_service_dicts_in_pool(workers, config_details, config_file, extends_cache,
+                                service_items, service_names):
+    """Like build_service_dicts, but build the services in contiguous chunks,
+    one per worker process, so the result is in the same order.
+    """
+    size = -(-len(service_items) // workers)
+    tasks = [
+        (config_details, config_file, extends_cache, service_items[i:i + size], service_names)
+        for i in range(0, len(service_items), size)
     ]
+    # Forked workers could inherit locks held by other threads, start new
+    # interpreters where it's possible.
+    context = multiprocessing.get_context('spawn') if six.PY3 else multiprocessing
+    pool = context.Pool(len(tasks))
+    try:
+        chunks = pool.map(build_service_dicts_task, tasks)
+    finally:
+        pool.terminate()
 
-    service_config = service_configs[0]
-    for next_config in service_configs[1:]:
-        service_config = merge_services(service_config, next_config)
+    service_dicts = []
+    for chunk, environment in chunks:
+        config_details.environment.merge_recorded(environment)
+        service_dicts.extend(chunk)
+    return service_dicts
 
-    return build_services(service_config)
+
+def build_service_dicts_task(args):
+    # Also return the environment, which records the variables that were used
+    return build_service_dicts(*args), args[0].environment
+
+
+def raise_service_errors(errors):
+    """Raise the first of the errors of the services built by
+    build_service_dicts, with the messages of all of them, like handle_errors
+    does.
+    """
+    if not errors:
+        return
+    error = errors[0]
+    if len(errors) > 1:
+        error.msg = '\n'.join(sorted(six.text_type(e) for e in errors))
+    raise error
 
 
 def interpolate_config_section(config_file, config, section, environment):
@@ -453,21 +651,63 @@ def process_config_file(config_file, environment, service_name=None):
     config_file = config_file._replace(config=processed_config)
     validate_against_config_schema(config_file)
 
-    if service_name and service_name not in services:
+    if service_name:
+        validate_extended_service_exists(config_file, service_name)
+
+    return config_file
+
+
+def validate_extended_service_exists(config_file, service_name):
+    if service_name not in config_file.get_service_dicts():
         raise ConfigurationError(
             "Cannot extend service '{}' in {}: Service not found".format(
                 service_name, config_file.filename))
 
-    return config_file
+
+class ExtendsCache(object):
+    """What was read and resolved for `extends` while loading a configuration,
+    so that when many services extend the same file or service, the file is
+    read and processed once and the service it extends is resolved once.
+
+    `config_files` are the Compose files read by absolute path,
+    `processed_files` the same files interpolated and validated, and
+    `services` the resolved services by (absolute path, service name).
+    """
+
+    def __init__(self, config_files=()):
+        self.config_files = {}
+        self.processed_files = {}
+        self.services = {}
+        for config_file in config_files:
+            if config_file.filename:
+                self.config_files[os.path.abspath(config_file.filename)] = config_file
+
+    def config_file(self, filename):
+        filename = os.path.abspath(filename)
+        config_file = self.config_files.get(filename)
+        if config_file is None:
+            config_file = self.config_files[filename] = ConfigFile.from_filename(filename)
+        return config_file
+
+    def processed_file(self, filename, environment, service_name):
+        filename = os.path.abspath(filename)
+        config_file = self.processed_files.get(filename)
+        if config_file is None:
+            config_file = self.processed_files[filename] = process_config_file(
+                self.config_file(filename), environment)
+        validate_extended_service_exists(config_file, service_name)
+        return config_file
 
 
 class ServiceExtendsResolver(object):
-    def __init__(self, service_config, config_file, environment, already_seen=None):
+    def __init__(self, service_config, config_file, environment, already_seen=None,
+                 extends_cache=None):
         self.service_config = service_config
         self.working_dir = service_config.working_dir
         self.already_seen = already_seen or []
         self.config_file = config_file
         self.environment = environment
+        self.extends_cache = extends_cache or ExtendsCache()
 
     @property
     def signature(self):
@@ -494,16 +734,37 @@ class ServiceExtendsResolver(object):
         config_path = self.get_extended_config_path(extends)
         service_name = extends['service']
 
-        extends_file = ConfigFile.from_filename(config_path)
+        extends_file = self.extends_cache.config_file(config_path)
+        self.environment.record_file(config_path)
         validate_config_version([self.config_file, extends_file])
-        extended_file = process_config_file(
-            extends_file, self.environment, service_name=service_name
+        extended_file = self.extends_cache.processed_file(
+            config_path, self.environment, service_name
         )
         service_config = extended_file.get_service(service_name)
 
         return config_path, service_config, service_name
 
     def resolve_extends(self, extended_config_path, service_dict, service_name):
+        other_service_dict = self.resolve_extended_service(
+            extended_config_path, service_dict, service_name)
+
+        return merge_service_dicts(
+            other_service_dict,
+            self.service_config.config,
+            self.config_file.version)
+
+    def resolve_extended_service(self, extended_config_path, service_dict, service_name):
+        already_seen = self.already_seen + [self.signature]
+        signature = os.path.abspath(extended_config_path), service_name
+        if signature in already_seen:
+            raise CircularReference(already_seen + [signature])
+
+        # The service has been resolved for another service extending it,
+        # without a cycle, so it can't be part of one now either
+        other_service_dict = self.extends_cache.services.get(signature)
+        if other_service_dict is not None:
+            return other_service_dict
+
         resolver = ServiceExtendsResolver(
             ServiceConfig.with_abs_paths(
                 os.path.dirname(extended_config_path),
@@ -511,21 +772,20 @@ class ServiceExtendsResolver(object):
                 service_name,
                 service_dict),
             self.config_file,
-            already_seen=self.already_seen + [self.signature],
-            environment=self.environment
+            already_seen=already_seen,
+            environment=self.environment,
+            extends_cache=self.extends_cache,
         )
 
         service_config = resolver.run()
-        other_service_dict = process_service(service_config)
+        other_service_dict = process_service(service_config, self.environment)
         validate_extended_service_dict(
             other_service_dict,
             extended_config_path,
             service_name)
 
-        return merge_service_dicts(
-            other_service_dict,
-            self.service_config.config,
-            self.config_file.version)
+        self.extends_cache.services[signature] = other_service_dict
+        return other_service_dict
 
     def get_extended_config_path(self, extends_options):
         """Service we are extending either has a value for 'file' set, which we
@@ -538,7 +798,7 @@ class ServiceExtendsResolver(object):
             extends_options,
             filename)
         if 'file' in extends_options:
-            return expand_path(self.working_dir, extends_options['file'])
+            return expand_path(self.working_dir, extends_options['file'], self.environment)
         return filename
 
 
@@ -549,6 +809,8 @@ def resolve_environment(service_dict, environment=None):
     env = {}
     for env_file in service_dict.get('env_file', []):
         env.update(env_vars_from_file(env_file))
+        if environment is not None:
+            environment.record_file(env_file)
 
     env.update(parse_environment(service_dict.get('environment')))
     return dict(resolve_env_var(k, v, environment) for k, v in six.iteritems(env))
@@ -603,25 +865,28 @@ def validate_service(service_config, service_names, version):
             .format(name=service_name))
 
 
-def process_service(service_config):
+def process_service(service_config, environment=None):
     working_dir = service_config.working_dir
     service_dict = dict(service_config.config)
 
     if 'env_file' in service_dict:
         service_dict['env_file'] = [
-            expand_path(working_dir, path)
+            expand_path(working_dir, path, environment)
             for path in to_list(service_dict['env_file'])
         ]
 
     if 'build' in service_dict:
         if isinstance(service_dict['build'], six.string_types):
-            service_dict['build'] = resolve_build_path(working_dir, service_dict['build'])
+            service_dict['build'] = resolve_build_path(
+                working_dir, service_dict['build'], environment)
         elif isinstance(service_dict['build'], dict) and 'context' in service_dict['build']:
             path = service_dict['build']['context']
-            service_dict['build']['context'] = resolve_build_path(working_dir, path)
+            service_dict['build'] = dict(
+                service_dict['build'],
+                context=resolve_build_path(working_dir, path, environment))
 
     if 'volumes' in service_dict and service_dict.get('volume_driver') is None:
-        service_dict['volumes'] = resolve_volume_paths(working_dir, service_dict)
+        service_dict['volumes'] = resolve_volume_paths(working_dir, service_dict, environment)
 
     if 'labels' in service_dict:
         service_dict['labels'] = parse_labels(service_dict['labels'])
@@ -678,8 +943,7 @@ def finalize_service(service_config, service_names, version, environment):
 
 def normalize_v1_service_format(service_dict):
     if 'log_driver' in service_dict or 'log_opt' in service_dict:
-        if 'logging' not in service_dict:
-            service_dict['logging'] = {}
+        service_dict['logging'] = dict(service_dict.get('logging') or {})
         if 'log_driver' in service_dict:
             service_dict['logging']['driver'] = service_dict['log_driver']
             del service_dict['log_driver']
@@ -701,57 +965,70 @@ def merge_service_dicts_from_files(base, override, version):
     field. This is not handled by `merge_service_dicts()` which is used to
     perform the `extends`.
     """
-    new_service = merge_service_dicts(base, override, version)
-    if 'extends' in override:
-        new_service['extends'] = override['extends']
-    elif 'extends' in base:
-        new_service['extends'] = base['extends']
+    return merge_all_service_dicts_from_files([base, override], version)
+
+
+def merge_all_service_dicts_from_files(service_dicts, version):
+    """Like `merge_service_dicts_from_files()`, for the definitions of a
+    service in any number of files, which are merged in one pass.
+    """
+    new_service = merge_all_service_dicts(service_dicts, version)
+    for service_dict in reversed(service_dicts):
+        if 'extends' in service_dict:
+            new_service['extends'] = service_dict['extends']
+            break
     return new_service
 
 
 class MergeDict(dict):
-    """A dict-like object responsible for merging two dicts into one."""
+    """A dict-like object responsible for merging dicts into one, each on
+    top of the previous ones.
+    """
 
-    def __init__(self, base, override):
-        self.base = base
-        self.override = override
+    def __init__(self, base, *overrides):
+        self.dicts = (base,) + overrides
+        self.fields = set().union(*self.dicts)
 
     def needs_merge(self, field):
-        return field in self.base or field in self.override
+        return field in self.fields
 
     def merge_field(self, field, merge_func, default=None):
         if not self.needs_merge(field):
             return
 
-        self[field] = merge_func(
-            self.base.get(field, default),
-            self.override.get(field, default))
+        self[field] = merge_func(*[d.get(field, default) for d in self.dicts])
 
     def merge_mapping(self, field, parse_func):
         if not self.needs_merge(field):
             return
 
-        self[field] = parse_func(self.base.get(field))
-        self[field].update(parse_func(self.override.get(field)))
+        self[field] = parse_func(self.dicts[0].get(field))
+        for d in self.dicts[1:]:
+            self[field].update(parse_func(d.get(field)))
 
     def merge_sequence(self, field, parse_func):
-        def parse_sequence_func(seq):
-            return to_mapping((parse_func(item) for item in seq), 'merge_field')
-
         if not self.needs_merge(field):
             return
 
-        merged = parse_sequence_func(self.base.get(field, []))
-        merged.update(parse_sequence_func(self.override.get(field, [])))
+        merged = {}
+        for d in self.dicts:
+            merged.update(to_mapping(
+                (parse_func(item) for item in d.get(field, [])), 'merge_field'))
         self[field] = [item.repr() for item in sorted(merged.values())]
 
     def merge_scalar(self, field):
-        if self.needs_merge(field):
-            self[field] = self.override.get(field, self.base.get(field))
+        for d in reversed(self.dicts):
+            if field in d:
+                self[field] = d[field]
+                return
 
 
 def merge_service_dicts(base, override, version):
-    md = MergeDict(base, override)
+    return merge_all_service_dicts([base, override], version)
+
+
+def merge_all_service_dicts(service_dicts, version):
+    md = MergeDict(*service_dicts)
 
     md.merge_mapping('environment', parse_environment)
     md.merge_mapping('labels', parse_labels)
@@ -771,58 +1048,59 @@ def merge_service_dicts(base, override, version):
     for field in ['dns', 'dns_search', 'env_file', 'tmpfs']:
         md.merge_field(field, merge_list_or_string)
 
-    md.merge_field('logging', merge_logging)
+    md.merge_field('logging', merge_logging, default={})
 
-    for field in set(ALLOWED_KEYS) - set(md):
+    for field in md.fields.intersection(ALLOWED_KEYS) - set(md):
         md.merge_scalar(field)
 
     if version == V1:
-        legacy_v1_merge_image_or_build(md, base, override)
+        legacy_v1_merge_image_or_build(md, service_dicts)
     elif md.needs_merge('build'):
-        md['build'] = merge_build(md, base, override)
+        md['build'] = merge_build(service_dicts)
 
     return dict(md)
 
 
-def merge_unique_items_lists(base, override):
-    return sorted(set().union(base, override))
+def merge_unique_items_lists(*lists):
+    return sorted(set().union(*lists))
 
 
-def merge_build(output, base, override):
+def merge_build(service_dicts):
     def to_dict(service):
         build_config = service.get('build', {})
         if isinstance(build_config, six.string_types):
             return {'context': build_config}
         return build_config
 
-    md = MergeDict(to_dict(base), to_dict(override))
+    md = MergeDict(*[to_dict(service) for service in service_dicts])
     md.merge_scalar('context')
     md.merge_scalar('dockerfile')
     md.merge_mapping('args', parse_build_arguments)
     return dict(md)
 
 
-def merge_logging(base, override):
-    md = MergeDict(base, override)
-    md.merge_scalar('driver')
-    if md.get('driver') == base.get('driver') or base.get('driver') is None:
-        md.merge_mapping('options', lambda m: m or {})
-    else:
-        md['options'] = override.get('options')
-    return dict(md)
+def merge_logging(base, *overrides):
+    for override in overrides:
+        md = MergeDict(base, override)
+        md.merge_scalar('driver')
+        if md.get('driver') == base.get('driver') or base.get('driver') is None:
+            md.merge_mapping('options', lambda m: dict(m or {}))
+        else:
+            md['options'] = override.get('options')
+        base = dict(md)
+    return base
 
 
-def legacy_v1_merge_image_or_build(output, base, override):
+def legacy_v1_merge_image_or_build(output, service_dicts):
     output.pop('image', None)
     output.pop('build', None)
-    if 'image' in override:
-        output['image'] = override['image']
-    elif 'build' in override:
-        output['build'] = override['build']
-    elif 'image' in base:
-        output['image'] = base['image']
-    elif 'build' in base:
-        output['build'] = base['build']
+    for service_dict in reversed(service_dicts):
+        if 'image' in service_dict:
+            output['image'] = service_dict['image']
+            return
+        elif 'build' in service_dict:
+            output['build'] = service_dict['build']
+            return
 
 
 def merge_environment(base, override):
@@ -877,20 +1155,20 @@ def resolve_env_var(key, val, environment):
         return key, None
 
 
-def resolve_volume_paths(working_dir, service_dict):
+def resolve_volume_paths(working_dir, service_dict, environment=None):
     return [
-        resolve_volume_path(working_dir, volume)
+        resolve_volume_path(working_dir, volume, environment)
         for volume in service_dict['volumes']
     ]
 
 
-def resolve_volume_path(working_dir, volume):
+def resolve_volume_path(working_dir, volume, environment=None):
     container_path, host_path = split_path_mapping(volume)
 
     if host_path is not None:
         if host_path.startswith('.'):
             host_path = expand_path(working_dir, host_path)
-        host_path = os.path.expanduser(host_path)
+        host_path = expand_user(host_path, environment)
         return u"{}:{}".format(host_path, container_path)
     else:
         return container_path
@@ -913,10 +1191,10 @@ def normalize_build(service_dict, working_dir, environment):
         service_dict['build'] = build
 
 
-def resolve_build_path(working_dir, build_path):
+def resolve_build_path(working_dir, build_path, environment=None):
     if is_url(build_path):
         return build_path
-    return expand_path(working_dir, build_path)
+    return expand_path(working_dir, build_path, environment)
 
 
 def is_url(build_path):
@@ -944,9 +1222,10 @@ def validate_paths(service_dict):
                 "or is not a valid URL." % build_path)
 
 
-def merge_path_mappings(base, override):
-    d = dict_from_path_mappings(base)
-    d.update(dict_from_path_mappings(override))
+def merge_path_mappings(*path_mappings):
+    d = {}
+    for mappings in path_mappings:
+        d.update(dict_from_path_mappings(mappings))
     return path_mappings_from_dict(d)
 
 
@@ -984,12 +1263,21 @@ def join_path_mapping(pair):
         return ":".join((host, container))
 
 
-def expand_path(working_dir, path):
-    return os.path.abspath(os.path.join(working_dir, os.path.expanduser(path)))
+def expand_path(working_dir, path, environment=None):
+    return os.path.abspath(os.path.join(working_dir, expand_user(path, environment)))
+
+
+def expand_user(path, environment=None):
+    """Expand a path starting with ~ from the home directory of the user,
+    and tell the environment that the configuration depends on it.
+    """
+    if environment is not None and path.startswith('~'):
+        environment.record_home()
+    return os.path.expanduser(path)
 
 
-def merge_list_or_string(base, override):
-    return to_list(base) + to_list(override)
+def merge_list_or_string(*values):
+    return [item for value in values for item in to_list(value)]
 
 
 def to_list(value):
@@ -1012,7 +1300,23 @@ def has_uppercase(name):
 def load_yaml(filename):
     try:
         with open(filename, 'r') as fh:
-            return yaml.safe_load(fh)
+            return parse_yaml(fh)
     except (IOError, yaml.YAMLError) as e:
         error_name = getattr(e, '__module__', '') + '.' + e.__class__.__name__
         raise ConfigurationError(u"{}: {}".format(error_name, e))
+
+
+def parse_yaml(fh):
+    """Parse a YAML file with libyaml when PyYAML was built with it.
+
+    libyaml words some errors differently, so an invalid file is parsed
+    again by the Python loader to report the same errors in both cases.
+    """
+    if SafeLoader is yaml.SafeLoader:
+        return yaml.load(fh, Loader=SafeLoader)
+
+    try:
+        return yaml.load(fh, Loader=SafeLoader)
+    except yaml.YAMLError:
+        fh.seek(0)
+        return yaml.load(fh, Loader=yaml.SafeLoader)
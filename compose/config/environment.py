@@ -39,6 +39,10 @@ def env_vars_from_file(filename):
     return env
 
 
+# The variables the home directory of the user is read from, by expanduser
+HOME_VARIABLES = ('HOME', 'USERPROFILE', 'HOMEDRIVE', 'HOMEPATH') if IS_WINDOWS_PLATFORM else ('HOME',)
+
+
 class Environment(dict):
     def __init__(self, *args, **kwargs):
         super(Environment, self).__init__(*args, **kwargs)
@@ -98,6 +102,34 @@ class Environment(dict):
             )
         return result
 
+    def get_boolean(self, key):
+        # Convert a value to a boolean using "common sense" rules.
+        # Unset, empty, "0" and "false" (i-case) yield False.
+        # All other values yield True.
+        value = self.get(key)
+        if not value:
+            return False
+        if value.lower() in ['0', 'false']:
+            return False
+        return True
+
+    def record_file(self, filename):
+        """Called with the files, other than the Compose files, which the
+        configuration is read from.
+        """
+
+    def record_home(self):
+        """Called when a path of the configuration is expanded from the home
+        directory of the user, which is read from HOME_VARIABLES.
+        """
+
+    def merge_recorded(self, other):
+        """Add what was recorded by a copy of this environment, which was used
+        in another process.
+        """
+        self.missing_keys.extend(
+            key for key in other.missing_keys if key not in self.missing_keys)
+
     def get(self, key, *args, **kwargs):
         if IS_WINDOWS_PLATFORM:
             return super(Environment, self).get(
@@ -26,14 +26,12 @@ class DependencyError(ConfigurationError):
 class CircularReference(ConfigurationError):
     def __init__(self, trail):
         self.trail = trail
-
-    @property
-    def msg(self):
         lines = [
             "{} in {}".format(service_name, filename)
             for (filename, service_name) in self.trail
         ]
-        return "Circular reference:\n  {}".format("\n  extends ".join(lines))
+        super(CircularReference, self).__init__(
+            "Circular reference:\n  {}".format("\n  extends ".join(lines)))
 
 
 class ComposeFileNotFound(ConfigurationError):
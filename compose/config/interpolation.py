@@ -15,34 +15,76 @@ log = logging.getLogger(__name__)
 
 
 class Interpolator(object):
+    """Substitute the variables of `mapping` in strings.
+
+    Strings without a `$` are returned as they are, and each distinct string
+    is only substituted once. The names of the variables found in the
+    strings are added to `used_variables`.
+    """
 
     def __init__(self, templater, mapping):
         self.templater = templater
         self.mapping = mapping
+        self.results = {}
+        self.used_variables = set()
 
     def interpolate(self, string):
+        if '$' not in string:
+            return string
+
+        try:
+            return self.results[string]
+        except KeyError:
+            pass
+
+        template = self.templater(string)
         try:
-            return self.templater(string).substitute(self.mapping)
+            result = template.substitute(self.mapping)
         except ValueError:
             raise InvalidInterpolation(string)
 
+        self.used_variables.update(variable_names(template))
+        self.results[string] = result
+        return result
+
+
+def variable_names(template):
+    names = set()
+    for match in template.pattern.finditer(template.template):
+        named = match.group('named') or match.group('braced')
+        if named:
+            # Remove the default value of TemplateWithDefaults
+            names.add(named.partition('-')[0].rstrip(':'))
+    return names
 
-def interpolate_environment_variables(version, config, section, environment):
+
+def interpolate_environment_variables(version, config, section, environment,
+                                      used_variables=None):
+    """Interpolate the variables of `environment` in a section of the config.
+
+    Dicts and lists in which nothing was substituted are returned as they
+    are, so the result may share them with `config`. The names of the
+    variables used are added to the `used_variables` set, if one is given.
+    """
     if version in (V2_0, V1):
         interpolator = Interpolator(Template, environment)
     else:
         interpolator = Interpolator(TemplateWithDefaults, environment)
 
     def process_item(name, config_dict):
-        return dict(
+        return replace_changed(config_dict, dict(
             (key, interpolate_value(name, key, val, section, interpolator))
-            for key, val in (config_dict or {}).items()
-        )
+            for key, val in config_dict.items()
+        ))
 
-    return dict(
+    result = replace_changed(config, dict(
         (name, process_item(name, config_dict or {}))
         for name, config_dict in config.items()
-    )
+    ))
+
+    if used_variables is not None:
+        used_variables.update(interpolator.used_variables)
+    return result
 
 
 def interpolate_value(name, config_key, value, section, interpolator):
@@ -62,15 +104,29 @@ def recursive_interpolate(obj, interpolator):
     if isinstance(obj, six.string_types):
         return interpolator.interpolate(obj)
     if isinstance(obj, dict):
-        return dict(
+        return replace_changed(obj, dict(
             (key, recursive_interpolate(val, interpolator))
             for (key, val) in obj.items()
-        )
+        ))
     if isinstance(obj, list):
-        return [recursive_interpolate(val, interpolator) for val in obj]
+        return replace_changed(
+            obj,
+            [recursive_interpolate(val, interpolator) for val in obj])
     return obj
 
 
+def replace_changed(original, interpolated):
+    """Return `original` instead of its interpolated copy when none of its
+    values were substituted.
+    """
+    values = interpolated.values() if isinstance(interpolated, dict) else interpolated
+    originals = original.values() if isinstance(original, dict) else original
+    if len(interpolated) == len(original) and all(
+            new is old for new, old in zip(values, originals)):
+        return original
+    return interpolated
+
+
 class TemplateWithDefaults(Template):
     idpattern = r'[_a-z][_a-z0-9]*(?::?-[^}]+)?'
 
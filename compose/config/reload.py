@@ -0,0 +1,213 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from collections import namedtuple
+
+from .config import build_service_dicts
+from .config import Config
+from .config import ExtendsCache
+from .config import load_mapping
+from .config import merge_service_configs
+from .config import process_config_file
+from .config import raise_service_errors
+from .config import V1
+from .config import validate_config_version
+from .errors import ConfigurationError
+from .sort_services import get_container_name_from_network_mode
+from .sort_services import get_service_dependencies
+from .sort_services import get_service_dependents_index
+from .sort_services import sort_service_dicts
+from .validation import match_named_volumes
+
+
+class ConfigChanges(namedtuple('_ConfigChanges', 'config added changed removed')):
+    """
+    :param config: the configuration which was loaded
+    :type  config: :class:`config.Config`
+    :param added: names of the services which weren't in the previous configuration
+    :type  added: list of string
+    :param changed: names of the services whose definition changed, or which
+                    depend on a service which was added, changed or removed
+    :type  changed: list of string
+    :param removed: names of the services which are no longer in the configuration
+    :type  removed: list of string
+    """
+
+
+class ReloadState(namedtuple('_ReloadState', 'context files sources service_dicts volumes networks')):
+    pass
+
+
+class ConfigReloader(object):
+    """Load a configuration again and again, for example each time its files
+    change, and tell what changed since the previous load.
+
+    Only the services whose definition changed in the Compose files are
+    validated and interpolated again. A service is only built again when
+    its merged definition changed, when it reads other files (`extends` or
+    `env_file`), or when it refers to a service which was added or removed.
+    Everything is processed again when the version, the working directory,
+    the Compose files or the environment changed.
+    """
+
+    def __init__(self):
+        self.state = None
+
+    def load(self, config_details):
+        """Load the configuration and return a ConfigChanges against the
+        previous successful load. On the first load, all the services are
+        added.
+        """
+        validate_config_version(config_details.config_files)
+        context = (
+            config_details.config_files[0].version,
+            config_details.working_dir,
+            [config_file.filename for config_file in config_details.config_files],
+            dict(config_details.environment),
+        )
+        previous = self.state if self.state and self.state.context == context else None
+        extends_cache = ExtendsCache(config_details.config_files)
+
+        processed_files = [
+            process_config_file_again(
+                config_file,
+                config_details.environment,
+                previous.files[index] if previous else None)
+            for index, config_file in enumerate(config_details.config_files)
+        ]
+        files = [
+            (config_file.get_service_dicts(), processed_file.get_service_dicts())
+            for config_file, processed_file in zip(config_details.config_files, processed_files)
+        ]
+        config_details = config_details._replace(config_files=processed_files)
+
+        main_file = config_details.config_files[0]
+        volumes = load_mapping(processed_files, 'get_volumes', 'Volume')
+        networks = load_mapping(processed_files, 'get_networks', 'Network')
+        sources = merge_service_configs(processed_files, main_file.version)
+
+        service_dicts = build_services(
+            config_details, main_file, extends_cache, sources, previous)
+        sorted_service_dicts = sort_service_dicts([service_dicts[name] for name in sources])
+        if main_file.version != V1:
+            for service_dict in sorted_service_dicts:
+                match_named_volumes(service_dict, volumes)
+
+        config = Config(main_file.version, sorted_service_dicts, volumes, networks)
+        changes = get_config_changes(self.state, config)
+        self.state = ReloadState(context, files, sources, service_dicts, volumes, networks)
+        return changes
+
+
+def process_config_file_again(config_file, environment, previous_file):
+    """Like process_config_file, but reuse the processed service dicts of
+    the previous load of the file for the services which didn't change.
+    """
+    if previous_file is None or config_file.version == V1 or 'services' not in config_file.config:
+        return process_config_file(config_file, environment)
+
+    raw_services, processed_services = previous_file
+    services = config_file.get_service_dicts()
+    unchanged = set(
+        name for name, service in services.items()
+        if name in processed_services and raw_services.get(name) == service
+    )
+    processed_file = process_config_file(
+        config_file._replace(config=dict(
+            config_file.config,
+            services=dict(
+                (name, service) for name, service in services.items() if name not in unchanged
+            ))),
+        environment)
+
+    processed = processed_file.get_service_dicts()
+    services = dict(
+        (name, processed_services[name] if name in unchanged else processed[name])
+        for name in services
+    )
+    return processed_file._replace(config=dict(processed_file.config, services=services))
+
+
+def build_services(config_details, config_file, extends_cache, sources, previous):
+    """Return a dict of the name of each service to its service dict,
+    reusing the ones of the previous load which are still valid.
+    """
+    names = get_services_to_build(previous, sources) if previous else set(sources)
+    service_dicts = build_service_dicts(
+        config_details,
+        config_file,
+        extends_cache,
+        [(name, source) for name, source in sources.items() if name in names],
+        list(sources))
+    raise_service_errors(
+        [error for error in service_dicts if isinstance(error, ConfigurationError)])
+
+    result = dict((name, previous.service_dicts[name]) for name in sources if name not in names)
+    result.update((service_dict['name'], service_dict) for service_dict in service_dicts)
+    return result
+
+
+def get_services_to_build(previous, sources):
+    renamed = set(previous.sources) ^ set(sources)
+    return set(
+        name for name, source in sources.items()
+        if (previous.sources.get(name) != source or
+            'extends' in source or
+            'env_file' in source or
+            get_service_references(previous.service_dicts[name]) & renamed)
+    )
+
+
+def get_service_references(service_dict):
+    """Return the names of the services the service depends on, and of the
+    containers it reads volumes from or shares the network of, which are
+    services when a service of the same name is added, in version 1.
+    """
+    names = get_service_dependencies(service_dict)
+    names.update(volume_from.source for volume_from in service_dict.get('volumes_from', []))
+    container_name = get_container_name_from_network_mode(service_dict.get('network_mode'))
+    if container_name:
+        names.add(container_name)
+    return names
+
+
+def get_config_changes(previous, config):
+    names = [service_dict['name'] for service_dict in config.services]
+    if previous is None:
+        return ConfigChanges(config, names, [], [])
+
+    added = [name for name in names if name not in previous.service_dicts]
+    removed = sorted(set(previous.service_dicts) - set(names))
+
+    if (previous.context[0] != config.version or
+            previous.volumes != config.volumes or
+            previous.networks != config.networks):
+        changed = set(names)
+    else:
+        changed = set(
+            service_dict['name'] for service_dict in config.services
+            if previous.service_dicts.get(service_dict['name'], service_dict) != service_dict
+        )
+        changed |= get_dependents(config.services, changed | set(added) | set(removed))
+
+    return ConfigChanges(
+        config,
+        added,
+        [name for name in names if name in changed and name not in added],
+        removed)
+
+
+def get_dependents(service_dicts, names):
+    """Return the names of the services which depend on the services named
+    `names`, directly or through other services.
+    """
+    dependents_index = get_service_dependents_index(service_dicts)
+    dependents = set()
+    stack = list(names)
+    while stack:
+        for index in dependents_index.get(stack.pop(), []):
+            name = service_dicts[index]['name']
+            if name not in dependents:
+                dependents.add(name)
+                stack.append(name)
+    return dependents
@@ -31,42 +31,68 @@ def get_service_names_from_volumes_from(volumes_from):
     return [volume_from.source for volume_from in volumes_from]
 
 
-def get_service_dependents(service_dict, services):
-    name = service_dict['name']
-    return [
-        service for service in services
-        if (name in get_service_names(service.get('links', [])) or
-            name in get_service_names_from_volumes_from(service.get('volumes_from', [])) or
-            name == get_service_name_from_network_mode(service.get('network_mode')) or
-            name in service.get('depends_on', []))
-    ]
+def get_service_dependencies(service_dict):
+    names = set(get_service_names(service_dict.get('links', [])))
+    names.update(get_service_names_from_volumes_from(service_dict.get('volumes_from', [])))
+    names.update(service_dict.get('depends_on', []))
+    network_mode_service = get_service_name_from_network_mode(service_dict.get('network_mode'))
+    if network_mode_service:
+        names.add(network_mode_service)
+    return names
+
+
+def get_service_dependents_index(services):
+    """Return a dict of the name of each service to the indexes of the
+    services which depend on it, in the order of `services`.
+    """
+    dependents = dict((service['name'], []) for service in services)
+    for index, service in enumerate(services):
+        for name in get_service_dependencies(service):
+            if name in dependents:
+                dependents[name].append(index)
+    return dependents
+
+
+def raise_dependency_error(n, temporary_marked):
+    if n['name'] in get_service_names(n.get('links', [])):
+        raise DependencyError('A service can not link to itself: %s' % n['name'])
+    if n['name'] in n.get('volumes_from', []):
+        raise DependencyError('A service can not mount itself as volume: %s' % n['name'])
+    if n['name'] in n.get('depends_on', []):
+        raise DependencyError('A service can not depend on itself: %s' % n['name'])
+    raise DependencyError('Circular dependency between %s' % ' and '.join(temporary_marked))
 
 
 def sort_service_dicts(services):
-    # Topological sort (Cormen/Tarjan algorithm).
-    unmarked = services[:]
+    # Topological sort (Cormen/Tarjan algorithm), with an explicit stack and
+    # an index of the dependents of each service so it runs in O(V+E).
+    dependents = get_service_dependents_index(services)
+    unmarked = set(range(len(services)))
     temporary_marked = set()
-    sorted_services = []
-
-    def visit(n):
-        if n['name'] in temporary_marked:
-            if n['name'] in get_service_names(n.get('links', [])):
-                raise DependencyError('A service can not link to itself: %s' % n['name'])
-            if n['name'] in n.get('volumes_from', []):
-                raise DependencyError('A service can not mount itself as volume: %s' % n['name'])
-            if n['name'] in n.get('depends_on', []):
-                raise DependencyError('A service can not depend on itself: %s' % n['name'])
-            raise DependencyError('Circular dependency between %s' % ' and '.join(temporary_marked))
-
-        if n in unmarked:
-            temporary_marked.add(n['name'])
-            for m in get_service_dependents(n, services):
-                visit(m)
-            temporary_marked.remove(n['name'])
-            unmarked.remove(n)
-            sorted_services.insert(0, n)
-
-    while unmarked:
-        visit(unmarked[-1])
-
-    return sorted_services
+    finished = []
+
+    def mark(index):
+        temporary_marked.add(services[index]['name'])
+        return index, iter(dependents[services[index]['name']])
+
+    def visit(index):
+        stack = [mark(index)]
+        while stack:
+            index, dependent_indexes = stack[-1]
+            for dependent in dependent_indexes:
+                if services[dependent]['name'] in temporary_marked:
+                    raise_dependency_error(services[dependent], temporary_marked)
+                if dependent in unmarked:
+                    stack.append(mark(dependent))
+                    break
+            else:
+                stack.pop()
+                temporary_marked.remove(services[index]['name'])
+                unmarked.remove(index)
+                finished.append(services[index])
+
+    for index in reversed(range(len(services))):
+        if index in unmarked:
+            visit(index)
+
+    return finished[::-1]
@@ -8,13 +8,13 @@ import re
 import sys
 
 import six
-from docker.utils.ports import split_port
 from jsonschema import Draft4Validator
 from jsonschema import FormatChecker
 from jsonschema import RefResolver
 from jsonschema import ValidationError
 
 from ..const import COMPOSEFILE_V1 as V1
+from ..utils import memoize
 from .errors import ConfigurationError
 from .errors import VERSION_EXPLANATION
 from .sort_services import get_service_name_from_network_mode
@@ -46,6 +46,8 @@ VALID_EXPOSE_FORMAT = r'^\d+(\-\d+)?(\/[a-zA-Z]+)?$'
 
 @FormatChecker.cls_checks(format="ports", raises=ValidationError)
 def format_ports(instance):
+    # Imported here so that loading a configuration without ports doesn't import docker-py
+    from docker.utils.ports import split_port
     try:
         split_port(instance)
     except ValueError as e:
@@ -360,12 +362,7 @@ def process_config_schema_errors(error):
 
 
 def validate_against_config_schema(config_file):
-    schema = load_jsonschema(config_file.version)
-    format_checker = FormatChecker(["ports", "expose"])
-    validator = Draft4Validator(
-        schema,
-        resolver=RefResolver(get_resolver_path(), schema),
-        format_checker=format_checker)
+    validator = get_config_validator(config_file.version)
     handle_errors(
         validator.iter_errors(config_file.config),
         process_config_schema_errors,
@@ -376,16 +373,34 @@ def validate_service_constraints(config, service_name, version):
     def handler(errors):
         return process_service_constraint_errors(errors, service_name, version)
 
-    schema = load_jsonschema(version)
-    validator = Draft4Validator(schema['definitions']['constraints']['service'])
+    validator = get_service_constraints_validator(version)
     handle_errors(validator.iter_errors(config), handler, None)
 
 
+@memoize
+def get_config_validator(version):
+    schema = load_jsonschema(version)
+    return Draft4Validator(
+        schema,
+        resolver=RefResolver(get_resolver_path(), schema),
+        format_checker=FormatChecker(["ports", "expose"]))
+
+
+@memoize
+def get_service_constraints_validator(version):
+    schema = load_jsonschema(version)
+    return Draft4Validator(schema['definitions']['constraints']['service'])
+
+
 def get_schema_path():
     return os.path.dirname(os.path.abspath(__file__))
 
 
+@memoize
 def load_jsonschema(version):
+    """Load the schema of a version of the Compose file format. The schema
+    is shared by all callers, so it must not be modified.
+    """
     filename = os.path.join(
         get_schema_path(),
         "config_schema_v{0}.json".format(version))
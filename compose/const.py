@@ -5,6 +5,8 @@ import sys
 
 DEFAULT_TIMEOUT = 10
 HTTP_TIMEOUT = 60
+# The most operations run in parallel, and connections kept open to the daemon
+PARALLEL_LIMIT = 64
 IMAGE_EVENTS = ['delete', 'import', 'pull', 'push', 'tag', 'untag']
 IS_WINDOWS_PLATFORM = (sys.platform == "win32")
 LABEL_CONTAINER_NUMBER = 'com.docker.compose.container-number'
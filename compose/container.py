@@ -1,23 +1,84 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import re
+from collections import OrderedDict
 from functools import reduce
 
 import six
 
 from .const import LABEL_CONTAINER_NUMBER
+from .const import LABEL_ONE_OFF
 from .const import LABEL_PROJECT
 from .const import LABEL_SERVICE
 
+# Attributes of container events which are not labels of the container
+EVENT_ATTRIBUTES = ('image', 'name', 'exitCode', 'signal', 'oldName')
+
+# The fields of the summary of a container, see container_summary
+SUMMARY_FIELDS = (
+    'id', 'name', 'service', 'number', 'one_off', 'image', 'command', 'state',
+    'status', 'exit_code', 'ports', 'created', 'labels',
+)
+
+# The states of containers, by the first word of their status
+STATUS_STATES = {
+    'up': 'running',
+    'exited': 'exited',
+    'restarting': 'restarting',
+    'created': 'created',
+    'dead': 'dead',
+    'removal': 'removing',
+}
+
+EXIT_STATUS = re.compile(r'^Exited \((-?\d+)\)')
+
+# The fields of GET /containers/:id:/json which compose reads, the others are
+# dropped from the trimmed view of a container. None keeps the whole value.
+INSPECT_FIELDS = {
+    'Id': None,
+    'Image': None,
+    'Name': None,
+    'Created': None,
+    'Mounts': None,
+    'Config': {
+        'Labels': None,
+        'Env': None,
+        'Cmd': None,
+        'Entrypoint': None,
+        'StopSignal': None,
+    },
+    'State': {
+        'Running': None,
+        'Paused': None,
+        'Restarting': None,
+        'Ghost': None,
+        'ExitCode': None,
+    },
+    'HostConfig': {
+        'LogConfig': None,
+    },
+    'NetworkSettings': {
+        'Ports': None,
+        'Networks': None,
+    },
+}
+
 
 class Container(object):
     """
     Represents a Docker container, constructed from the output of
     GET /containers/:id:/json.
+
+    A trimmed container only keeps the INSPECT_FIELDS of the output, for
+    the callers which hold many containers.
     """
-    def __init__(self, client, dictionary, has_been_inspected=False):
+    __slots__ = ('client', 'dictionary', 'has_been_inspected', 'log_stream', 'trimmed')
+
+    def __init__(self, client, dictionary, has_been_inspected=False, trimmed=False):
         self.client = client
-        self.dictionary = dictionary
+        self.trimmed = trimmed
+        self.dictionary = trim_dictionary(dictionary) if trimmed else dictionary
         self.has_been_inspected = has_been_inspected
         self.log_stream = None
 
@@ -25,6 +86,8 @@ class Container(object):
     def from_ps(cls, client, dictionary, **kwargs):
         """
         Construct a container object from the output of GET /containers/json.
+        A trimmed container also keeps the labels of the output, so that
+        they don't need an inspect.
         """
         name = get_container_name(dictionary)
         if name is None:
@@ -35,12 +98,44 @@ class Container(object):
             'Image': dictionary['Image'],
             'Name': '/' + name,
         }
+        if kwargs.get('trimmed') and dictionary.get('Labels') is not None:
+            new_dictionary['Config'] = {'Labels': dictionary['Labels']}
         return cls(client, new_dictionary, **kwargs)
 
     @classmethod
     def from_id(cls, client, id):
         return cls(client, client.inspect_container(id), has_been_inspected=True)
 
+    @classmethod
+    def from_event(cls, client, event):
+        """
+        Construct a container object from an event of GET /events. Since API
+        v1.22 the attributes of an event include the labels of the container,
+        when they don't the container is inspected.
+        """
+        attributes = (event.get('Actor') or {}).get('Attributes') or {}
+        if LABEL_PROJECT not in attributes or 'name' not in attributes:
+            return cls.from_id(client, event['id'])
+
+        labels = {
+            key: value for key, value in attributes.items()
+            if key not in EVENT_ATTRIBUTES
+        }
+        return cls(client, {
+            'Id': event['id'],
+            'Image': attributes.get('image') or event.get('from'),
+            'Name': '/' + attributes['name'],
+            'Config': {'Labels': labels},
+        })
+
+    def update_from_event(self, event):
+        """Follow the new name of the container from a rename event, the
+        attributes of which include the name since API v1.22.
+        """
+        attributes = (event.get('Actor') or {}).get('Attributes') or {}
+        if event.get('status') == 'rename' and attributes.get('name'):
+            self.dictionary['Name'] = '/' + attributes['name']
+
     @classmethod
     def create(cls, client, **options):
         response = client.create_container(**options)
@@ -105,6 +200,9 @@ class Container(object):
 
     @property
     def labels(self):
+        labels = self.dictionary.get('Config', {}).get('Labels')
+        if labels is not None:
+            return labels
         return self.get('Config.Labels') or {}
 
     @property
@@ -242,7 +340,8 @@ class Container(object):
         return self.client.logs(self.id, *args, **kwargs)
 
     def inspect(self):
-        self.dictionary = self.client.inspect_container(self.id)
+        dictionary = self.client.inspect_container(self.id)
+        self.dictionary = trim_dictionary(dictionary) if self.trimmed else dictionary
         self.has_been_inspected = True
         return self.dictionary
 
@@ -261,6 +360,19 @@ class Container(object):
         return self.id.__hash__()
 
 
+def trim_dictionary(dictionary, fields=INSPECT_FIELDS):
+    """Return the `fields` of the output of an inspect."""
+    trimmed = {}
+    for key, subfields in fields.items():
+        if key not in dictionary:
+            continue
+        value = dictionary[key]
+        if subfields is not None and isinstance(value, dict):
+            value = trim_dictionary(value, subfields)
+        trimmed[key] = value
+    return trimmed
+
+
 def get_container_name(container):
     if not container.get('Name') and not container.get('Names'):
         return None
@@ -270,3 +382,75 @@ def get_container_name(container):
     # ps
     shortest_name = min(container['Names'], key=lambda n: len(n.split('/')))
     return shortest_name.split('/')[-1]
+
+
+def container_summary(dictionary):
+    """Return the SUMMARY_FIELDS of a container from the output of
+    GET /containers/json, so that listing containers doesn't need an inspect
+    of each of them.
+    """
+    labels = dictionary.get('Labels') or {}
+    number = labels.get(LABEL_CONTAINER_NUMBER) or ''
+    status = dictionary.get('Status') or ''
+    exit_status = EXIT_STATUS.match(status)
+    return {
+        'id': dictionary['Id'],
+        'name': get_container_name(dictionary),
+        'service': labels.get(LABEL_SERVICE),
+        'number': int(number) if number.isdigit() else None,
+        'one_off': labels.get(LABEL_ONE_OFF) == 'True',
+        'image': dictionary.get('Image'),
+        'command': dictionary.get('Command'),
+        'state': dictionary.get('State') or state_from_status(status),
+        'status': status,
+        'exit_code': int(exit_status.group(1)) if exit_status else None,
+        'ports': sorted(
+            (port_summary(port) for port in dictionary.get('Ports') or []),
+            key=lambda port: (port['private'] or 0, port['protocol'] or '', port['public'] or 0)),
+        'created': dictionary.get('Created'),
+        'labels': labels,
+    }
+
+
+def state_from_status(status):
+    """Return the state of a container from its status, for the daemons which
+    don't list the state of containers, before API 1.23.
+    """
+    if status.endswith('(Paused)'):
+        return 'paused'
+    word = status.split(' ', 1)[0].lower()
+    return STATUS_STATES.get(word, word)
+
+
+def port_summary(port):
+    return {
+        'private': port.get('PrivatePort'),
+        'public': port.get('PublicPort'),
+        'protocol': port.get('Type'),
+        'ip': port.get('IP'),
+    }
+
+
+class ContainerCache(object):
+    """
+    The most recently used containers, by id, so that the events of a
+    container don't each need to build or inspect it again.
+    """
+    def __init__(self, size=256):
+        self.size = size
+        self.containers = OrderedDict()
+
+    def get(self, container_id):
+        container = self.containers.pop(container_id, None)
+        if container is not None:
+            self.containers[container_id] = container
+        return container
+
+    def add(self, container):
+        self.containers.pop(container.id, None)
+        self.containers[container.id] = container
+        if len(self.containers) > self.size:
+            self.containers.popitem(last=False)
+
+    def remove(self, container_id):
+        self.containers.pop(container_id, None)
@@ -7,6 +7,7 @@ from docker.errors import NotFound
 from docker.utils import create_ipam_config
 from docker.utils import create_ipam_pool
 
+from . import tracing
 from .config import ConfigurationError
 
 
@@ -164,6 +165,7 @@ class ProjectNetworks(object):
             except NotFound:
                 log.warn("Network %s not found.", network.full_name)
 
+    @tracing.traced
     def initialize(self):
         if not self.use_networking:
             return
@@ -1,9 +1,11 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import contextlib
 import logging
 import operator
 import sys
+import time
 from threading import Thread
 
 from docker.errors import APIError
@@ -11,7 +13,9 @@ from six.moves import _thread as thread
 from six.moves.queue import Empty
 from six.moves.queue import Queue
 
+from compose import tracing
 from compose.cli.signals import ShutdownException
+from compose.const import PARALLEL_LIMIT
 from compose.errors import OperationFailedError
 from compose.utils import get_output_stream
 
@@ -20,13 +24,22 @@ log = logging.getLogger(__name__)
 
 STOP = object()
 
+# The Timings of the parallel operations, while record_timings is recording
+recorded_timings = None
 
-def parallel_execute(objects, func, get_name, msg, get_deps=None):
+# The most objects a parallel operation runs on at the same time, unless it's
+# given a limit, which the commands set from COMPOSE_PARALLEL_LIMIT
+parallel_limit = PARALLEL_LIMIT
+
+
+def parallel_execute(objects, func, get_name, msg, get_deps=None, limit=None):
     """Runs func on objects in parallel while ensuring that func is
     ran on object only after it is ran on all its dependencies.
 
     get_deps called on object must return a collection with its dependencies.
     get_name called on object must return its name.
+    limit is the most objects func runs on at the same time, parallel_limit
+    by default.
     """
     objects = list(objects)
     stream = get_output_stream(sys.stderr)
@@ -35,27 +48,34 @@ def parallel_execute(objects, func, get_name, msg, get_deps=None):
     for obj in objects:
         writer.initialize(get_name(obj))
 
-    events = parallel_execute_iter(objects, func, get_deps)
-
     errors = {}
     results = []
     error_to_reraise = None
+    state = State(objects)
 
-    for obj, result, exception in events:
-        if exception is None:
-            writer.write(get_name(obj), 'done')
-            results.append(result)
-        elif isinstance(exception, APIError):
-            errors[get_name(obj)] = exception.explanation
-            writer.write(get_name(obj), 'error')
-        elif isinstance(exception, OperationFailedError):
-            errors[get_name(obj)] = exception.msg
-            writer.write(get_name(obj), 'error')
-        elif isinstance(exception, UpstreamError):
-            writer.write(get_name(obj), 'error')
-        else:
-            errors[get_name(obj)] = exception
-            error_to_reraise = exception
+    with tracing.span('parallel_execute', category='parallel', message=msg or ''):
+        if tracing.tracer is not None:
+            func = tracing.parallel_task(func, get_name, tracing.current_span())
+
+        for obj, result, exception in parallel_execute_iter(
+                objects, func, get_deps, limit, state):
+            if exception is None:
+                writer.write(get_name(obj), 'done')
+                results.append(result)
+            elif isinstance(exception, APIError):
+                errors[get_name(obj)] = exception.explanation
+                writer.write(get_name(obj), 'error')
+            elif isinstance(exception, OperationFailedError):
+                errors[get_name(obj)] = exception.msg
+                writer.write(get_name(obj), 'error')
+            elif isinstance(exception, UpstreamError):
+                writer.write(get_name(obj), 'error')
+            else:
+                errors[get_name(obj)] = exception
+                error_to_reraise = exception
+
+    if recorded_timings is not None:
+        recorded_timings.append(Timings(msg, state, get_name, get_deps or _no_deps))
 
     for obj_name, error in errors.items():
         stream.write("\nERROR: for {}  {}\n".format(obj_name, error))
@@ -77,6 +97,10 @@ class State(object):
     state.started:   objects being processed
     state.finished:  objects which have been processed
     state.failed:    objects which either failed or whose dependencies failed
+    state.running:   the number of started objects which haven't ended
+
+    state.ready_times, state.start_times and state.end_times hold when each
+    object's dependencies were done, when it was started and when it ended.
     """
     def __init__(self, objects):
         self.objects = objects
@@ -84,6 +108,12 @@ class State(object):
         self.started = set()
         self.finished = set()
         self.failed = set()
+        self.running = 0
+
+        self.start_time = time.time()
+        self.ready_times = {}
+        self.start_times = {}
+        self.end_times = {}
 
     def is_done(self):
         return len(self.finished) + len(self.failed) >= len(self.objects)
@@ -92,7 +122,7 @@ class State(object):
         return set(self.objects) - self.started - self.finished - self.failed
 
 
-def parallel_execute_iter(objects, func, get_deps):
+def parallel_execute_iter(objects, func, get_deps, limit=None, state=None):
     """
     Runs func on objects in parallel while ensuring that func is
     ran on object only after it is ran on all its dependencies.
@@ -110,12 +140,15 @@ def parallel_execute_iter(objects, func, get_deps):
     """
     if get_deps is None:
         get_deps = _no_deps
+    if limit is None:
+        limit = parallel_limit
 
     results = Queue()
-    state = State(objects)
+    if state is None:
+        state = State(objects)
 
     while True:
-        feed_queue(objects, func, get_deps, results, state)
+        feed_queue(objects, func, get_deps, results, state, limit)
 
         try:
             event = results.get(timeout=0.1)
@@ -129,6 +162,9 @@ def parallel_execute_iter(objects, func, get_deps):
             break
 
         obj, _, exception = event
+        state.end_times[obj] = time.time()
+        if obj in state.started:
+            state.running -= 1
         if exception is None:
             log.debug('Finished processing: {}'.format(obj))
             state.finished.add(obj)
@@ -151,33 +187,40 @@ def producer(obj, func, results):
         results.put((obj, None, e))
 
 
-def feed_queue(objects, func, get_deps, results, state):
+def feed_queue(objects, func, get_deps, results, state, limit):
     """
     Starts producer threads for any objects which are ready to be processed
-    (i.e. they have no dependencies which haven't been successfully processed).
+    (i.e. they have no dependencies which haven't been successfully processed),
+    as long as fewer than `limit` producer threads are running.
 
     Shortcuts any objects whose dependencies have failed and places an
     (object, None, UpstreamError()) tuple on the results queue.
     """
     pending = state.pending()
-    log.debug('Pending: {}'.format(pending))
+    log.debug('Pending: %s', pending)
 
     for obj in pending:
+        if state.running >= limit:
+            # The objects left are considered again when one ends
+            break
         deps = get_deps(obj)
 
         if any(dep in state.failed for dep in deps):
             log.debug('{} has upstream errors - not processing'.format(obj))
             results.put((obj, None, UpstreamError()))
             state.failed.add(obj)
-        elif all(
-            dep not in objects or dep in state.finished
-            for dep in deps
-        ):
+        elif all(dep not in objects or dep in state.finished for dep in deps):
+            if obj not in state.ready_times:
+                state.ready_times[obj] = max(
+                    [state.end_times[dep] for dep in deps if dep in state.end_times] +
+                    [state.start_time])
             log.debug('Starting producer thread for {}'.format(obj))
+            state.start_times[obj] = time.time()
             t = Thread(target=producer, args=(obj, func, results))
             t.daemon = True
             t.start()
             state.started.add(obj)
+            state.running += 1
 
     if state.is_done():
         results.put(STOP)
@@ -187,6 +230,78 @@ class UpstreamError(Exception):
     pass
 
 
+@contextlib.contextmanager
+def record_timings():
+    """Collect the Timings of the parallel operations run in the block, in
+    any thread, in the list it yields.
+    """
+    global recorded_timings
+    recorded_timings = []
+    try:
+        yield recorded_timings
+    finally:
+        recorded_timings = None
+
+
+@contextlib.contextmanager
+def limit_parallel_operations(limit):
+    """Run the parallel operations of the block on at most `limit` objects
+    at the same time, unless they're given a limit.
+    """
+    global parallel_limit
+    previous = parallel_limit
+    parallel_limit = limit
+    try:
+        yield
+    finally:
+        parallel_limit = previous
+
+
+class Timings(object):
+    """When the objects of a parallel operation became ready, started and
+    ended, and the chain of dependencies which bounded the operation.
+    """
+
+    def __init__(self, msg, state, get_name, get_deps):
+        self.msg = msg
+        self.start_time = state.start_time
+        self.end_time = max(list(state.end_times.values()) + [state.start_time])
+        self.objects = [obj for obj in state.objects if obj in state.start_times]
+        self.names = dict((obj, get_name(obj)) for obj in self.objects)
+        self.deps = dict(
+            (obj, [dep for dep in get_deps(obj) if dep in state.start_times])
+            for obj in self.objects)
+        self.ready_times = state.ready_times
+        self.start_times = state.start_times
+        self.end_times = state.end_times
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time
+
+    def slot_wait(self, obj):
+        """The time the object waited for a parallel slot once it was ready."""
+        return self.start_times[obj] - self.ready_times[obj]
+
+    def critical_path(self):
+        """Return the chain of objects, starting with an object without
+        dependencies, in which each object was the last dependency of the next
+        one to end, and the last object ended the operation.
+        """
+        if not self.objects:
+            return []
+
+        path = [max(self.objects, key=self.end_times.get)]
+        while self.deps[path[-1]]:
+            path.append(max(self.deps[path[-1]], key=self.end_times.get))
+        return list(reversed(path))
+
+    def total_slot_wait(self, objects=None):
+        if objects is None:
+            objects = self.objects
+        return sum(self.slot_wait(obj) for obj in objects)
+
+
 class ParallelStreamWriter(object):
     """Write out messages for operations happening in parallel.
 
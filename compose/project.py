@@ -10,6 +10,7 @@ import enum
 from docker.errors import APIError
 
 from . import parallel
+from . import tracing
 from .config import ConfigurationError
 from .config.config import V1
 from .config.sort_services import get_container_name_from_network_mode
@@ -20,6 +21,9 @@ from .const import LABEL_ONE_OFF
 from .const import LABEL_PROJECT
 from .const import LABEL_SERVICE
 from .container import Container
+from .container import container_summary
+from .container import ContainerCache
+from .container import get_container_name
 from .network import build_networks
 from .network import get_networks
 from .network import ProjectNetworks
@@ -36,6 +40,11 @@ from .volume import ProjectVolumes
 log = logging.getLogger(__name__)
 
 
+# The states of the one-off containers which are listed with the containers
+# of the services, those of the containers the daemon lists without all=True
+LISTED_ONE_OFF_STATES = ('running', 'paused', 'restarting')
+
+
 @enum.unique
 class OneOffFilter(enum.Enum):
     include = 0
@@ -86,39 +95,69 @@ class Project(object):
         project = cls(name, [], client, project_networks, volumes)
 
         for service_dict in config_data.services:
-            service_dict = dict(service_dict)
-            if use_networking:
-                service_networks = get_networks(service_dict, networks)
-            else:
-                service_networks = {}
+            project.services.append(
+                project.build_service(service_dict, config_data.version, networks))
 
-            service_dict.pop('networks', None)
-            links = project.get_links(service_dict)
-            network_mode = project.get_network_mode(
-                service_dict, list(service_networks.keys())
-            )
-            volumes_from = get_volumes_from(project, service_dict)
+        return project
 
-            if config_data.version != V1:
-                service_dict['volumes'] = [
-                    volumes.namespace_spec(volume_spec)
-                    for volume_spec in service_dict.get('volumes', [])
-                ]
+    def apply_config_changes(self, changes):
+        """
+        Update the project to a configuration loaded again by a
+        config.reload.ConfigReloader. Only the services which were added or
+        changed are built again, the others are kept as they are.
+        """
+        config_data = changes.config
+        use_networking = (config_data.version and config_data.version != V1)
+        networks = build_networks(self.name, config_data, self.client)
+        self.networks = ProjectNetworks.from_services(
+            config_data.services,
+            networks,
+            use_networking)
+        self.volumes = ProjectVolumes.from_config(self.name, config_data, self.client)
 
-            project.services.append(
-                Service(
-                    service_dict.pop('name'),
-                    client=client,
-                    project=name,
-                    use_networking=use_networking,
-                    networks=service_networks,
-                    links=links,
-                    network_mode=network_mode,
-                    volumes_from=volumes_from,
-                    **service_dict)
-            )
+        rebuild = set(changes.added) | set(changes.changed)
+        services = dict((service.name, service) for service in self.services)
+        self.services = []
+        for service_dict in config_data.services:
+            service = services.get(service_dict['name'])
+            if service is None or service.name in rebuild:
+                service = self.build_service(service_dict, config_data.version, networks)
+            self.services.append(service)
 
-        return project
+    def build_service(self, service_dict, version, networks):
+        """
+        Construct a Service from a service dict of the config, linked to the
+        services of the project it depends on.
+        """
+        service_dict = dict(service_dict)
+        if self.networks.use_networking:
+            service_networks = get_networks(service_dict, networks)
+        else:
+            service_networks = {}
+
+        service_dict.pop('networks', None)
+        links = self.get_links(service_dict)
+        network_mode = self.get_network_mode(
+            service_dict, list(service_networks.keys())
+        )
+        volumes_from = get_volumes_from(self, service_dict)
+
+        if version != V1:
+            service_dict['volumes'] = [
+                self.volumes.namespace_spec(volume_spec)
+                for volume_spec in service_dict.get('volumes', [])
+            ]
+
+        return Service(
+            service_dict.pop('name'),
+            client=self.client,
+            project=self.name,
+            use_networking=self.networks.use_networking,
+            networks=service_networks,
+            links=links,
+            network_mode=network_mode,
+            volumes_from=volumes_from,
+            **service_dict)
 
     @property
     def service_names(self):
@@ -218,6 +257,7 @@ class Project(object):
 
         return NetworkMode(network_mode)
 
+    @tracing.traced
     def start(self, service_names=None, **options):
         containers = []
 
@@ -239,6 +279,7 @@ class Project(object):
 
         return containers
 
+    @tracing.traced
     def stop(self, service_names=None, one_off=OneOffFilter.exclude, **options):
         containers = self.containers(service_names, one_off=one_off)
 
@@ -268,11 +309,13 @@ class Project(object):
     def kill(self, service_names=None, **options):
         parallel.parallel_kill(self.containers(service_names), options)
 
+    @tracing.traced
     def remove_stopped(self, service_names=None, one_off=OneOffFilter.exclude, **options):
         parallel.parallel_remove(self.containers(
             service_names, stopped=True, one_off=one_off
         ), options)
 
+    @tracing.traced
     def down(self, remove_image_type, include_volumes, remove_orphans=False):
         self.stop(one_off=OneOffFilter.include)
         self.find_orphan_containers(remove_orphans)
@@ -289,11 +332,13 @@ class Project(object):
         for service in self.get_services():
             service.remove_image(remove_image_type)
 
+    @tracing.traced
     def restart(self, service_names=None, **options):
         containers = self.containers(service_names, stopped=True)
         parallel.parallel_restart(containers, options)
         return containers
 
+    @tracing.traced
     def build(self, service_names=None, no_cache=False, pull=False, force_rm=False):
         for service in self.get_services(service_names):
             if service.can_be_built():
@@ -301,6 +346,7 @@ class Project(object):
             else:
                 log.info('%s uses an image, skipping' % service.name)
 
+    @tracing.traced
     def create(
         self,
         service_names=None,
@@ -332,12 +378,13 @@ class Project(object):
                 'service': container.service,
                 'attributes': {
                     'name': container.name,
-                    'image': event['from'],
+                    'image': event.get('from'),
                 },
                 'container': container,
             }
 
         service_names = set(service_names or self.service_names)
+        containers = ContainerCache()
         for event in self.client.events(
             filters={'label': self.labels()},
             decode=True
@@ -350,16 +397,26 @@ class Project(object):
                 # to images
                 continue
 
-            # TODO: get labels from the API v1.22 , see github issue 2618
-            try:
-                # this can fail if the conatiner has been removed
-                container = Container.from_id(self.client, event['id'])
-            except APIError:
-                continue
+            container = containers.get(event['id'])
+            if container is None:
+                try:
+                    # this can fail if the container has been removed and the
+                    # event doesn't include its labels
+                    container = Container.from_event(self.client, event)
+                except APIError:
+                    continue
+                containers.add(container)
+
+            if event['status'] == 'destroy':
+                containers.remove(event['id'])
+            elif event['status'] == 'rename':
+                container.update_from_event(event)
+
             if container.service not in service_names:
                 continue
             yield build_container_event(event, container)
 
+    @tracing.traced
     def up(self,
            service_names=None,
            start_deps=True,
@@ -411,10 +468,12 @@ class Project(object):
             for container in svc_containers
         ]
 
+    @tracing.traced
     def initialize(self):
         self.networks.initialize()
         self.volumes.initialize()
 
+    @tracing.traced
     def _get_convergence_plans(self, services, strategy):
         plans = {}
 
@@ -438,6 +497,7 @@ class Project(object):
 
         return plans
 
+    @tracing.traced
     def pull(self, service_names=None, ignore_pull_failures=False):
         for service in self.get_services(service_names, include_deps=False):
             service.pull(ignore_pull_failures)
@@ -446,27 +506,58 @@ class Project(object):
         for service in self.get_services(service_names, include_deps=False):
             service.push(ignore_push_failures)
 
-    def _labeled_containers(self, stopped=False, one_off=OneOffFilter.exclude):
+    def _labeled_containers(self, stopped=False, one_off=OneOffFilter.exclude, trimmed=False):
         return list(filter(None, [
-            Container.from_ps(self.client, container)
+            Container.from_ps(self.client, container, trimmed=trimmed)
             for container in self.client.containers(
                 all=stopped,
                 filters={'label': self.labels(one_off=one_off)})])
         )
 
-    def containers(self, service_names=None, stopped=False, one_off=OneOffFilter.exclude):
+    def containers(self, service_names=None, stopped=False, one_off=OneOffFilter.exclude,
+                   trimmed=False):
+        """Return the containers of the services. Trimmed containers keep
+        their labels from the list and only the fields compose reads from
+        an inspect, for the callers which hold many of them.
+        """
         if service_names:
             self.validate_service_names(service_names)
         else:
             service_names = self.service_names
 
-        containers = self._labeled_containers(stopped, one_off)
+        containers = self._labeled_containers(stopped, one_off, trimmed)
 
         def matches_service_names(container):
             return container.labels.get(LABEL_SERVICE) in service_names
 
         return [c for c in containers if matches_service_names(c)]
 
+    def container_summaries(self, service_names=None):
+        """Return the summaries of the containers of the services, with their
+        running one-off containers, from a single list of the containers of
+        the project, without inspecting any of them.
+        """
+        if service_names:
+            self.validate_service_names(service_names)
+        else:
+            service_names = self.service_names
+
+        summaries = [
+            container_summary(container)
+            for container in self.client.containers(
+                all=True,
+                filters={'label': self.labels(one_off=OneOffFilter.include)})
+            if get_container_name(container) is not None
+        ]
+
+        def is_listed(summary):
+            if summary['service'] not in service_names:
+                return False
+            return not summary['one_off'] or summary['state'] in LISTED_ONE_OFF_STATES
+
+        return sorted(filter(is_listed, summaries), key=operator.itemgetter('name'))
+
+    @tracing.traced
     def find_orphan_containers(self, remove_orphans):
         def _find():
             containers = self._labeled_containers()
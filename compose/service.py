@@ -16,6 +16,7 @@ from docker.utils.ports import split_port
 
 from . import __version__
 from . import progress_stream
+from . import tracing
 from .config import DOCKER_CONFIG_KEYS
 from .config import merge_environment
 from .config.types import VolumeSpec
@@ -118,6 +119,11 @@ class BuildAction(enum.Enum):
 
 
 class Service(object):
+    __slots__ = (
+        'name', 'client', 'project', 'use_networking', 'links', 'volumes_from',
+        'network_mode', 'networks', 'options',
+    )
+
     def __init__(
         self,
         name,
@@ -168,6 +174,7 @@ class Service(object):
             self.start_container_if_stopped(c, **options)
         return containers
 
+    @tracing.traced
     def scale(self, desired_num, timeout=DEFAULT_TIMEOUT):
         """
         Adjusts the number of containers to the specified number and ensures
@@ -257,6 +264,7 @@ class Service(object):
                 "Stopping and removing",
             )
 
+    @tracing.traced
     def create_container(self,
                          one_off=False,
                          previous_container=None,
@@ -287,6 +295,7 @@ class Service(object):
             raise OperationFailedError("Cannot create container for service %s: %s" %
                                        (self.name, ex.explanation))
 
+    @tracing.traced
     def ensure_image_exists(self, do_build=BuildAction.none):
         if self.can_be_built() and do_build == BuildAction.force:
             self.build()
@@ -324,6 +333,7 @@ class Service(object):
     def image_name(self):
         return self.options.get('image', '{s.project}_{s.name}'.format(s=self))
 
+    @tracing.traced
     def convergence_plan(self, strategy=ConvergenceStrategy.changed):
         containers = self.containers(stopped=True)
 
@@ -371,6 +381,7 @@ class Service(object):
 
         return has_diverged
 
+    @tracing.traced
     def execute_convergence_plan(self,
                                  plan,
                                  timeout=DEFAULT_TIMEOUT,
@@ -417,6 +428,7 @@ class Service(object):
         else:
             raise Exception("Invalid action: {}".format(action))
 
+    @tracing.traced
     def recreate_container(
             self,
             container,
@@ -453,6 +465,7 @@ class Service(object):
                 container.attach_log_stream()
             return self.start_container(container)
 
+    @tracing.traced
     def start_container(self, container):
         self.connect_container_to_networks(container)
         try:
@@ -482,6 +495,7 @@ class Service(object):
                 link_local_ips=netdefs.get('link_local_ips', None),
             )
 
+    @tracing.traced
     def remove_duplicate_containers(self, timeout=DEFAULT_TIMEOUT):
         for c in self.duplicate_containers():
             log.info('Removing %s' % c.name)
@@ -719,6 +733,7 @@ class Service(object):
 
         return host_config
 
+    @tracing.traced
     def build(self, no_cache=False, pull=False, force_rm=False):
         log.info('Building %s' % self.name)
 
@@ -746,11 +761,6 @@ class Service(object):
         except StreamOutputError as e:
             raise BuildError(self, six.text_type(e))
 
-        # Ensure the HTTP connection is not reused for another
-        # streaming command, as the Docker daemon can sometimes
-        # complain about it
-        self.client.close()
-
         image_id = None
 
         for event in all_events:
@@ -822,6 +832,7 @@ class Service(object):
 
         return any(has_host_port(binding) for binding in self.options.get('ports', []))
 
+    @tracing.traced
     def pull(self, ignore_pull_failures=False):
         if 'image' not in self.options:
             return
@@ -840,6 +851,7 @@ class Service(object):
             else:
                 log.error(six.text_type(e))
 
+    @tracing.traced
     def push(self, ignore_push_failures=False):
         if 'image' not in self.options or 'build' not in self.options:
             return
@@ -0,0 +1,204 @@
+"""
+Opt-in tracing of the time commands spend in each of their phases.
+
+While a Tracer is recording, `span` records a nested span of time, and the
+methods decorated with `traced` record one for each of their calls. Spans
+started in the threads of `parallel_execute` are nested in the span which
+started the operation. When nothing is recording, both only check a global.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+import six
+
+
+FORMATS = ('chrome', 'otlp')
+
+tracer = None
+
+local = threading.local()
+
+
+class Span(object):
+
+    def __init__(self, span_id, parent_id, name, category, attributes):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.thread = threading.current_thread().ident
+        self.start = time.time()
+        self.end = None
+
+
+class Tracer(object):
+    """Collect the spans of a command, and write them in the Chrome trace
+    or the OTLP JSON format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.trace_id = os.urandom(16)
+        self.spans = []
+        self.next_id = 1
+
+    def start_span(self, name, category, parent, attributes):
+        with self.lock:
+            span = Span(
+                self.next_id,
+                parent.span_id if parent else None,
+                name,
+                category,
+                attributes)
+            self.next_id += 1
+            self.spans.append(span)
+        return span
+
+    def finished_spans(self):
+        with self.lock:
+            return [span for span in self.spans if span.end is not None]
+
+    def chrome_trace(self):
+        spans = self.finished_spans()
+        origin = min(span.start for span in spans) if spans else 0
+        pid = os.getpid()
+        events = []
+        for span in spans:
+            args = dict(span.attributes, span_id=span.span_id)
+            if span.parent_id:
+                args['parent_id'] = span.parent_id
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': int((span.start - origin) * 1000000),
+                'dur': int((span.end - span.start) * 1000000),
+                'pid': pid,
+                'tid': span.thread,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def otlp_trace(self):
+        trace_id = hex_id(self.trace_id)
+        spans = []
+        for span in self.finished_spans():
+            attributes = dict(span.attributes, category=span.category)
+            spans.append({
+                'traceId': trace_id,
+                'spanId': span_hex_id(span.span_id),
+                'parentSpanId': span_hex_id(span.parent_id) if span.parent_id else '',
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(int(span.start * 1e9)),
+                'endTimeUnixNano': str(int(span.end * 1e9)),
+                'attributes': otlp_attributes(attributes),
+            })
+        return {
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': otlp_attributes({'service.name': 'docker-compose'}),
+                },
+                'scopeSpans': [{'scope': {'name': 'compose'}, 'spans': spans}],
+            }],
+        }
+
+    def write(self, filename, format='chrome'):
+        if format == 'otlp':
+            trace = self.otlp_trace()
+        else:
+            trace = self.chrome_trace()
+        with open(filename, 'w') as fh:
+            json.dump(trace, fh, indent=2)
+
+
+def hex_id(value):
+    return ''.join('{:02x}'.format(byte) for byte in bytearray(value))
+
+
+def span_hex_id(span_id):
+    return '{:016x}'.format(span_id)
+
+
+def otlp_attributes(attributes):
+    def value(v):
+        if isinstance(v, bool):
+            return {'boolValue': v}
+        if isinstance(v, six.integer_types):
+            return {'intValue': str(v)}
+        return {'stringValue': six.text_type(v)}
+
+    return [{'key': key, 'value': value(v)} for key, v in sorted(attributes.items())]
+
+
+@contextlib.contextmanager
+def record(filename, format='chrome'):
+    """Record the spans of the block, and write them to `filename`."""
+    global tracer
+    tracer = Tracer()
+    try:
+        yield tracer
+    finally:
+        recorded, tracer = tracer, None
+        recorded.write(filename, format)
+
+
+def current_span():
+    return getattr(local, 'span', None)
+
+
+@contextlib.contextmanager
+def span(name, category='compose', parent=None, **attributes):
+    """Record a span of the block, nested in `parent`, or the span the
+    thread is in.
+    """
+    active = tracer
+    if active is None:
+        yield
+        return
+
+    outer = current_span()
+    current = active.start_span(name, category, parent or outer, attributes)
+    local.span = current
+    try:
+        yield
+    except BaseException as e:
+        current.attributes['error'] = type(e).__name__
+        raise
+    finally:
+        current.end = time.time()
+        local.span = outer
+
+
+def traced(func):
+    """Record a span for each call of a method of an object with a name, like
+    a Project or a Service.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        attributes = {}
+        if getattr(self, 'name', None):
+            attributes['object'] = self.name
+        with span('{}.{}'.format(type(self).__name__, func.__name__), **attributes):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def parallel_task(func, get_name, parent):
+    """Wrap a function which `parallel_execute` runs in its threads, so that
+    each of its calls is recorded in a span nested in `parent`.
+    """
+    def wrapper(obj):
+        with span(get_name(obj), category='parallel', parent=parent):
+            return func(obj)
+    return wrapper
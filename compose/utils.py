@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 import codecs
+import functools
 import hashlib
 import json
 import json.decoder
@@ -117,3 +118,23 @@ def splitdrive(path):
     if path[0] in ['.', '\\', '/', '~']:
         return ('', path)
     return ntpath.splitdrive(path)
+
+
+def memoize(func):
+    """Cache the result of a function for each value of its arguments, which
+    must be hashable, for the life of the process. The original function is
+    available as `uncached`.
+    """
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        try:
+            return cache[args]
+        except KeyError:
+            result = cache[args] = func(*args)
+            return result
+
+    wrapper.cache = cache
+    wrapper.uncached = func
+    return wrapper
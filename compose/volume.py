@@ -5,6 +5,7 @@ import logging
 
 from docker.errors import NotFound
 
+from . import tracing
 from .config import ConfigurationError
 
 log = logging.getLogger(__name__)
@@ -83,6 +84,7 @@ class ProjectVolumes(object):
             except NotFound:
                 log.warn("Volume %s not found.", volume.full_name)
 
+    @tracing.traced
     def initialize(self):
         try:
             for volume in self.volumes.values():
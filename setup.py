@@ -58,7 +58,7 @@ setup(
     url='https://www.docker.com/',
     author='Docker, Inc.',
     license='Apache License 2.0',
-    packages=find_packages(exclude=['tests.*', 'tests']),
+    packages=find_packages(exclude=['tests.*', 'tests', 'benchmarks.*', 'benchmarks']),
     include_package_data=True,
     test_suite='nose.collector',
     install_requires=install_requires,
@@ -0,0 +1,489 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.queue import Queue
+from six.moves.urllib.parse import parse_qs
+
+
+class FakeDaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeDaemonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer the Docker API calls Compose makes, and record the connection
+    each request was received on.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connection_id = self.server.fake_daemon.connection_opened()
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def do_DELETE(self):
+        self.handle_request()
+
+    def handle_request(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        path, _, query = self.path.partition('?')
+        path = re.sub(r'^/v[0-9.]+', '', path)
+        query = dict((key, values[0]) for key, values in parse_qs(query).items())
+        fake_daemon = self.server.fake_daemon
+        fake_daemon.request_received(self.connection_id, self.command, path)
+
+        if path != '/events':
+            fake_daemon.delay()
+            if fake_daemon.should_fail():
+                self.send_json({'message': 'injected failure'}, 500)
+                return
+
+        for method, pattern, name in ROUTES:
+            match = re.match(pattern, path)
+            if method == self.command and match:
+                getattr(self, name)(query, body, *match.groups())
+                return
+        self.send_json({'message': 'page not found'}, 404)
+
+    def ping(self, query, body):
+        self.send_bytes(b'OK', 'text/plain')
+
+    def version(self, query, body):
+        self.send_json({'ApiVersion': '1.24', 'Version': '1.12.0'})
+
+    def info(self, query, body):
+        self.send_json({'Containers': len(self.server.fake_daemon.containers)})
+
+    def list_containers(self, query, body):
+        filters = json.loads(query.get('filters', '{}'))
+        self.send_json(self.server.fake_daemon.list_containers(
+            filters.get('label', []), query.get('all') in ('1', 'True', 'true')))
+
+    def create_container(self, query, body):
+        fake_daemon = self.server.fake_daemon
+        self.send_json(
+            {'Id': fake_daemon.create_container(query.get('name'), json.loads(body.decode('utf-8')))},
+            201)
+
+    def inspect_container(self, query, body, container_id):
+        self.send_json(self.server.fake_daemon.inspect_container(container_id))
+
+    def container_action(self, query, body, container_id, action):
+        container = self.server.fake_daemon.find_container(container_id)
+        if container is None:
+            self.send_json({'message': 'No such container: ' + container_id}, 404)
+            return
+        if action == 'wait':
+            self.send_json({'StatusCode': container['State']['ExitCode']})
+            return
+        self.server.fake_daemon.change_container(container, action, query)
+        self.send_empty()
+
+    def remove_container(self, query, body, container_id):
+        container = self.server.fake_daemon.find_container(container_id)
+        if container is None:
+            self.send_json({'message': 'No such container: ' + container_id}, 404)
+            return
+        self.server.fake_daemon.change_container(container, 'destroy', query)
+        self.send_empty()
+
+    def container_logs(self, query, body, container_id):
+        fake_daemon = self.server.fake_daemon
+        container = fake_daemon.inspect_container(container_id)
+        lines = fake_daemon.log_lines
+        if query.get('tail', 'all').isdigit():
+            lines = min(lines, int(query['tail']))
+
+        output = []
+        for number in range(lines):
+            line = '{} line {}\n'.format(container['Name'].lstrip('/'), number)
+            if query.get('timestamps') in ('1', 'True', 'true'):
+                line = '2016-11-01T00:00:00.{:09d}Z {}'.format(number, line)
+            data = line.encode('utf-8')
+            if not container['Config'].get('Tty'):
+                data = struct.pack('>BxxxL', 1, len(data)) + data
+            output.append(data)
+        self.send_bytes(b''.join(output), 'application/octet-stream')
+
+    def inspect_image(self, query, body, name):
+        self.send_json({'Id': image_id(name), 'RepoTags': [name]})
+
+    def pull(self, query, body):
+        image = query.get('fromImage', 'image')
+        self.send_stream(progress_lines(image, self.server.fake_daemon.progress_lines))
+
+    def build(self, query, body):
+        lines = [
+            {'stream': 'Step {} : RUN step {}\n'.format(number, number)}
+            for number in range(1, self.server.fake_daemon.progress_lines + 1)
+        ]
+        lines.append({'stream': 'Successfully built {}\n'.format(image_id(query.get('t', ''))[7:19])})
+        self.send_stream(lines)
+
+    def inspect_network(self, query, body, name):
+        self.send_resource(self.server.fake_daemon.networks, name)
+
+    def list_networks(self, query, body):
+        self.send_json(list(self.server.fake_daemon.networks.values()))
+
+    def create_network(self, query, body):
+        self.create_resource(self.server.fake_daemon.networks, json.loads(body.decode('utf-8')))
+
+    def remove_network(self, query, body, name):
+        self.remove_resource(self.server.fake_daemon.networks, name)
+
+    def network_action(self, query, body, name, action):
+        fake_daemon = self.server.fake_daemon
+        options = json.loads(body.decode('utf-8'))
+        container = fake_daemon.find_container(options['Container'])
+        if container is None or name not in fake_daemon.networks:
+            self.send_json({'message': 'not found'}, 404)
+            return
+        with fake_daemon.lock:
+            networks = container['NetworkSettings']['Networks']
+            if action == 'connect':
+                networks[name] = dict(options.get('EndpointConfig') or {}, NetworkID=name)
+            else:
+                networks.pop(name, None)
+        self.send_empty(200)
+
+    def inspect_volume(self, query, body, name):
+        self.send_resource(self.server.fake_daemon.volumes, name)
+
+    def create_volume(self, query, body):
+        self.create_resource(self.server.fake_daemon.volumes, json.loads(body.decode('utf-8')))
+
+    def remove_volume(self, query, body, name):
+        self.remove_resource(self.server.fake_daemon.volumes, name)
+
+    def events(self, query, body):
+        self.send_stream(self.server.fake_daemon.subscribe())
+
+    def send_resource(self, resources, name):
+        if name not in resources:
+            self.send_json({'message': 'No such resource: ' + name}, 404)
+            return
+        self.send_json(resources[name])
+
+    def create_resource(self, resources, options):
+        with self.server.fake_daemon.lock:
+            resources[options['Name']] = dict(
+                options,
+                Id=options['Name'],
+                Driver=options.get('Driver') or 'local',
+                Options=options.get('Options') or options.get('DriverOpts') or {},
+                Labels=options.get('Labels') or {})
+        self.send_json({'Id': options['Name'], 'Name': options['Name']}, 201)
+
+    def remove_resource(self, resources, name):
+        with self.server.fake_daemon.lock:
+            if resources.pop(name, None) is None:
+                self.send_json({'message': 'No such resource: ' + name}, 404)
+                return
+        self.send_empty()
+
+    def send_json(self, body, status=200):
+        self.send_bytes(json.dumps(body).encode('utf-8'), 'application/json', status)
+
+    def send_bytes(self, data, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_empty(self, status=204):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_stream(self, lines):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for line in lines:
+                data = (json.dumps(line) + '\r\n').encode('utf-8')
+                self.wfile.write('{:x}\r\n'.format(len(data)).encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except socket.error:
+            # The client stopped reading the stream
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+ROUTES = [
+    ('GET', r'^/_ping$', 'ping'),
+    ('GET', r'^/version$', 'version'),
+    ('GET', r'^/info$', 'info'),
+    ('GET', r'^/containers/json$', 'list_containers'),
+    ('POST', r'^/containers/create$', 'create_container'),
+    ('GET', r'^/containers/([^/]+)/json$', 'inspect_container'),
+    ('GET', r'^/containers/([^/]+)/logs$', 'container_logs'),
+    ('POST', r'^/containers/([^/]+)/(start|stop|kill|restart|pause|unpause|rename|wait)$',
+     'container_action'),
+    ('DELETE', r'^/containers/([^/]+)$', 'remove_container'),
+    ('GET', r'^/images/(.+)/json$', 'inspect_image'),
+    ('POST', r'^/images/create$', 'pull'),
+    ('POST', r'^/build$', 'build'),
+    ('GET', r'^/networks$', 'list_networks'),
+    ('POST', r'^/networks/create$', 'create_network'),
+    ('GET', r'^/networks/([^/]+)$', 'inspect_network'),
+    ('DELETE', r'^/networks/([^/]+)$', 'remove_network'),
+    ('POST', r'^/networks/([^/]+)/(connect|disconnect)$', 'network_action'),
+    ('POST', r'^/volumes/create$', 'create_volume'),
+    ('GET', r'^/volumes/([^/]+)$', 'inspect_volume'),
+    ('DELETE', r'^/volumes/([^/]+)$', 'remove_volume'),
+    ('GET', r'^/events$', 'events'),
+]
+
+
+def image_id(name):
+    return 'sha256:' + hashlib.sha256(name.encode('utf-8')).hexdigest()
+
+
+def list_output(container):
+    """The output of GET /containers/json for a container."""
+    state = container['State']
+    if state.get('Paused'):
+        status, state_name = 'Up 1 second (Paused)', 'paused'
+    elif state.get('Running'):
+        status, state_name = 'Up 1 second', 'running'
+    else:
+        status = 'Exited ({}) 1 second ago'.format(state.get('ExitCode', 0))
+        state_name = 'exited'
+    config = container['Config']
+    command = []
+    for part in (config.get('Entrypoint'), config.get('Cmd')):
+        if isinstance(part, six.string_types):
+            part = [part]
+        command.extend(part or [])
+    ports = []
+    for private, bindings in sorted((container['NetworkSettings'].get('Ports') or {}).items()):
+        port, _, protocol = private.partition('/')
+        for binding in bindings or [{}]:
+            listed = {'PrivatePort': int(port), 'Type': protocol or 'tcp'}
+            if binding.get('HostPort'):
+                listed['PublicPort'] = int(binding['HostPort'])
+                listed['IP'] = binding.get('HostIp') or '0.0.0.0'
+            ports.append(listed)
+    return {
+        'Id': container['Id'],
+        'Image': config['Image'],
+        'Names': [container['Name']],
+        'Command': ' '.join(command),
+        'Created': 1477958400,
+        'Labels': config.get('Labels') or {},
+        'State': state_name,
+        'Status': status,
+        'Ports': ports,
+    }
+
+
+def progress_lines(image, count):
+    layer = image_id(image)[7:19]
+    for number in range(count):
+        yield {
+            'status': 'Downloading' if number < count - 1 else 'Pull complete',
+            'id': layer,
+            'progressDetail': {'current': number + 1, 'total': count},
+            'progress': '[{}>] {}/{}'.format('=' * number, number + 1, count),
+        }
+
+
+class FakeDaemon(object):
+    """A Docker daemon answering on a unix socket, which counts the
+    connections the clients open to it, and the requests received on each
+    of them.
+
+    The daemon keeps the containers, networks and volumes created through
+    it, starting with `containers`, which are results of inspecting
+    containers. Every image exists. Logs have `log_lines` lines, and pulls
+    and builds report `progress_lines` steps.
+
+    Each request but the events waits `latency` seconds, plus up to
+    `jitter` seconds, and fails with a server error at `failure_rate`.
+    The events streams stay open until `send_event` sends an event to
+    them, or the daemon stops.
+    """
+
+    def __init__(self, containers=(), latency=0, jitter=0, failure_rate=0, seed=None,
+                 log_lines=10, progress_lines=3):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'docker.sock')
+        self.containers = list(containers)
+        self.networks = {}
+        self.volumes = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.log_lines = log_lines
+        self.progress_lines = progress_lines
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        self.subscribers = []
+        self.server = FakeDaemonServer(self.socket_path, FakeDaemonHandler)
+        self.server.fake_daemon = self
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def base_url(self):
+        return 'unix://' + self.socket_path
+
+    def connection_opened(self):
+        with self.lock:
+            self.connections += 1
+            return self.connections
+
+    def request_received(self, connection_id, method, path):
+        with self.lock:
+            self.requests.append((connection_id, method, path))
+
+    def delay(self):
+        with self.lock:
+            seconds = self.latency + self.random.uniform(0, self.jitter)
+        if seconds:
+            time.sleep(seconds)
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.failure_rate
+
+    def list_containers(self, labels, stopped=True):
+        def matches(container):
+            container_labels = container['Config'].get('Labels') or {}
+            return (stopped or container['State'].get('Running')) and all(
+                container_labels.get(key) == value
+                for key, _, value in (label.partition('=') for label in labels))
+
+        with self.lock:
+            return [
+                list_output(container)
+                for container in self.containers if matches(container)
+            ]
+
+    def find_container(self, container_id):
+        with self.lock:
+            for container in self.containers:
+                if container['Id'] == container_id or container['Name'] == '/' + container_id:
+                    return container
+        return None
+
+    def inspect_container(self, container_id):
+        container = self.find_container(container_id)
+        if container is not None:
+            return container
+        return {'Id': container_id, 'Name': '/' + container_id, 'Config': {'Tty': True}}
+
+    def create_container(self, name, options):
+        endpoints = (options.get('NetworkingConfig') or {}).get('EndpointsConfig') or {}
+        container = {
+            'Id': hashlib.sha256(os.urandom(16)).hexdigest(),
+            'Name': '/' + (name or 'container{}'.format(len(self.containers))),
+            'Created': datetime.datetime.utcnow().isoformat() + 'Z',
+            'Image': image_id(options['Image']),
+            'Config': {
+                'Image': options['Image'],
+                'Labels': options.get('Labels') or {},
+                'Cmd': options.get('Cmd'),
+                'Entrypoint': options.get('Entrypoint'),
+                'Tty': bool(options.get('Tty')),
+                'Env': options.get('Env') or [],
+            },
+            'HostConfig': options.get('HostConfig') or {},
+            'State': {'Running': False, 'Paused': False, 'Restarting': False, 'ExitCode': 0},
+            'NetworkSettings': {
+                'Ports': {},
+                'Networks': dict(
+                    (network, dict(endpoint or {}, NetworkID=network))
+                    for network, endpoint in endpoints.items()),
+            },
+            'Mounts': [],
+        }
+        with self.lock:
+            self.containers.append(container)
+        self.container_event(container, 'create')
+        return container['Id']
+
+    def change_container(self, container, action, query):
+        with self.lock:
+            state = container['State']
+            if action in ('start', 'restart', 'unpause'):
+                state.update(Running=True, Paused=False)
+            elif action in ('stop', 'kill'):
+                state.update(Running=False, Paused=False, ExitCode=137 if action == 'kill' else 0)
+            elif action == 'pause':
+                state['Paused'] = True
+            elif action == 'rename':
+                container['Name'] = '/' + query['name']
+            elif action == 'destroy':
+                self.containers.remove(container)
+        self.container_event(container, {'stop': 'die', 'kill': 'die'}.get(action, action))
+
+    def container_event(self, container, status):
+        now = time.time()
+        attributes = dict(
+            container['Config']['Labels'],
+            image=container['Config']['Image'],
+            name=container['Name'].lstrip('/'))
+        self.send_event({
+            'status': status,
+            'id': container['Id'],
+            'from': container['Config']['Image'],
+            'Type': 'container',
+            'Action': status,
+            'Actor': {'ID': container['Id'], 'Attributes': attributes},
+            'time': int(now),
+            'timeNano': int(now * 1000000000),
+        })
+
+    def subscribe(self):
+        queue = Queue()
+        with self.lock:
+            self.subscribers.append(queue)
+        return iter(queue.get, None)
+
+    def send_event(self, event):
+        with self.lock:
+            for queue in self.subscribers:
+                queue.put(event)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.send_event(None)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
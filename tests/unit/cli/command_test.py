@@ -6,8 +6,11 @@ import ssl
 
 import pytest
 
+from compose.cli.command import get_client
 from compose.cli.command import get_config_path_from_options
+from compose.cli.command import get_parallel_limit
 from compose.cli.command import get_tls_version
+from compose.cli.errors import UserError
 from compose.config.environment import Environment
 from compose.const import IS_WINDOWS_PLATFORM
 from tests import mock
@@ -66,3 +69,72 @@ class TestGetTlsVersion(object):
             tls_version = get_tls_version(environment)
         mock_log.warn.assert_called_once_with(mock.ANY)
         assert tls_version is None
+
+
+class TestGetParallelLimit(object):
+
+    def test_default(self):
+        assert get_parallel_limit({}) == 64
+
+    def test_from_env(self):
+        assert get_parallel_limit({'COMPOSE_PARALLEL_LIMIT': '8'}) == 8
+
+    @pytest.mark.parametrize('value', ['lots', '0', '-1'])
+    def test_invalid(self, value):
+        with pytest.raises(UserError):
+            get_parallel_limit({'COMPOSE_PARALLEL_LIMIT': value})
+
+
+class TestGetClient(object):
+
+    def test_client_created_on_first_use(self):
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client:
+            client = get_client(Environment())
+            assert not docker_client.called
+
+            assert client.info() is docker_client.return_value.info.return_value
+            client.containers()
+        docker_client.assert_called_once_with(
+            version=None, tls_config=None, host=None, environment=Environment(), tls_version=None,
+            parallel_limit=64)
+
+    def test_verbose_client_gets_version_on_first_use(self):
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client:
+            docker_client.return_value.version.return_value = {'Version': '1.12.0'}
+            client = get_client(Environment(), verbose=True)
+            assert not docker_client.return_value.version.called
+
+            client.info()
+        docker_client.return_value.version.assert_called_once_with()
+        docker_client.return_value.info.assert_called_once_with()
+
+    def test_profiled_client_records_calls(self):
+        environment = Environment({'COMPOSE_PROFILE': '1'})
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client, \
+                mock.patch('compose.cli.command.call_profiles', {}), \
+                mock.patch('compose.cli.command.atexit') as mock_atexit:
+            client = get_client(environment)
+            client.info()
+            get_client(environment)
+
+        profile = mock_atexit.register.call_args[0][1]
+        mock_atexit.register.assert_called_once_with(mock.ANY, profile, None)
+        assert [call.name for call in profile.calls] == ['info']
+        docker_client.return_value.info.assert_called_once_with()
+
+    def test_client_with_parallel_limit(self):
+        environment = Environment({'COMPOSE_PARALLEL_LIMIT': '8'})
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client:
+            get_client(environment).info()
+        assert docker_client.call_args[1]['parallel_limit'] == 8
+
+    def test_invalid_parallel_limit_fails_before_first_use(self):
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client:
+            with pytest.raises(UserError):
+                get_client(Environment({'COMPOSE_PARALLEL_LIMIT': 'lots'}))
+        assert not docker_client.called
+
+    def test_client_not_profiled_by_default(self):
+        with mock.patch('compose.cli.docker_client.docker_client') as docker_client:
+            client = get_client(Environment({'COMPOSE_PROFILE': '0'}))
+            assert client.info() is docker_client.return_value.info.return_value
@@ -6,13 +6,23 @@ import platform
 
 import docker
 import pytest
+import requests
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ReadTimeout
+from requests.packages.urllib3.exceptions import ReadTimeoutError
 
 import compose
 from compose.cli import errors
+from compose.cli.docker_client import ConnectionPoolAdapter
 from compose.cli.docker_client import docker_client
+from compose.cli.docker_client import get_adapter_factory
+from compose.cli.docker_client import LazyClient
 from compose.cli.docker_client import tls_config_from_options
+from compose.const import PARALLEL_LIMIT
+from compose.parallel import parallel_execute
 from tests import mock
 from tests import unittest
+from tests.fake_daemon import FakeDaemon
 
 
 class DockerClientTestCase(unittest.TestCase):
@@ -36,8 +46,8 @@ class DockerClientTestCase(unittest.TestCase):
         with mock.patch('compose.cli.errors.log') as fake_log:
             with pytest.raises(errors.ConnectionError):
                 with errors.handle_connection_errors(client):
-                    raise errors.RequestsConnectionError(
-                        errors.ReadTimeoutError(None, None, None))
+                    raise RequestsConnectionError(
+                        ReadTimeoutError(None, None, None))
 
         assert fake_log.error.call_count == 1
         assert '123' in fake_log.error.call_args[0][0]
@@ -45,7 +55,7 @@ class DockerClientTestCase(unittest.TestCase):
         with mock.patch('compose.cli.errors.log') as fake_log:
             with pytest.raises(errors.ConnectionError):
                 with errors.handle_connection_errors(client):
-                    raise errors.ReadTimeout()
+                    raise ReadTimeout()
 
         assert fake_log.error.call_count == 1
         assert '123' in fake_log.error.call_args[0][0]
@@ -157,3 +167,108 @@ class TLSConfigTestCase(unittest.TestCase):
         assert result.cert == (self.client_cert, self.key)
         assert result.ca_cert == self.ca_cert
         assert result.verify is True
+
+
+class LazyClientTestCase(unittest.TestCase):
+
+    def test_creates_client_once(self):
+        create_client = mock.Mock()
+        client = LazyClient(create_client)
+        assert not create_client.called
+
+        assert client.base_url is create_client.return_value.base_url
+        client.ping()
+        create_client.assert_called_once_with()
+        create_client.return_value.ping.assert_called_once_with()
+
+    def test_close_does_not_create_client(self):
+        create_client = mock.Mock()
+        LazyClient(create_client).close()
+        assert not create_client.called
+
+    def test_close_closes_client(self):
+        create_client = mock.Mock()
+        client = LazyClient(create_client)
+        client.ping()
+        client.close()
+        create_client.return_value.close.assert_called_once_with()
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+
+    def test_short_calls_reuse_one_connection(self):
+        with FakeDaemon() as daemon:
+            client = docker_client({'DOCKER_HOST': daemon.base_url})
+            for number in range(20):
+                client.inspect_container('container{}'.format(number))
+
+        assert len(daemon.requests) == 20
+        assert daemon.connections == 1
+
+    def test_parallel_calls_share_the_pool(self):
+        def inspect(container_id):
+            for _ in range(3):
+                client.inspect_container(container_id)
+
+        with FakeDaemon() as daemon:
+            client = docker_client({'DOCKER_HOST': daemon.base_url})
+            parallel_execute(
+                ['container{}'.format(number) for number in range(PARALLEL_LIMIT * 2)],
+                inspect,
+                lambda container_id: container_id,
+                None)
+
+        assert len(daemon.requests) == PARALLEL_LIMIT * 2 * 3
+        assert daemon.connections <= PARALLEL_LIMIT
+
+    def test_pool_size_from_parallel_limit(self):
+        client = docker_client({'DOCKER_HOST': 'tcp://192.168.0.1:2375'}, parallel_limit=8)
+        assert client.adapters['http://'].adapter._pool_maxsize == 8
+
+    def test_streaming_call_gets_its_own_connection(self):
+        with FakeDaemon() as daemon:
+            client = docker_client({'DOCKER_HOST': daemon.base_url})
+            client.inspect_container('before')
+            assert len(list(client.pull('busybox', stream=True))) == 3
+            client.inspect_container('after')
+
+        assert daemon.requests == [
+            (1, 'GET', '/containers/before/json'),
+            (2, 'POST', '/images/create'),
+            (1, 'GET', '/containers/after/json'),
+        ]
+
+    def test_streaming_call_keeps_upgrade_headers(self):
+        create_adapter = mock.Mock()
+        adapter = ConnectionPoolAdapter(create_adapter, PARALLEL_LIMIT)
+        request = requests.Request(
+            'POST', 'http://localhost/containers/abc/attach',
+            headers={'Connection': 'Upgrade', 'Upgrade': 'tcp'}).prepare()
+
+        response = adapter.send(request, stream=True)
+
+        stream_adapter = create_adapter.return_value
+        assert response is stream_adapter.send.return_value
+        create_adapter.assert_called_with(pool_maxsize=1)
+        assert request.headers['Connection'] == 'Upgrade'
+        assert request.headers['Upgrade'] == 'tcp'
+        stream_adapter.close.assert_called_once_with()
+
+    def test_streaming_call_closes_its_connection(self):
+        create_adapter = mock.Mock()
+        adapter = ConnectionPoolAdapter(create_adapter, PARALLEL_LIMIT)
+        request = requests.Request('GET', 'http://localhost/events').prepare()
+        adapter.send(request, stream=True)
+        assert request.headers['Connection'] == 'close'
+
+    def test_ssl_adapter_factory_keeps_options(self):
+        adapter = docker.ssladapter.ssladapter.SSLAdapter(assert_hostname=False)
+        created = get_adapter_factory(adapter)(pool_maxsize=PARALLEL_LIMIT)
+        assert type(created) is type(adapter)
+        assert created.assert_hostname is False
+        assert created._pool_maxsize == PARALLEL_LIMIT
+
+    def test_tcp_client_adapters(self):
+        client = docker_client({'DOCKER_HOST': 'tcp://192.168.0.1:2375'})
+        for prefix in ('http://', 'https://'):
+            assert isinstance(client.adapters[prefix], ConnectionPoolAdapter)
@@ -1,19 +1,33 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import datetime
 import itertools
+import json
+from threading import Thread
 
 import pytest
 import requests
 import six
 from docker.errors import APIError
+from six.moves.queue import Empty
 from six.moves.queue import Queue
 
+from compose.cli.log_printer import build_line_matcher
 from compose.cli.log_printer import build_log_generator
 from compose.cli.log_printer import build_log_presenters
 from compose.cli.log_printer import build_no_log_generator
 from compose.cli.log_printer import consume_queue
+from compose.cli.log_printer import datetime_key
+from compose.cli.log_printer import LogFilter
+from compose.cli.log_printer import LogFormat
+from compose.cli.log_printer import LogQueue
+from compose.cli.log_printer import MergedLogPrinter
+from compose.cli.log_printer import OverflowPolicy
 from compose.cli.log_printer import QueueItem
+from compose.cli.log_printer import split_timestamp
+from compose.cli.log_printer import tail_container_logs
+from compose.cli.log_printer import timestamp_key
 from compose.cli.log_printer import wait_on_exit
 from compose.cli.log_printer import watch_events
 from compose.container import Container
@@ -47,6 +61,50 @@ class TestLogPresenter(object):
         assert '\033[' in actual
 
 
+class TestJsonLogPresenter(object):
+
+    @pytest.fixture
+    def container(self, mock_container):
+        mock_container.name = 'project_web_1'
+        mock_container.service = 'web'
+        mock_container.labels = {'com.docker.compose.container-number': '1'}
+        return mock_container
+
+    def test_present(self, container):
+        presenter = next(build_log_presenters(['web'], False, LogFormat.json))
+        actual = presenter.for_stream('stderr').present(
+            container, "2016-09-26T10:46:15.109264317Z this line\n")
+        assert actual.endswith('\n')
+        assert json.loads(actual) == {
+            'container': 'project_web_1',
+            'service': 'web',
+            'number': 1,
+            'stream': 'stderr',
+            'timestamp': '2016-09-26T10:46:15.109264317Z',
+            'message': 'this line',
+        }
+
+    def test_present_without_timestamp(self, container):
+        presenter = next(build_log_presenters(['web'], False, LogFormat.json))
+        actual = json.loads(presenter.present(container, "this line\r\n"))
+        assert split_timestamp(actual['timestamp'] + ' ')[0] == actual['timestamp']
+        assert actual['stream'] == 'unknown'
+        assert actual['message'] == 'this line'
+
+    def test_present_message(self, container):
+        presenter = next(build_log_presenters(['web'], False, LogFormat.json))
+        actual = json.loads(presenter.present_message(container, "web_1 exited\n"))
+        assert actual['message'] == 'web_1 exited'
+        assert '\033[' not in actual['message']
+
+
+def test_split_timestamp():
+    assert split_timestamp("2016-09-26T10:46:15Z foo") == ("2016-09-26T10:46:15Z", "foo")
+    assert split_timestamp("2016-09-26T10:46:15.1+02:00 foo") == (
+        "2016-09-26T10:46:15.1+02:00", "foo")
+    assert split_timestamp("2016-09-26 foo") == (None, "2016-09-26 foo")
+
+
 def test_wait_on_exit():
     exit_status = 3
     mock_container = mock.Mock(
@@ -118,6 +176,191 @@ class TestBuildLogGenerator(object):
         assert next(generator) == glyph
 
 
+def test_timestamp_key():
+    timestamps = [
+        '2016-09-26T10:46:15.1Z',
+        '2016-09-26T10:46:15.09Z',
+        '2016-09-26T12:46:15.05+02:00',
+        '2016-09-26T10:46:15Z',
+    ]
+    assert sorted(timestamps, key=timestamp_key) == [
+        '2016-09-26T10:46:15Z',
+        '2016-09-26T12:46:15.05+02:00',
+        '2016-09-26T10:46:15.09Z',
+        '2016-09-26T10:46:15.1Z',
+    ]
+    assert timestamp_key(None) < timestamp_key(timestamps[0])
+
+
+class TestBuildLineMatcher(object):
+
+    def test_nothing_to_match(self):
+        assert build_line_matcher() is None
+
+    def test_single_text(self):
+        matcher = build_line_matcher(['a.c'])
+        assert matcher('xa.cx')
+        assert not matcher('abc')
+
+    def test_texts_and_patterns(self):
+        matcher = build_line_matcher(['a.c', 'x|y'], [r'^\d+$', 'err(or)?'])
+        assert matcher('a.c')
+        assert matcher('x|y')
+        assert matcher('42')
+        assert matcher('an error')
+        assert not matcher('abc')
+        assert not matcher('x')
+
+
+class TestLogFilter(object):
+
+    lines = [
+        "2016-09-26T10:46:14.9Z one\n",
+        "2016-09-26T10:46:15.5Z two\n",
+        "2016-09-26T10:46:16.5Z three\n",
+    ]
+
+    def test_no_window(self):
+        log_filter = LogFilter()
+        assert log_filter(self.lines) is self.lines
+        assert not log_filter.needs_timestamps
+
+    def test_window(self):
+        log_filter = LogFilter(
+            since=datetime.datetime(2016, 9, 26, 10, 46, 15),
+            until=datetime.datetime(2016, 9, 26, 10, 46, 16))
+        assert list(log_filter(iter(self.lines))) == [self.lines[1]]
+        assert log_filter.api_since == 1474886775
+
+    def test_match(self):
+        log_filter = LogFilter(timestamps=False, matcher=build_line_matcher(['tw']))
+        assert list(log_filter(["one\n", "two\n"])) == ["two\n"]
+
+    def test_match_inverted(self):
+        log_filter = LogFilter(
+            timestamps=False,
+            matcher=build_line_matcher(['tw']),
+            invert=True)
+        assert list(log_filter(["one\n", "two\n"])) == ["one\n"]
+
+    def test_match_ignores_timestamps(self):
+        log_filter = LogFilter(matcher=build_line_matcher(['2016']))
+        assert list(log_filter(self.lines)) == []
+
+    def test_display(self):
+        assert LogFilter(timestamps=False).display(self.lines[0]) == "one\n"
+        assert LogFilter().display(self.lines[0]) == self.lines[0]
+
+
+class TestMergedLogPrinter(object):
+
+    def make_container(self, name, lines):
+        container = mock.Mock(
+            spec=Container,
+            name_without_project=name,
+            log_stream=None,
+            has_api_logs=True)
+        container.logs.return_value = iter(line.encode('utf-8') for line in lines)
+        return container
+
+    def test_merges_in_chronological_order(self, output_stream):
+        containers = [
+            self.make_container('web_1', [
+                "2016-09-26T10:46:15.1Z a\n",
+                "2016-09-26T10:46:15.3Z c\n",
+            ]),
+            self.make_container('db_1', [
+                "2016-09-26T10:46:15.2Z b\n",
+                "2016-09-26T10:46:15.4Z d\n",
+            ]),
+        ]
+        printer = MergedLogPrinter(
+            containers,
+            build_log_presenters(['web', 'db'], True),
+            output=output_stream,
+            buffer_size=1,
+            log_filter=LogFilter(timestamps=False))
+        printer.run()
+
+        assert output_stream.getvalue() == (
+            "web_1  | a\n"
+            "db_1   | b\n"
+            "web_1  | c\n"
+            "db_1   | d\n"
+        )
+        for container in containers:
+            assert container.logs.call_args[1]['timestamps']
+            assert not container.logs.call_args[1]['follow']
+
+    def test_raises_errors(self, output_stream):
+        container = self.make_container('web_1', [])
+        container.logs.side_effect = ValueError('oops')
+        printer = MergedLogPrinter(
+            [container],
+            build_log_presenters(['web'], True),
+            output=output_stream)
+        with pytest.raises(ValueError):
+            printer.run()
+
+
+class TestTailContainerLogs(object):
+
+    def test_split_streams(self, mock_container):
+        mock_container.name = 'project_web_1'
+        mock_container.service = 'web'
+        mock_container.labels = {}
+        mock_container.log_stream = None
+        mock_container.has_api_logs = True
+        mock_container.logs.side_effect = lambda stdout, stderr, **kwargs: iter(
+            [b"out\n"] if stdout else [b"err\n"])
+
+        queue = LogQueue()
+        presenter = next(build_log_presenters(['web'], False, LogFormat.json))
+        tail_container_logs(mock_container, presenter, queue, {'timestamps': True})
+
+        lines = [json.loads(queue.get().item) for _ in range(2)]
+        assert sorted((line['stream'], line['message']) for line in lines) == [
+            ('stderr', 'err'),
+            ('stdout', 'out'),
+        ]
+        assert queue.get().is_stop
+        assert mock_container.logs.call_count == 2
+
+    def test_attached_stream(self, mock_container):
+        mock_container.name = 'project_web_1'
+        mock_container.service = 'web'
+        mock_container.labels = {}
+        mock_container.log_stream = iter([b"out\n", b"err\n"])
+        mock_container.has_api_logs = True
+
+        queue = LogQueue()
+        presenter = next(build_log_presenters(['web'], False, LogFormat.json))
+        tail_container_logs(mock_container, presenter, queue, {})
+
+        lines = [json.loads(queue.get().item) for _ in range(2)]
+        assert [(line['stream'], line['message']) for line in lines] == [
+            ('unknown', 'out'),
+            ('unknown', 'err'),
+        ]
+        for line in lines:
+            assert timestamp_key(line['timestamp']) <= datetime_key(datetime.datetime.utcnow())
+        assert queue.get().is_stop
+        assert not mock_container.logs.called
+
+    def test_text_format_does_not_split_streams(self, mock_container):
+        mock_container.log_stream = None
+        mock_container.has_api_logs = True
+        mock_container.logs.return_value = iter([b"out\n"])
+
+        queue = LogQueue()
+        presenter = next(build_log_presenters(['web'], True))
+        tail_container_logs(mock_container, presenter, queue, {})
+
+        assert queue.get().item == "web_1  | out\n"
+        assert queue.get().is_stop
+        mock_container.logs.assert_called_once_with(stdout=True, stderr=True, stream=True)
+
+
 @pytest.fixture
 def thread_map():
     return {'cid': mock.Mock()}
@@ -197,3 +440,69 @@ class TestConsumeQueue(object):
         queue = Queue()
         generator = consume_queue(queue, False)
         assert next(generator) is None
+
+
+class TestLogQueue(object):
+
+    def test_sources_are_read_in_turn(self):
+        queue = LogQueue()
+        for line in 'a1', 'a2', 'a3':
+            queue.put(QueueItem.new(line), 'a')
+        queue.put(QueueItem.new('b1'), 'b')
+
+        lines = [queue.get(timeout=0).item for _ in range(4)]
+        assert lines == ['a1', 'b1', 'a2', 'a3']
+
+    def test_get_raises_empty_on_timeout(self):
+        queue = LogQueue()
+        with pytest.raises(Empty):
+            queue.get(timeout=0)
+
+    def test_drop_oldest(self):
+        queue = LogQueue(buffer_size=2, overflow=OverflowPolicy.drop_oldest)
+        for line in 'a1', 'a2', 'a3':
+            queue.put(QueueItem.new(line), 'a')
+        queue.put(QueueItem.stop(), 'a')
+
+        assert queue.get(timeout=0).item == 'a2'
+        assert queue.get(timeout=0).item == 'a3'
+        assert queue.get(timeout=0).is_stop
+        assert queue.dropped == {'a': 1}
+
+    def test_summarize(self):
+        queue = LogQueue(buffer_size=1, overflow=OverflowPolicy.summarize)
+        for line in 'a1', 'a2', 'a3':
+            queue.put(QueueItem.new(line), 'a')
+
+        assert queue.get(timeout=0).item == 'a1'
+        queue.put(QueueItem.stop(), 'a')
+        assert queue.get(timeout=0).item == (
+            "WARNING: 2 log lines from a were dropped\n")
+        assert queue.get(timeout=0).is_stop
+        assert queue.dropped == {'a': 2}
+
+    def test_block_waits_for_room(self):
+        queue = LogQueue(buffer_size=1, overflow=OverflowPolicy.block)
+        queue.put(QueueItem.new('a1'), 'a')
+
+        producer = Thread(target=queue.put, args=(QueueItem.new('a2'), 'a'))
+        producer.daemon = True
+        producer.start()
+        producer.join(0.1)
+        assert producer.is_alive()
+
+        assert queue.get(timeout=1).item == 'a1'
+        producer.join(1)
+        assert not producer.is_alive()
+        assert queue.get(timeout=1).item == 'a2'
+        assert queue.delayed == {'a': 1}
+        assert queue.dropped == {}
+
+    def test_stop_and_exception_items_are_never_dropped(self):
+        queue = LogQueue(buffer_size=1, overflow=OverflowPolicy.drop_oldest)
+        error = Exception('oops')
+        queue.put(QueueItem.new('a1'), 'a')
+        queue.put(QueueItem.exception(error), 'a')
+
+        assert queue.get(timeout=0).item == 'a1'
+        assert queue.get(timeout=0).exc is error
@@ -1,16 +1,39 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import json
 import logging
+import os
+import subprocess
+import sys
+from inspect import getdoc
 
 import pytest
+from docopt import docopt
+from docopt import DocoptExit
 
 from compose import container
+from compose import tracing
 from compose.cli.errors import UserError
 from compose.cli.formatter import ConsoleWarningFormatter
+from compose.cli.log_printer import LogFormat
+from compose.cli.log_printer import OverflowPolicy
 from compose.cli.main import convergence_strategy_from_opts
 from compose.cli.main import filter_containers_to_service_names
+from compose.cli.main import get_targeted_service_names
+from compose.cli.main import group_by_service
+from compose.cli.main import log_buffer_options_from_env
+from compose.cli.main import log_command_error
+from compose.cli.main import log_filter_from_opts
+from compose.cli.main import ps_fields_from_opts
+from compose.cli.main import ps_format_from_opts
+from compose.cli.main import report_timings
 from compose.cli.main import setup_console_handler
+from compose.cli.main import TopLevelCommand
+from compose.cli.main import trace_command
+from compose.config import ConfigurationError
+from compose.parallel import parallel_execute
+from compose.service import BuildError
 from compose.service import ConvergenceStrategy
 from tests import mock
 
@@ -102,3 +125,203 @@ class TestConvergeStrategyFromOptsTestCase(object):
             convergence_strategy_from_opts(options) ==
             ConvergenceStrategy.changed
         )
+
+
+class TestLogBufferOptionsFromEnv(object):
+
+    def test_defaults(self):
+        assert log_buffer_options_from_env({}) == (1000, OverflowPolicy.block)
+
+    def test_from_env(self):
+        environment = {
+            'COMPOSE_LOG_BUFFER_SIZE': '50',
+            'COMPOSE_LOG_OVERFLOW': 'drop-oldest',
+        }
+        assert log_buffer_options_from_env(environment) == (
+            50, OverflowPolicy.drop_oldest)
+
+    def test_invalid_buffer_size(self):
+        with pytest.raises(UserError):
+            log_buffer_options_from_env({'COMPOSE_LOG_BUFFER_SIZE': 'lots'})
+
+    def test_invalid_overflow_policy(self):
+        with pytest.raises(UserError):
+            log_buffer_options_from_env({'COMPOSE_LOG_OVERFLOW': 'explode'})
+
+
+class TestLogFilterFromOpts(object):
+
+    def test_defaults(self):
+        log_filter = log_filter_from_opts({'--since': None, '--until': None}, LogFormat.text)
+        assert not log_filter.needs_timestamps
+        assert not log_filter.timestamps
+
+    def test_window(self):
+        log_filter = log_filter_from_opts(
+            {'--since': '1474886775', '--until': '2016-09-26T11:00:00Z'},
+            LogFormat.json)
+        assert log_filter.api_since == 1474886775
+        assert log_filter.needs_timestamps
+        assert log_filter.timestamps
+
+    def test_invalid_time(self):
+        with pytest.raises(UserError):
+            log_filter_from_opts({'--since': 'yesterday'}, LogFormat.text)
+
+    def test_invalid_regex(self):
+        with pytest.raises(UserError):
+            log_filter_from_opts({'--regex': ['(']}, LogFormat.text)
+
+
+class TestPsOpts(object):
+
+    def test_format(self):
+        assert ps_format_from_opts({'--format': None}) == 'table'
+        assert ps_format_from_opts({'--format': 'json'}) == 'json'
+        with pytest.raises(UserError):
+            ps_format_from_opts({'--format': 'xml'})
+
+    def test_fields(self):
+        assert ps_fields_from_opts({'--fields': None}) == container.SUMMARY_FIELDS
+        assert ps_fields_from_opts({'--fields': 'name, state'}) == ['name', 'state']
+        with pytest.raises(UserError):
+            ps_fields_from_opts({'--fields': 'name,size'})
+        with pytest.raises(UserError):
+            ps_fields_from_opts({'--fields': ','})
+
+    def test_group_by_service(self):
+        summaries = [
+            {'name': 'p_db_1', 'service': 'db'},
+            {'name': 'p_web_1', 'service': 'web'},
+        ]
+        groups = group_by_service(summaries, ['web', 'db', 'idle'], ['name'])
+        assert json.dumps(groups) == (
+            '{"web": [{"name": "p_web_1"}], "db": [{"name": "p_db_1"}], "idle": []}')
+
+
+class TestPsJson(object):
+
+    def ps(self, **options):
+        project = mock.Mock(service_names=['web', 'db'])
+        project.container_summaries.return_value = [
+            {'name': 'p_web_1', 'service': 'web', 'state': 'running'},
+        ]
+        command = TopLevelCommand(project)
+        command.ps(dict({
+            'SERVICE': [],
+            '-q': False,
+            '--format': 'json',
+            '--fields': 'name,state',
+            '--services': False,
+        }, **options))
+        assert not project.containers.called
+        return project
+
+    def test_list(self, capsys):
+        project = self.ps()
+        project.container_summaries.assert_called_once_with(service_names=[])
+        assert json.loads(capsys.readouterr()[0]) == [{'name': 'p_web_1', 'state': 'running'}]
+
+    def test_services(self, capsys):
+        self.ps(**{'--services': True})
+        assert json.loads(capsys.readouterr()[0]) == {
+            'web': [{'name': 'p_web_1', 'state': 'running'}],
+            'db': [],
+        }
+
+
+class TestGetTargetedServiceNames(object):
+
+    def test_targeted_commands(self):
+        assert get_targeted_service_names('logs', {'SERVICE': ['web', 'db']}) == ['web', 'db']
+        assert get_targeted_service_names('exec', {'SERVICE': 'web'}) == ['web']
+        assert get_targeted_service_names('port', {'SERVICE': 'web'}) == ['web']
+
+    def test_targeted_command_without_services(self):
+        assert get_targeted_service_names('logs', {'SERVICE': []}) is None
+        assert get_targeted_service_names('ps', {'SERVICE': []}) is None
+
+    def test_other_commands(self):
+        assert get_targeted_service_names('up', {'SERVICE': ['web']}) is None
+        assert get_targeted_service_names('run', {'SERVICE': 'web'}) is None
+
+
+class TestLogCommandError(object):
+
+    def test_expected_errors(self):
+        with mock.patch('compose.cli.main.log', autospec=True) as mock_log:
+            assert log_command_error(UserError('Bad option'))
+            assert log_command_error(ConfigurationError('Bad file'))
+            assert log_command_error(BuildError(mock.Mock(), 'no space left'))
+        assert mock_log.error.call_count == 3
+
+    def test_unexpected_error(self):
+        assert not log_command_error(ValueError('oops'))
+
+
+class TestReportTimings(object):
+
+    def test_report(self, capsys):
+        with mock.patch('compose.cli.formatter.get_tty_width', return_value=0):
+            with report_timings(True):
+                parallel_execute(['db', 'web'], lambda obj: obj, lambda obj: obj, None,
+                                 lambda obj: ['db'] if obj == 'web' else [])
+        err = capsys.readouterr().err
+        assert 'Processing 2 objects took' in err
+        assert [line.split()[0] for line in err.splitlines()[3:5]] == ['db', 'web']
+        assert 'Waited for a parallel slot' in err
+
+    def test_disabled(self, capsys):
+        with report_timings(False):
+            parallel_execute(['db'], lambda obj: obj, lambda obj: obj, None)
+        assert capsys.readouterr().err == ''
+
+
+class TestTraceCommand(object):
+
+    def test_not_traced_by_default(self):
+        with mock.patch.dict(os.environ, clear=True):
+            with trace_command('up'):
+                assert tracing.tracer is None
+
+    def test_trace_file(self, tmpdir):
+        filename = str(tmpdir.join('trace.json'))
+        with mock.patch.dict(os.environ, {'COMPOSE_TRACE_FILE': filename}):
+            with trace_command('up'):
+                with tracing.span('load project'):
+                    pass
+        assert tracing.tracer is None
+
+        with open(filename) as fh:
+            events = json.load(fh)['traceEvents']
+        assert sorted(event['name'] for event in events) == ['load project', 'up']
+
+    def test_invalid_format(self, tmpdir):
+        environment = {
+            'COMPOSE_TRACE_FILE': str(tmpdir.join('trace.json')),
+            'COMPOSE_TRACE_FORMAT': 'xml',
+        }
+        with mock.patch.dict(os.environ, environment):
+            with pytest.raises(UserError):
+                with trace_command('up'):
+                    pass
+
+
+@pytest.mark.parametrize('command', [
+    name for name in dir(TopLevelCommand)
+    if not name.startswith('_') and getdoc(getattr(TopLevelCommand, name))
+])
+def test_command_usage_parses(command):
+    try:
+        docopt(getdoc(getattr(TopLevelCommand, command)), [], help=False)
+    except DocoptExit:
+        pass
+
+
+def test_import_main_does_not_import_docker():
+    modules = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, compose.cli.main; print(" ".join(sorted(sys.modules)))',
+    ]).decode('utf-8').split()
+    for name in ('docker', 'requests', 'yaml', 'compose.config', 'compose.project'):
+        assert name not in modules
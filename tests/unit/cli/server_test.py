@@ -0,0 +1,255 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import contextlib
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from six.moves.queue import Queue
+
+from compose.cli.server import can_forward
+from compose.cli.server import CommandServer
+from compose.cli.server import ProjectCache
+from compose.cli.server import read_messages
+from compose.cli.server import send_message
+from compose.cli.server import SnapshotClient
+from compose.const import LABEL_CONTAINER_NUMBER
+from compose.const import LABEL_ONE_OFF
+from compose.const import LABEL_PROJECT
+from compose.const import LABEL_SERVICE
+from tests import mock
+from tests import unittest
+from tests.fake_daemon import FakeDaemon
+
+
+def test_can_forward():
+    assert can_forward('ps', {})
+    assert can_forward('up', {'-d': True})
+    assert not can_forward('up', {'-d': False})
+    assert can_forward('rm', {'--force': True})
+    assert not can_forward('rm', {'--force': False})
+    assert not can_forward('run', {})
+    assert not can_forward('exec', {})
+    assert not can_forward('server', {})
+
+
+class SnapshotClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.events = Queue()
+        self.client = mock.Mock()
+        self.client.events.return_value = iter(self.events.get, None)
+        self.client.containers.side_effect = lambda **kwargs: [{'Id': 'abc'}]
+        self.client.inspect_container.return_value = {'Id': 'abc', 'State': {}}
+        self.snapshot = SnapshotClient(self.client, 'project')
+
+    def tearDown(self):
+        self.events.put(None)
+
+    def test_caches_containers(self):
+        assert self.snapshot.containers(all=True) == [{'Id': 'abc'}]
+        assert self.snapshot.containers(all=True) == [{'Id': 'abc'}]
+        assert self.client.containers.call_count == 1
+        self.client.events.assert_called_once_with(
+            decode=True, filters={'label': 'com.docker.compose.project=project'})
+
+    def test_cached_results_are_copies(self):
+        self.snapshot.containers(all=True)[0]['Id'] = 'changed'
+        assert self.snapshot.containers(all=True) == [{'Id': 'abc'}]
+
+    def test_changing_call_invalidates(self):
+        self.snapshot.containers(all=True)
+        self.snapshot.stop('abc')
+        self.snapshot.containers(all=True)
+        self.client.stop.assert_called_once_with('abc')
+        assert self.client.containers.call_count == 2
+
+    def test_event_invalidates(self):
+        self.snapshot.containers(all=True)
+        self.snapshot.inspect_container('abc')
+
+        invalidated = threading.Event()
+        with mock.patch.object(
+                self.snapshot, 'invalidate', side_effect=invalidated.set, autospec=True):
+            self.events.put({'status': 'die', 'id': 'abc'})
+            assert invalidated.wait(5)
+        self.snapshot.invalidate()
+
+        self.snapshot.containers(all=True)
+        assert self.client.containers.call_count == 2
+
+    def test_no_cache_without_events(self):
+        self.client.events.side_effect = IOError('unreachable')
+        self.snapshot.containers(all=True)
+        self.snapshot.containers(all=True)
+        assert self.client.containers.call_count == 2
+
+    def test_close(self):
+        self.snapshot.containers(all=True)
+        self.snapshot.close()
+        assert self.snapshot.closed
+        self.client.close.assert_called_once_with()
+        self.snapshot.containers(all=True)
+        assert self.client.containers.call_count == 2
+
+    def test_attributes(self):
+        self.client.base_url = 'http+docker://localunixsocket'
+        assert self.snapshot.base_url == 'http+docker://localunixsocket'
+
+
+class ProjectCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write_config('web', '${IMAGE}')
+        self.cache = ProjectCache(size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_config(self, name, image, filename='docker-compose.yml'):
+        with open(os.path.join(self.directory, filename), 'w') as fh:
+            fh.write("version: '2'\nservices:\n  {}:\n    image: {}\n".format(name, image))
+
+    def get_project(self, options=None, **environment):
+        environment.setdefault('IMAGE', 'busybox')
+        with mock.patch.dict(os.environ, environment, clear=True):
+            return self.cache.get_project(self.directory, options or {})
+
+    def test_unchanged_project_is_not_loaded_again(self):
+        project = self.get_project(UNUSED='one')
+        with mock.patch('compose.config.config.load') as mock_load:
+            assert self.get_project(UNUSED='two') is project
+        assert not mock_load.called
+
+    def test_changed_variable_loads_project_again(self):
+        project = self.get_project()
+        project.client.close = mock.Mock()
+        new_project = self.get_project(IMAGE='redis')
+        assert new_project is not project
+        assert new_project.get_service('web').options['image'] == 'redis'
+        project.client.close.assert_called_once_with()
+
+    def test_variable_of_the_client_loads_project_again(self):
+        project = self.get_project()
+        assert self.get_project(COMPOSE_PARALLEL_LIMIT='8') is not project
+
+    def test_changed_file_loads_project_again(self):
+        project = self.get_project()
+        self.write_config('db', 'redis')
+        assert self.get_project().service_names == ['db']
+        assert self.get_project() is not project
+
+    def test_added_override_file_loads_project_again(self):
+        project = self.get_project()
+        self.write_config('db', 'redis', filename='docker-compose.override.yml')
+        assert sorted(self.get_project().service_names) == ['db', 'web']
+        assert self.get_project() is not project
+
+    def test_least_recently_used_project_is_closed(self):
+        projects = [self.get_project({'--project-name': str(n)}) for n in range(2)]
+        for project in projects:
+            project.client.close = mock.Mock()
+        assert self.get_project({'--project-name': '0'}) is projects[0]
+        self.get_project({'--project-name': '2'})
+
+        assert len(self.cache.projects) == 2
+        projects[1].client.close.assert_called_once_with()
+        assert not projects[0].client.close.called
+
+
+def build_container(project, number):
+    return {
+        'Id': 'container{}'.format(number),
+        'Name': '/{}_web_{}'.format(project, number),
+        'Config': {
+            'Image': 'busybox',
+            'Cmd': ['top'],
+            'Entrypoint': None,
+            'Labels': {
+                LABEL_PROJECT: project,
+                LABEL_SERVICE: 'web',
+                LABEL_ONE_OFF: 'False',
+                LABEL_CONTAINER_NUMBER: str(number),
+            },
+        },
+        'State': {'Running': True, 'Paused': False, 'Restarting': False, 'ExitCode': 0},
+        'NetworkSettings': {'Ports': {}},
+    }
+
+
+class CommandServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 'docker-compose.yml'), 'w') as fh:
+            fh.write("version: '2'\nservices:\n  web:\n    image: busybox\n")
+        self.socket_path = os.path.join(self.directory, 'compose.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @contextlib.contextmanager
+    def server(self):
+        server = CommandServer(self.socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def run_command(self, daemon, *argv):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        with contextlib.closing(sock):
+            send_message(sock.makefile('wb'), 'command', {
+                'argv': list(argv),
+                'cwd': self.directory,
+                'environment': {'DOCKER_HOST': daemon.base_url, 'COMPOSE_PROJECT_NAME': 'test'},
+                'tty': {'stdout': False, 'stderr': False},
+            })
+            messages = list(read_messages(sock.makefile('rb')))
+
+        output = dict(
+            (kind, ''.join(data for k, data in messages if k == kind))
+            for kind in ('stdout', 'stderr'))
+        return messages[-1], output
+
+    def test_ps_uses_the_warm_project_and_snapshot(self):
+        with FakeDaemon([build_container('test', 1)]) as daemon, self.server() as server:
+            exit_message, output = self.run_command(daemon, 'ps')
+            assert exit_message == ('exit', 0)
+            assert 'test_web_1' in output['stdout']
+            requests = len(daemon.requests)
+
+            exit_message, output = self.run_command(daemon, 'ps')
+            assert exit_message == ('exit', 0)
+            assert 'test_web_1' in output['stdout']
+            assert len(daemon.requests) == requests
+            assert len(server.projects.projects) == 1
+
+    def test_command_error(self):
+        with FakeDaemon() as daemon, self.server():
+            exit_message, output = self.run_command(daemon, 'ps', 'nosuchservice')
+        assert exit_message == ('exit', 1)
+
+    def test_configuration_change_loads_project_again(self):
+        with FakeDaemon() as daemon, self.server() as server:
+            self.run_command(daemon, 'ps')
+            project = list(server.projects.projects.values())[0].project
+
+            with open(os.path.join(self.directory, 'docker-compose.yml'), 'w') as fh:
+                fh.write("version: '2'\nservices:\n  db:\n    image: redis\n")
+            exit_message, output = self.run_command(daemon, 'config', '--services')
+            assert output['stdout'] == 'db\n'
+
+            self.run_command(daemon, 'ps')
+            new_project = list(server.projects.projects.values())[0].project
+        assert new_project is not project
+        assert new_project.service_names == ['db']
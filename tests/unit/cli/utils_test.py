@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import datetime
 import unittest
 
+import pytest
+
+from compose.cli.utils import parse_log_time
 from compose.cli.utils import unquote_path
 
 
@@ -21,3 +25,23 @@ class UnquotePathTest(unittest.TestCase):
         assert unquote_path('""hello""') == '"hello"'
         assert unquote_path('"hel"lo"') == 'hel"lo'
         assert unquote_path('"hello""') == 'hello"'
+
+
+class ParseLogTimeTest(unittest.TestCase):
+    def test_unix_timestamp(self):
+        assert parse_log_time('1474886775') == datetime.datetime(2016, 9, 26, 10, 46, 15)
+
+    def test_duration(self):
+        now = datetime.datetime(2016, 9, 26, 10, 46, 15)
+        assert parse_log_time('1h30m', now) == datetime.datetime(2016, 9, 26, 9, 16, 15)
+        assert parse_log_time('1.5s', now) == datetime.datetime(2016, 9, 26, 10, 46, 13, 500000)
+
+    def test_rfc3339(self):
+        assert parse_log_time('2016-09-26T10:46:15.25Z') == datetime.datetime(
+            2016, 9, 26, 10, 46, 15, 250000)
+        assert parse_log_time('2016-09-26T12:46+02:00') == datetime.datetime(
+            2016, 9, 26, 10, 46)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_log_time('yesterday')
@@ -1,9 +1,16 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
 import six
 
 from compose.cli import verbose_proxy
+from tests import mock
 from tests import unittest
 
 
@@ -31,3 +38,75 @@ class VerboseProxyTestCase(unittest.TestCase):
     def test_format_return_no_result(self):
         actual = verbose_proxy.format_return(None, 2)
         self.assertEqual(None, actual)
+
+
+class ProfilingProxyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = verbose_proxy.CallProfile()
+        self.client = mock.Mock()
+        self.proxy = verbose_proxy.ProfilingProxy(self.client, self.profile)
+
+    def test_records_calls(self):
+        assert self.proxy.containers(all=True) is self.client.containers.return_value
+        self.proxy.containers()
+        self.proxy.info()
+
+        summary = dict((item['call'], item) for item in self.profile.summary())
+        assert summary['containers']['count'] == 2
+        assert summary['info']['count'] == 1
+        assert summary['info']['concurrency'] == 1
+        self.client.containers.assert_called_with()
+
+    def test_records_streams(self):
+        self.client.pull.return_value = (chunk for chunk in [b'abc', 'de', {'a': 1}])
+        stream = self.proxy.pull('busybox', stream=True)
+        assert self.profile.running == 1
+        assert list(stream) == [b'abc', 'de', {'a': 1}]
+
+        [call] = self.profile.calls
+        assert call.streamed == 3 + 2 + len('{"a": 1}')
+        assert call.end >= call.returned
+        assert self.profile.running == 0
+
+    def test_records_failed_calls(self):
+        self.client.start.side_effect = ValueError('boom')
+        with pytest.raises(ValueError):
+            self.proxy.start('abc')
+        assert self.profile.summary()[0]['failed'] == 1
+        assert self.profile.running == 0
+
+    def test_attributes(self):
+        self.client.base_url = 'http+docker://localunixsocket'
+        assert self.proxy.base_url == 'http+docker://localunixsocket'
+
+    def test_write(self):
+        self.proxy.info()
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'profile.json')
+            self.profile.write(filename)
+            with open(filename) as fh:
+                trace = json.load(fh)
+        finally:
+            shutil.rmtree(directory)
+
+        [event] = trace['traceEvents']
+        assert event['name'] == 'info'
+        assert event['ph'] == 'X'
+        assert trace['calls'][0]['call'] == 'info'
+
+    def test_format_summary(self):
+        self.proxy.info()
+        with mock.patch('compose.cli.formatter.get_tty_width', return_value=0):
+            lines = self.profile.format_summary().splitlines()
+        assert lines[0].split()[:2] == ['Call', 'Count']
+        assert lines[2].split()[:3] == ['info', '1', '0']
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert verbose_proxy.percentile(values, 0.5) == 50
+    assert verbose_proxy.percentile(values, 0.99) == 99
+    assert verbose_proxy.percentile([7], 0.95) == 7
+    assert verbose_proxy.percentile([7], 0) == 7
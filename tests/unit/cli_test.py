@@ -4,7 +4,10 @@ from __future__ import unicode_literals
 
 import os
 import shutil
+import subprocess
+import sys
 import tempfile
+import threading
 from io import StringIO
 
 import docker
@@ -93,6 +96,26 @@ class CLITestCase(unittest.TestCase):
         with pytest.raises(NoSuchCommand):
             TopLevelCommand.help({'COMMAND': 'nonexistent'})
 
+    def test_entrypoint_with_config_workers(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        environment = dict(os.environ, PYTHONPATH=root, COMPOSE_CONFIG_WORKERS='2')
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(root, 'bin', 'docker-compose'), 'config', '--services'],
+            cwd=os.path.join(root, 'tests', 'fixtures', 'simple-composefile'),
+            env=environment,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        # The spawned workers used to run the command again, forever
+        timer = threading.Timer(60, process.kill)
+        timer.start()
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            timer.cancel()
+
+        assert process.returncode == 0, stderr
+        assert sorted(stdout.decode('utf-8').split()) == ['another', 'simple']
+
     @pytest.mark.xfail(IS_WINDOWS_PLATFORM, reason="requires dockerpty")
     @mock.patch('compose.cli.main.RunOperation', autospec=True)
     @mock.patch('compose.cli.main.PseudoTerminal', autospec=True)
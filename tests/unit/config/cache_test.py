@@ -0,0 +1,153 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from compose.config import config
+from compose.config.cache import ConfigCache
+from compose.config.cache import load_cached
+from compose.config.environment import Environment
+from compose.config.types import VolumeSpec
+from tests import mock
+from tests import unittest
+
+
+class ConfigCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(tempfile.mkdtemp(), 'cache')
+        self.addCleanup(shutil.rmtree, self.project_dir)
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.cache_dir))
+
+        self.write('docker-compose.yml', (
+            "version: '2'\n"
+            "services:\n"
+            "  web:\n"
+            "    extends:\n"
+            "      file: common.yml\n"
+            "      service: base\n"
+            "    image: ${IMAGE}\n"
+            "    volumes: ['/data']\n"
+        ))
+        self.write('common.yml', (
+            "version: '2'\n"
+            "services:\n"
+            "  base:\n"
+            "    env_file: web.env\n"
+        ))
+        self.write('web.env', "FOO=1\n")
+        self.cache = ConfigCache(self.cache_dir)
+
+    def write(self, filename, content):
+        with open(os.path.join(self.project_dir, filename), 'w') as fh:
+            fh.write(content)
+
+    def load(self, **environment):
+        environment = Environment(dict({'IMAGE': 'busybox'}, **environment))
+        with mock.patch('compose.config.cache.load', side_effect=config.load) as load:
+            working_dir, config_data = self.cache.load(self.project_dir, None, environment)
+        assert working_dir == self.project_dir
+        return config_data, load.called
+
+    def test_uses_cached_config(self):
+        first, loaded = self.load()
+        assert loaded
+        second, loaded = self.load()
+        assert not loaded
+        assert second == first
+        service, = second.services
+        assert service['image'] == 'busybox'
+        assert service['environment'] == {'FOO': '1'}
+        assert service['volumes'] == [VolumeSpec.parse('/data')]
+
+    def test_unrelated_variable_changed(self):
+        self.load()
+        assert not self.load(OTHER='1')[1]
+
+    def test_used_variable_changed(self):
+        self.load()
+        config_data, loaded = self.load(IMAGE='alpine')
+        assert loaded
+        assert config_data.services[0]['image'] == 'alpine'
+
+    def test_home_changed(self):
+        self.load(HOME='/home/one')
+        assert not self.load(HOME='/home/two')[1]
+
+        self.write('docker-compose.yml', (
+            "version: '2'\n"
+            "services:\n"
+            "  web:\n"
+            "    image: busybox\n"
+            "    volumes: ['~/data:/data']\n"
+        ))
+        with mock.patch.dict(os.environ, {'HOME': '/home/one'}):
+            assert self.load(HOME='/home/one')[1]
+            assert not self.load(HOME='/home/one')[1]
+        with mock.patch.dict(os.environ, {'HOME': '/home/two'}):
+            config_data, loaded = self.load(HOME='/home/two')
+        assert loaded
+        assert config_data.services[0]['volumes'] == [VolumeSpec.parse('/home/two/data:/data')]
+
+    def test_env_file_changed(self):
+        self.load()
+        self.write('web.env', "FOO=2\n")
+        config_data, loaded = self.load()
+        assert loaded
+        assert config_data.services[0]['environment'] == {'FOO': '2'}
+
+    def test_extended_file_changed(self):
+        self.load()
+        self.write('common.yml', (
+            "version: '2'\n"
+            "services:\n"
+            "  base:\n"
+            "    environment: {BAR: '1'}\n"
+        ))
+        config_data, loaded = self.load()
+        assert loaded
+        assert config_data.services[0]['environment'] == {'BAR': '1'}
+
+    def test_warns_about_missing_variables_again(self):
+        environment = Environment()
+        self.cache.load(self.project_dir, None, environment)
+        assert environment.missing_keys == ['IMAGE']
+
+        environment = Environment()
+        with mock.patch('compose.config.environment.log') as log:
+            self.cache.load(self.project_dir, None, environment)
+        assert environment.missing_keys == ['IMAGE']
+        assert log.warn.call_count == 1
+
+    def test_unreadable_entry_is_ignored(self):
+        self.load()
+        for filename in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, filename), 'w') as fh:
+                fh.write('garbage')
+        assert self.load()[1]
+
+
+class LoadCachedTest(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        environment = Environment()
+        details = mock.Mock(working_dir='/project')
+        with mock.patch('compose.config.cache.find', return_value=details) as find, \
+                mock.patch('compose.config.cache.load') as load, \
+                mock.patch('compose.config.cache.ConfigCache') as config_cache:
+            assert load_cached('.', None, environment) == ('/project', load.return_value)
+        find.assert_called_once_with('.', None, environment)
+        assert not config_cache.called
+
+    def test_enabled(self):
+        environment = Environment({
+            'COMPOSE_CONFIG_CACHE': '1',
+            'XDG_CACHE_HOME': '/cache',
+        })
+        with mock.patch('compose.config.cache.ConfigCache') as config_cache:
+            load_cached('.', None, environment)
+        config_cache.assert_called_once_with(os.path.join('/cache', 'docker-compose', 'config'))
+        config_cache.return_value.load.assert_called_once_with('.', None, environment)
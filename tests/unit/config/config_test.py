@@ -6,19 +6,25 @@ from __future__ import unicode_literals
 import os
 import shutil
 import tempfile
+from functools import reduce
 from operator import itemgetter
 
 import py
 import pytest
+import six
+import yaml
 
 from ...helpers import build_config_details
 from compose.config import config
+from compose.config import validation
+from compose.config.cache import RecordingEnvironment
 from compose.config.config import resolve_build_args
 from compose.config.config import resolve_environment
 from compose.config.config import V1
 from compose.config.config import V2_0
 from compose.config.config import V2_1
 from compose.config.environment import Environment
+from compose.config.errors import CircularReference
 from compose.config.errors import ConfigurationError
 from compose.config.errors import VERSION_EXPLANATION
 from compose.config.types import VolumeSpec
@@ -874,6 +880,69 @@ class ConfigTest(unittest.TestCase):
             'baz': None
         }
 
+    def test_load_with_multiple_files_logging_in_base(self):
+        base_file = config.ConfigFile(
+            'base.yaml',
+            {
+                'version': '2',
+                'services': {
+                    'web': {
+                        'image': 'example/web',
+                        'logging': {'driver': 'syslog', 'options': {'tag': 'web'}},
+                    },
+                },
+            })
+        override_file = config.ConfigFile(
+            'override.yaml',
+            {
+                'version': '2',
+                'services': {
+                    'web': {'command': 'run'},
+                },
+            })
+        details = config.ConfigDetails('.', [base_file, override_file])
+        service_dicts = config.load(details).services
+        assert service_dicts[0]['logging'] == {'driver': 'syslog', 'options': {'tag': 'web'}}
+
+    def test_merge_service_dicts_from_many_files(self):
+        service_dicts = [
+            {
+                'image': 'example/web',
+                'environment': ['A=1', 'B=1'],
+                'volumes': ['/base:/data', '/cache'],
+                'links': ['db'],
+                'dns': '8.8.8.8',
+                'extends': {'service': 'base'},
+            },
+            {
+                'environment': {'B': '2'},
+                'volumes': ['/override:/data'],
+                'links': ['db:database', 'cache'],
+                'ports': ['80'],
+            },
+            {
+                'build': {'context': '.', 'args': ['X=1']},
+                'environment': ['C=3'],
+                'dns': ['1.1.1.1'],
+                'ports': ['80', '443'],
+            },
+        ]
+        expected = reduce(
+            lambda base, override: config.merge_service_dicts_from_files(base, override, V2_0),
+            service_dicts)
+        merged = config.merge_all_service_dicts_from_files(service_dicts, V2_0)
+        assert merged == expected
+        assert merged == {
+            'image': 'example/web',
+            'build': {'context': '.', 'args': {'X': '1'}},
+            'environment': {'A': '1', 'B': '2', 'C': '3'},
+            'volumes': ['/cache', '/override:/data'],
+            'links': ['cache', 'db:database', 'db'],
+            'dns': ['8.8.8.8', '1.1.1.1'],
+            'ports': ['443', '80'],
+            'extends': {'service': 'base'},
+        }
+
     def test_load_with_multiple_files_v2(self):
         base_file = config.ConfigFile(
             'base.yaml',
@@ -1278,6 +1347,21 @@ class ConfigTest(unittest.TestCase):
 
         assert 'line 3, column 32' in exc.exconly()
 
+    def test_load_yaml_errors_match_python_loader(self):
+        tmpdir = tempfile.mkdtemp('invalid_yaml_test')
+        self.addCleanup(shutil.rmtree, tmpdir)
+        invalid_yaml_file = os.path.join(tmpdir, 'docker-compose.yml')
+        with open(invalid_yaml_file, 'w') as fh:
+            fh.write("web:\n  this is bogus: ok: what\n")
+
+        with pytest.raises(ConfigurationError) as exc:
+            config.load_yaml(invalid_yaml_file)
+
+        with open(invalid_yaml_file) as fh:
+            with pytest.raises(yaml.YAMLError) as python_exc:
+                yaml.load(fh, Loader=yaml.SafeLoader)
+        assert str(python_exc.value) in exc.value.msg
+
     def test_validate_extra_hosts_invalid(self):
         with pytest.raises(ConfigurationError) as exc:
             config.load(build_config_details({
@@ -1675,6 +1759,22 @@ class ConfigTest(unittest.TestCase):
         assert 'ext2' in volumes
         assert volumes['ext2']['external']['name'] == 'aliased'
 
+    def test_external_volume_config_loaded_twice(self):
+        config_details = build_config_details({
+            'version': '2',
+            'services': {
+                'bogus': {'image': 'busybox'}
+            },
+            'volumes': {
+                'ext': {'external': True},
+            }
+        })
+        first = config.load(config_details)
+        assert config.load(config_details).volumes == first.volumes
+        assert config_details.config_files[0].config['volumes'] == {
+            'ext': {'external': True},
+        }
+
     def test_external_volume_invalid_config(self):
         config_details = build_config_details({
             'version': '2',
@@ -1737,6 +1837,171 @@ class ConfigTest(unittest.TestCase):
         assert 'has neither an image nor a build context' in exc.exconly()
 
 
+class ValidationCacheTest(unittest.TestCase):
+
+    def test_validators_are_shared(self):
+        assert validation.get_config_validator(V2_0) is validation.get_config_validator(V2_0)
+        assert validation.get_config_validator(V1) is not validation.get_config_validator(V2_0)
+
+    def test_schema_is_loaded_once(self):
+        services = {
+            'web{}'.format(index): {'image': 'busybox', 'ports': ['80']}
+            for index in range(20)
+        }
+        details = build_config_details({'version': '2', 'services': services})
+        config.load(details)
+
+        with mock.patch('compose.config.validation.load_jsonschema') as load_jsonschema:
+            assert len(config.load(details).services) == 20
+        assert not load_jsonschema.called
+
+
+class TargetedLoadTest(unittest.TestCase):
+
+    services = {
+        'web': {
+            'image': 'example/web',
+            'links': ['api:backend'],
+            'volumes_from': ['data:ro'],
+            'networks': ['front'],
+        },
+        'api': {'extends': {'service': 'base'}, 'depends_on': ['db']},
+        'base': {'image': 'example/base'},
+        'db': {'image': 'postgres', 'network_mode': 'service:net'},
+        'net': {'image': 'busybox'},
+        'data': {'image': 'busybox'},
+        'worker': {'image': 'example/worker', 'links': ['db'], 'networks': ['back']},
+        'broken': {'image': 'busybox', 'ports': 'not a list'},
+    }
+
+    def build_details(self, services, *overrides):
+        contents = {
+            'version': '2',
+            'services': services,
+            'networks': {'front': {}, 'back': {}},
+        }
+        return config.ConfigDetails('.', [
+            config.ConfigFile(filename, content)
+            for filename, content in [('base.yml', contents)] + list(overrides)
+        ])
+
+    def test_load_service_and_dependencies(self):
+        details = self.build_details(self.services)
+        loaded = config.load(details, ['web'])
+
+        assert sorted(s['name'] for s in loaded.services) == [
+            'api', 'base', 'data', 'db', 'net', 'web']
+        assert list(loaded.networks) == ['front']
+
+        services = dict(self.services)
+        del services['broken']
+        full = dict((s['name'], s) for s in config.load(self.build_details(services)).services)
+        for service_dict in loaded.services:
+            assert service_dict == full[service_dict['name']]
+
+    def test_load_service_from_several_files(self):
+        details = self.build_details(
+            dict((name, self.services[name]) for name in ('worker', 'db', 'net')),
+            ('override.yml', {
+                'version': '2',
+                'services': {'db': {'links': ['cache']}, 'cache': {'image': 'redis'}},
+            }))
+        loaded = config.load(details, ['worker'])
+        assert sorted(s['name'] for s in loaded.services) == ['cache', 'db', 'net', 'worker']
+        assert list(loaded.networks) == ['back']
+
+    def test_load_service_extending_a_service_of_the_same_file(self):
+        services = {
+            'web': {'extends': {'file': 'base.yml', 'service': 'base'}},
+            'base': {'image': 'example/base'},
+            'other': {'extends': {'file': './base.yml', 'service': 'base'}},
+            'broken': {'image': 'busybox', 'ports': 'not a list'},
+        }
+        loaded = config.load(self.build_details(services), ['web'])
+        assert sorted(s['name'] for s in loaded.services) == ['base', 'web']
+        web = [s for s in loaded.services if s['name'] == 'web'][0]
+        assert web['image'] == 'example/base'
+
+    def test_load_unknown_service(self):
+        details = self.build_details(self.services)
+        assert config.load(details, ['unknown']).services == []
+
+    def test_load_service_with_interpolated_dependency(self):
+        services = {
+            'web': {'image': 'example/web', 'links': ['${BACKEND}']},
+            'api': {'image': 'example/api'},
+            'broken': {'image': 'busybox', 'ports': 'not a list'},
+        }
+        details = self.build_details(services)
+        with pytest.raises(ConfigurationError) as exc:
+            config.load(details, ['web'])
+        assert 'services.broken.ports' in exc.exconly()
+
+
+class ServiceWorkersTest(unittest.TestCase):
+
+    def build_details(self, services, **environment):
+        return config.ConfigDetails(
+            'working_dir',
+            [config.ConfigFile('filename.yml', {'version': '2', 'services': services})],
+            Environment(environment))
+
+    def test_load_with_workers(self):
+        services = {
+            'web{}'.format(index): {
+                'image': 'busybox',
+                'links': ['web{}'.format(index - 1)] if index else [],
+                'environment': ['SET', 'UNSET'],
+            }
+            for index in range(20)
+        }
+        expected = config.load(self.build_details(services, SET='value'))
+        details = self.build_details(services, SET='value', COMPOSE_CONFIG_WORKERS='4')
+
+        with mock.patch('compose.config.config.build_service_dicts_in_pool',
+                        wraps=config.build_service_dicts_in_pool) as in_pool:
+            assert config.load(details) == expected
+        assert in_pool.call_count == 1
+
+    def test_load_with_workers_merges_recorded_environment(self):
+        details = self.build_details({
+            'web': {'image': 'busybox', 'environment': ['SET', 'UNSET']},
+            'db': {'image': 'busybox', 'environment': ['OTHER']},
+        })
+        details = details._replace(environment=RecordingEnvironment({'SET': 'value'}))
+
+        config.load_services(details, details.config_files[0], workers=2)
+        assert set(details.environment.used_variables) >= set(['SET', 'UNSET', 'OTHER'])
+
+    invalid_services = {
+        'web': {'build': {'context': '.'}, 'image': 'busybox', 'extends': {'service': 'web'}},
+        'db': {'image': 'busybox', 'depends_on': ['missing']},
+        'cache': {'image': 'busybox'},
+    }
+
+    def test_load_with_workers_aggregates_errors(self):
+        details = self.build_details(self.invalid_services, COMPOSE_CONFIG_WORKERS='3')
+        with pytest.raises(CircularReference) as exc:
+            config.load(details)
+        messages = exc.value.msg.split('\n')
+        assert "Service 'db' depends on service 'missing' which is undefined." in messages
+        assert 'Circular reference:' in messages
+        assert messages[0].startswith('Circular reference:')
+        assert six.text_type(exc.value) == exc.value.msg
+
+    def test_load_without_workers_raises_the_first_error(self):
+        details = self.build_details(self.invalid_services, COMPOSE_CONFIG_WORKERS='1')
+        with pytest.raises(CircularReference) as exc:
+            config.load(details)
+        assert 'depends on' not in exc.value.msg
+
+    def test_load_with_invalid_workers(self):
+        details = self.build_details({'web': {'image': 'busybox'}}, COMPOSE_CONFIG_WORKERS='many')
+        with pytest.raises(ConfigurationError) as exc:
+            config.load(details)
+        assert 'COMPOSE_CONFIG_WORKERS' in exc.exconly()
+
+
 class NetworkModeTest(unittest.TestCase):
     def test_network_mode_standard(self):
         config_data = config.load(build_config_details({
@@ -2539,6 +2804,65 @@ def load_from_filename(filename):
 
 
 class ExtendsTest(unittest.TestCase):
+    def test_extended_file_is_read_once(self):
+        tmpdir = tempfile.mkdtemp('extends_read_once')
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with open(os.path.join(tmpdir, 'common.yml'), 'w') as fh:
+            fh.write("version: '2'\nservices:\n  base:\n    image: busybox\n")
+        with open(os.path.join(tmpdir, 'docker-compose.yml'), 'w') as fh:
+            fh.write("version: '2'\nservices:\n")
+            for index in range(5):
+                fh.write(
+                    "  web{}:\n"
+                    "    extends: {{file: common.yml, service: base}}\n"
+                    "  other{}:\n"
+                    "    extends: web{}\n".format(index, index, index))
+
+        with mock.patch('compose.config.config.load_yaml', side_effect=config.load_yaml) as load:
+            services = load_from_filename(os.path.join(tmpdir, 'docker-compose.yml'))
+
+        assert len(services) == 10
+        assert all(service['image'] == 'busybox' for service in services)
+        assert sorted(call[0][0] for call in load.call_args_list) == [
+            os.path.join(tmpdir, 'common.yml'),
+            os.path.join(tmpdir, 'docker-compose.yml'),
+        ]
+
+    def test_extended_file_and_service_are_processed_once(self):
+        tmpdir = tempfile.mkdtemp('extends_processed_once')
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with open(os.path.join(tmpdir, 'common.yml'), 'w') as fh:
+            fh.write(
+                "version: '2'\n"
+                "services:\n"
+                "  base:\n"
+                "    build: {context: ., args: {A: '1'}}\n"
+                "    logging: {driver: syslog, options: {tag: base}}\n")
+        with open(os.path.join(tmpdir, 'docker-compose.yml'), 'w') as fh:
+            fh.write("version: '2'\nservices:\n")
+            for index in range(20):
+                fh.write(
+                    "  web{0}:\n"
+                    "    extends: {{file: common.yml, service: base}}\n"
+                    "    build: {{args: {{B: '{0}'}}}}\n"
+                    "    logging: {{options: {{index: '{0}'}}}}\n".format(index))
+
+        with mock.patch(
+            'compose.config.config.process_config_file',
+            side_effect=config.process_config_file
+        ) as process_config_file:
+            services = load_from_filename(os.path.join(tmpdir, 'docker-compose.yml'))
+
+        assert process_config_file.call_count == 2
+        assert len(services) == 20
+        for service in services:
+            index = service['name'][3:]
+            assert service['build'] == {'context': tmpdir, 'args': {'A': '1', 'B': index}}
+            assert service['logging'] == {
+                'driver': 'syslog',
+                'options': {'tag': 'base', 'index': index},
+            }
+
     def test_extends(self):
         service_dicts = load_from_filename('tests/fixtures/extends/docker-compose.yml')
 
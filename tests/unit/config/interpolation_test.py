@@ -119,3 +119,50 @@ def test_interpolate_missing_with_default(defaults_interpolator):
 def test_interpolate_with_empty_and_default_value(defaults_interpolator):
     assert defaults_interpolator("ok ${BAR:-def}") == "ok def"
     assert defaults_interpolator("ok ${BAR-def}") == "ok "
+
+
+def test_interpolate_environment_variables_returns_unchanged_config(mock_env):
+    services = {
+        'servicea': {
+            'image': 'example',
+            'volumes': ['/data:/target'],
+            'logging': {'options': {'max-size': '1m'}},
+        },
+        'serviceb': {
+            'image': 'example:${USER}',
+            'volumes': ['/data:/target'],
+        },
+    }
+    value = interpolate_environment_variables("2.0", services, 'service', mock_env)
+    assert value['servicea'] is services['servicea']
+    assert value['serviceb'] is not services['serviceb']
+    assert value['serviceb']['volumes'] is services['serviceb']['volumes']
+    assert services['serviceb']['image'] == 'example:${USER}'
+
+    unchanged = {'servicea': services['servicea']}
+    assert interpolate_environment_variables(
+        "2.0", unchanged, 'service', mock_env) is unchanged
+
+
+def test_interpolate_environment_variables_reports_used_variables(mock_env):
+    services = {
+        'servicea': {
+            'image': 'example:${USER}',
+            'environment': ['A=$FOO', 'B=${MISSING:-default}', 'C=$$ESCAPED'],
+        },
+    }
+    used_variables = set()
+    interpolate_environment_variables(
+        "2.1", services, 'service', mock_env, used_variables=used_variables)
+    assert used_variables == set(['USER', 'FOO', 'MISSING'])
+
+
+def test_interpolator_substitutes_each_string_once():
+    mapping = Environment({'FOO': 'first'})
+    interpolator = Interpolator(TemplateWithDefaults, mapping)
+    assert interpolator.interpolate('$FOO') == 'first'
+
+    mapping['FOO'] = 'second'
+    assert interpolator.interpolate('$FOO') == 'first'
+    assert interpolator.interpolate('${FOO}') == 'second'
+    assert interpolator.used_variables == set(['FOO'])
@@ -0,0 +1,167 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import pytest
+
+from compose.config import config
+from compose.config.environment import Environment
+from compose.config.errors import ConfigurationError
+from compose.config.reload import ConfigReloader
+from tests import mock
+
+
+def build_config_details(services, volumes=None, **environment):
+    contents = {'version': '2', 'services': services}
+    if volumes:
+        contents['volumes'] = volumes
+    return config.ConfigDetails(
+        'working_dir',
+        [config.ConfigFile('filename.yml', contents)],
+        Environment(environment))
+
+
+def build_services():
+    return {
+        'web': {'image': 'example/web', 'links': ['api']},
+        'api': {'image': 'example/api', 'depends_on': ['db']},
+        'db': {'image': 'postgres', 'environment': ['PASSWORD']},
+        'cache': {'image': 'redis'},
+    }
+
+
+@pytest.fixture
+def reloader():
+    reloader = ConfigReloader()
+    reloader.load(build_config_details(build_services(), PASSWORD='secret'))
+    return reloader
+
+
+def load_counting_builds(reloader, config_details):
+    with mock.patch(
+        'compose.config.config.build_service',
+        wraps=config.build_service
+    ) as build_service:
+        changes = reloader.load(config_details)
+    return changes, sorted(call[0][3] for call in build_service.call_args_list)
+
+
+def test_first_load():
+    config_details = build_config_details(build_services(), PASSWORD='secret')
+    changes = ConfigReloader().load(config_details)
+    assert changes.config == config.load(config_details)
+    assert sorted(changes.added) == ['api', 'cache', 'db', 'web']
+    assert changes.changed == []
+    assert changes.removed == []
+
+
+def test_load_unchanged(reloader):
+    changes, built = load_counting_builds(
+        reloader, build_config_details(build_services(), PASSWORD='secret'))
+    assert built == []
+    assert changes == (changes.config, [], [], [])
+
+
+def test_load_changed_service(reloader):
+    services = build_services()
+    services['db']['image'] = 'postgres:9.6'
+    config_details = build_config_details(services, PASSWORD='secret')
+
+    changes, built = load_counting_builds(reloader, config_details)
+    assert built == ['db']
+    assert changes.config == config.load(config_details)
+    assert changes.added == []
+    assert changes.changed == ['db', 'api', 'web']
+    assert changes.removed == []
+
+
+def test_load_added_and_removed_services(reloader):
+    services = build_services()
+    del services['cache']
+    services['worker'] = {'image': 'example/worker', 'links': ['db']}
+    config_details = build_config_details(services, PASSWORD='secret')
+
+    changes, built = load_counting_builds(reloader, config_details)
+    assert built == ['worker']
+    assert changes.config == config.load(config_details)
+    assert changes.added == ['worker']
+    assert changes.changed == []
+    assert changes.removed == ['cache']
+
+
+def test_load_removed_dependency(reloader):
+    services = build_services()
+    del services['db']
+
+    with pytest.raises(ConfigurationError) as exc:
+        reloader.load(build_config_details(services, PASSWORD='secret'))
+    assert "depends on service 'db' which is undefined" in exc.exconly()
+
+    changes, built = load_counting_builds(
+        reloader, build_config_details(build_services(), PASSWORD='secret'))
+    assert built == []
+    assert changes.changed == []
+
+
+def test_load_added_service_named_like_a_container():
+    def build_v1_details(services):
+        return config.ConfigDetails(
+            'working_dir', [config.ConfigFile('filename.yml', services)], Environment())
+
+    def build_v1_services():
+        return {
+            'web': {'image': 'example/web', 'volumes_from': ['data'], 'net': 'container:data'},
+        }
+
+    reloader = ConfigReloader()
+    reloader.load(build_v1_details(build_v1_services()))
+
+    services = build_v1_services()
+    services['data'] = {'image': 'busybox'}
+    config_details = build_v1_details(services)
+    changes, built = load_counting_builds(reloader, config_details)
+    assert built == ['data', 'web']
+    assert changes.config == config.load(config_details)
+    assert changes.added == ['data']
+    assert changes.changed == ['web']
+    web = [service for service in changes.config.services if service['name'] == 'web'][0]
+    assert web['volumes_from'][0].type == 'service'
+    assert web['network_mode'] == 'service:data'
+
+
+def test_load_changed_environment(reloader):
+    config_details = build_config_details(build_services(), PASSWORD='other')
+
+    changes, built = load_counting_builds(reloader, config_details)
+    assert built == ['api', 'cache', 'db', 'web']
+    assert changes.config == config.load(config_details)
+    assert changes.changed == ['db', 'api', 'web']
+
+
+def test_load_changed_volumes(reloader):
+    config_details = build_config_details(
+        build_services(), volumes={'data': {}}, PASSWORD='secret')
+
+    changes, built = load_counting_builds(reloader, config_details)
+    assert built == []
+    assert sorted(changes.changed) == ['api', 'cache', 'db', 'web']
+
+
+def test_load_validates_changed_services(reloader):
+    services = build_services()
+    services['db']['image'] = 'postgres:9.6'
+    services['worker'] = {'image': 'example/worker'}
+    with mock.patch(
+        'compose.config.config.validate_against_config_schema',
+        wraps=config.validate_against_config_schema
+    ) as validate:
+        reloader.load(build_config_details(services, PASSWORD='secret'))
+    validated_file, = validate.call_args[0]
+    assert sorted(validated_file.get_service_dicts()) == ['db', 'worker']
+
+
+def test_load_invalid_changed_service(reloader):
+    services = build_services()
+    services['db']['image'] = ['postgres']
+    with pytest.raises(ConfigurationError) as exc:
+        reloader.load(build_config_details(services, PASSWORD='secret'))
+    assert "services.db.image contains an invalid type" in exc.exconly()
@@ -241,3 +241,24 @@ class TestSortService(object):
         with pytest.raises(DependencyError) as exc:
             sort_service_dicts(services)
         assert 'A service can not depend on itself: web' in exc.exconly()
+
+    def test_sort_service_dicts_long_chain(self):
+        services = [
+            {'name': 'service{}'.format(i), 'depends_on': ['service{}'.format(i + 1)]}
+            for i in range(2999)
+        ] + [{'name': 'service2999'}]
+
+        sorted_services = sort_service_dicts(services)
+        assert [s['name'] for s in sorted_services] == [
+            'service{}'.format(i) for i in reversed(range(3000))
+        ]
+
+    def test_sort_service_dicts_circular_in_long_chain(self):
+        services = [
+            {'name': 'service{}'.format(i), 'depends_on': ['service{}'.format(i + 1)]}
+            for i in range(2999)
+        ] + [{'name': 'service2999', 'depends_on': ['service0']}]
+
+        with pytest.raises(DependencyError) as exc:
+            sort_service_dicts(services)
+        assert 'Circular dependency between' in exc.exconly()
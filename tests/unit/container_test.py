@@ -6,7 +6,11 @@ import docker
 from .. import mock
 from .. import unittest
 from compose.container import Container
+from compose.container import container_summary
+from compose.container import ContainerCache
 from compose.container import get_container_name
+from compose.container import state_from_status
+from compose.container import trim_dictionary
 
 
 class ContainerTest(unittest.TestCase):
@@ -62,6 +66,35 @@ class ContainerTest(unittest.TestCase):
             "Name": "/composetest_db_1",
         })
 
+    def test_from_ps_trimmed_keeps_labels(self):
+        self.container_dict['Labels'] = {'com.docker.compose.service': 'db'}
+        container = Container.from_ps(None, self.container_dict, trimmed=True)
+        assert container.dictionary == {
+            "Id": self.container_id,
+            "Image": "busybox:latest",
+            "Name": "/composetest_db_1",
+            "Config": {"Labels": {'com.docker.compose.service': 'db'}},
+        }
+        assert container.service == 'db'
+        assert not container.has_been_inspected
+
+    def test_trimmed_inspect(self):
+        mock_client = mock.create_autospec(docker.Client)
+        mock_client.inspect_container.return_value = {
+            'Id': 'the_id',
+            'Driver': 'overlay2',
+            'Config': {'Cmd': ['top'], 'Hostname': 'the_id'},
+            'State': {'Running': True, 'Pid': 42},
+        }
+        container = Container(mock_client, dict(Id="the_id"), trimmed=True)
+
+        assert container.is_running
+        assert container.dictionary == {
+            'Id': 'the_id',
+            'Config': {'Cmd': ['top']},
+            'State': {'Running': True},
+        }
+
     def test_environment(self):
         container = Container(None, {
             'Id': 'abc',
@@ -178,6 +211,156 @@ class ContainerTest(unittest.TestCase):
         container = Container(None, container_dict, has_been_inspected=True)
         assert container.has_api_logs is False
 
+    def test_from_event_without_from(self):
+        container = Container.from_event(None, {
+            'status': 'die',
+            'id': self.container_id,
+            'Actor': {
+                'ID': self.container_id,
+                'Attributes': {
+                    'name': 'composetest_web_7',
+                    'image': 'busybox:latest',
+                    'com.docker.compose.project': 'composetest',
+                },
+            },
+        })
+        assert container.image == 'busybox:latest'
+
+    def test_update_from_event(self):
+        container = Container(None, {'Id': 'abc', 'Name': '/composetest_web_7'})
+        container.update_from_event({'status': 'die', 'Actor': {'Attributes': {'name': 'x'}}})
+        assert container.name == 'composetest_web_7'
+        container.update_from_event({
+            'status': 'rename',
+            'Actor': {'Attributes': {'name': 'abc_composetest_web_7'}},
+        })
+        assert container.name == 'abc_composetest_web_7'
+
+    def test_from_event_with_labels(self):
+        client = mock.create_autospec(docker.Client)
+        container = Container.from_event(client, {
+            'status': 'die',
+            'id': self.container_id,
+            'from': 'busybox:latest',
+            'Actor': {
+                'ID': self.container_id,
+                'Attributes': {
+                    'name': 'composetest_web_7',
+                    'image': 'busybox:latest',
+                    'exitCode': '0',
+                    'com.docker.compose.project': 'composetest',
+                    'com.docker.compose.service': 'web',
+                    'com.docker.compose.container-number': '7',
+                },
+            },
+        })
+
+        assert container.name == 'composetest_web_7'
+        assert container.service == 'web'
+        assert container.number == 7
+        assert container.name_without_project == 'web_7'
+        assert 'exitCode' not in container.labels
+        assert not client.inspect_container.called
+
+    def test_from_event_without_labels(self):
+        client = mock.create_autospec(docker.Client)
+        client.inspect_container.return_value = self.container_dict
+        container = Container.from_event(client, {
+            'status': 'die',
+            'id': self.container_id,
+            'from': 'busybox:latest',
+        })
+
+        assert container.service == 'web'
+        client.inspect_container.assert_called_once_with(self.container_id)
+
+
+def test_trim_dictionary():
+    fields = {'Id': None, 'Config': {'Labels': None}, 'Mounts': None}
+    dictionary = {
+        'Id': 'abc',
+        'Driver': 'overlay2',
+        'Config': {'Labels': {'a': 'b'}, 'Hostname': 'abc'},
+        'Mounts': [{'Destination': '/data'}],
+    }
+    assert trim_dictionary(dictionary, fields) == {
+        'Id': 'abc',
+        'Config': {'Labels': {'a': 'b'}},
+        'Mounts': [{'Destination': '/data'}],
+    }
+    assert trim_dictionary({'Id': 'abc', 'Config': None}, fields) == {
+        'Id': 'abc',
+        'Config': None,
+    }
+
+
+def test_container_summary():
+    summary = container_summary({
+        'Id': 'abc',
+        'Names': ['/composetest_web_1'],
+        'Image': 'busybox',
+        'Command': 'top',
+        'Created': 1387384730,
+        'State': 'exited',
+        'Status': 'Exited (137) 2 minutes ago',
+        'Ports': [
+            {'PrivatePort': 80, 'Type': 'tcp'},
+            {'PrivatePort': 22, 'PublicPort': 2222, 'Type': 'tcp', 'IP': '0.0.0.0'},
+        ],
+        'Labels': {
+            'com.docker.compose.service': 'web',
+            'com.docker.compose.container-number': '1',
+            'com.docker.compose.oneoff': 'False',
+        },
+    })
+    assert summary['name'] == 'composetest_web_1'
+    assert summary['service'] == 'web'
+    assert summary['number'] == 1
+    assert not summary['one_off']
+    assert summary['state'] == 'exited'
+    assert summary['exit_code'] == 137
+    assert summary['ports'] == [
+        {'private': 22, 'public': 2222, 'protocol': 'tcp', 'ip': '0.0.0.0'},
+        {'private': 80, 'public': None, 'protocol': 'tcp', 'ip': None},
+    ]
+
+
+def test_container_summary_without_state():
+    summary = container_summary({'Id': 'abc', 'Names': ['/abc'], 'Status': 'Up 2 hours'})
+    assert summary['state'] == 'running'
+    assert summary['exit_code'] is None
+    assert summary['number'] is None
+    assert summary['labels'] == {}
+
+
+def test_state_from_status():
+    assert state_from_status('Up 2 hours (Paused)') == 'paused'
+    assert state_from_status('Restarting (1) 2 seconds ago') == 'restarting'
+    assert state_from_status('Exited (0) 2 minutes ago') == 'exited'
+    assert state_from_status('') == ''
+
+
+class ContainerCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = ContainerCache(size=2)
+        first, second, third = [Container(None, {'Id': cid}) for cid in 'abc']
+        cache.add(first)
+        cache.add(second)
+        assert cache.get('a') is first
+        cache.add(third)
+
+        assert cache.get('a') is first
+        assert cache.get('b') is None
+        assert cache.get('c') is third
+
+    def test_remove(self):
+        cache = ContainerCache()
+        cache.add(Container(None, {'Id': 'a'}))
+        cache.remove('a')
+        cache.remove('b')
+        assert cache.get('a') is None
+
 
 class GetContainerNameTestCase(unittest.TestCase):
 
@@ -1,11 +1,17 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import threading
+import time
+
 import six
 from docker.errors import APIError
 
+from compose.parallel import limit_parallel_operations
 from compose.parallel import parallel_execute
 from compose.parallel import parallel_execute_iter
+from compose.parallel import record_timings
+from compose.parallel import State
 from compose.parallel import UpstreamError
 
 
@@ -89,3 +95,118 @@ def test_parallel_execute_with_upstream_errors():
     assert (data_volume, None, APIError) in events
     assert (db, None, UpstreamError) in events
     assert (web, None, UpstreamError) in events
+
+
+def test_parallel_execute_with_limit():
+    lock = threading.Lock()
+    running = []
+    most_running = []
+
+    def process(x):
+        with lock:
+            running.append(x)
+            most_running.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(x)
+
+    results, errors = parallel_execute(
+        objects=list(range(20)),
+        func=process,
+        get_name=six.text_type,
+        msg=None,
+        limit=3,
+    )
+
+    assert len(results) == 20
+    assert errors == {}
+    assert max(most_running) == 3
+
+
+def test_parallel_execute_iter_with_limit_and_upstream_errors():
+    started = []
+
+    def process(x):
+        started.append(x)
+        if x is data_volume:
+            raise APIError(None, None, "Something went wrong")
+
+    state = State(objects)
+    events = list(parallel_execute_iter(objects, process, get_deps, limit=1, state=state))
+
+    assert sorted(obj for obj, _, _ in events) == sorted(objects)
+    assert sorted(started) == sorted([data_volume, cache])
+    assert state.failed == set([data_volume, db, web])
+    assert state.running == 0
+
+
+def test_parallel_execute_with_parallel_limit():
+    lock = threading.Lock()
+    running = []
+    most_running = []
+
+    def process(x):
+        with lock:
+            running.append(x)
+            most_running.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(x)
+
+    with limit_parallel_operations(2):
+        results, errors = parallel_execute(
+            objects=list(range(10)),
+            func=process,
+            get_name=six.text_type,
+            msg=None,
+        )
+
+    assert len(results) == 10
+    assert max(most_running) == 2
+
+
+def test_record_timings():
+    durations = {web: 0.02, db: 0.05, data_volume: 0.01, cache: 0.01}
+
+    with record_timings() as timings:
+        parallel_execute(
+            objects=objects,
+            func=lambda obj: time.sleep(durations[obj]),
+            get_name=lambda obj: obj,
+            msg=None,
+            get_deps=get_deps,
+        )
+
+    [timing] = timings
+    assert sorted(timing.objects) == sorted(objects)
+    for obj in objects:
+        assert timing.start_time <= timing.ready_times[obj] <= timing.start_times[obj]
+        assert timing.start_times[obj] < timing.end_times[obj] <= timing.end_time
+    assert timing.ready_times[web] == max(timing.end_times[db], timing.end_times[cache])
+    assert timing.ready_times[db] == timing.end_times[data_volume]
+    assert timing.critical_path() == [data_volume, db, web]
+
+
+def test_record_timings_of_slot_waits():
+    with record_timings() as timings:
+        parallel_execute(
+            objects=[1, 2],
+            func=lambda obj: time.sleep(0.02),
+            get_name=six.text_type,
+            msg=None,
+            limit=1,
+        )
+
+    [timing] = timings
+    first, second = sorted(timing.objects, key=timing.start_times.get)
+    assert timing.slot_wait(first) < 0.01
+    assert timing.slot_wait(second) >= 0.02
+    assert timing.critical_path() == [second]
+    assert timing.total_slot_wait() == timing.slot_wait(first) + timing.slot_wait(second)
+
+
+def test_timings_not_recorded_by_default():
+    with record_timings() as timings:
+        pass
+    parallel_execute(objects=[1], func=lambda obj: obj, get_name=six.text_type, msg=None)
+    assert timings == []
@@ -9,7 +9,9 @@ from docker.errors import NotFound
 from .. import mock
 from .. import unittest
 from compose.config.config import Config
+from compose.config.reload import ConfigChanges
 from compose.config.types import VolumeFromSpec
+from compose.const import LABEL_ONE_OFF
 from compose.const import LABEL_SERVICE
 from compose.container import Container
 from compose.project import Project
@@ -69,6 +71,37 @@ class ProjectTest(unittest.TestCase):
         self.assertEqual(len(project.services), 2)
         self.assertTrue(project.networks.use_networking)
 
+    def test_apply_config_changes(self):
+        services = [
+            {'name': 'db', 'image': 'busybox:latest'},
+            {'name': 'web', 'image': 'busybox:latest', 'links': ['db']},
+            {'name': 'cache', 'image': 'busybox:latest'},
+            {'name': 'old', 'image': 'busybox:latest'},
+        ]
+        project = Project.from_config(
+            'composetest', Config(version=None, services=services, networks=None, volumes=None),
+            None)
+        cache = project.get_service('cache')
+        web = project.get_service('web')
+
+        services = [
+            {'name': 'db', 'image': 'busybox:1'},
+            {'name': 'web', 'image': 'busybox:latest', 'links': ['db']},
+            {'name': 'cache', 'image': 'busybox:latest'},
+            {'name': 'new', 'image': 'busybox:latest'},
+        ]
+        project.apply_config_changes(ConfigChanges(
+            Config(version=None, services=services, networks=None, volumes=None),
+            added=['new'],
+            changed=['db', 'web'],
+            removed=['old']))
+
+        assert project.service_names == ['db', 'web', 'cache', 'new']
+        assert project.get_service('cache') is cache
+        assert project.get_service('web') is not web
+        assert project.get_service('db').options['image'] == 'busybox:1'
+        assert project.get_service('web').links == [(project.get_service('db'), None)]
+
     def test_get_service(self):
         web = Service(
             project='composetest',
@@ -346,6 +379,102 @@ class ProjectTest(unittest.TestCase):
             },
         ]
 
+    def test_events_from_labels_firehose(self):
+        services = [Service(name='web'), Service(name='db')]
+        project = Project('test', services, self.mock_client)
+
+        def firehose():
+            for index in range(1000):
+                service = ('web', 'db', 'other')[index % 3]
+                container_id = '{}{}'.format(service, index % 30)
+                yield {
+                    'status': ('create', 'start', 'die', 'stop')[index % 4],
+                    'from': 'example/' + service,
+                    'id': container_id,
+                    'time': 1420092061,
+                    'timeNano': 14200920610000002000,
+                    'Type': 'container',
+                    'Actor': {
+                        'ID': container_id,
+                        'Attributes': {
+                            'name': 'test_{}_{}'.format(service, index % 10),
+                            'image': 'example/' + service,
+                            'com.docker.compose.project': 'test',
+                            'com.docker.compose.service': service,
+                            'com.docker.compose.container-number': str(index % 10),
+                        },
+                    },
+                }
+
+        self.mock_client.events.return_value = firehose()
+
+        events_list = list(project.events(service_names=['web']))
+
+        assert not self.mock_client.inspect_container.called
+        assert len(events_list) == 334
+        assert set(event['service'] for event in events_list) == {'web'}
+        assert events_list[0]['attributes'] == {
+            'name': 'test_web_0',
+            'image': 'example/web',
+        }
+        containers = {}
+        for event in events_list:
+            assert containers.setdefault(event['id'], event['container']) is event['container']
+
+    def test_events_inspects_each_container_once_without_labels(self):
+        project = Project('test', [Service(name='web')], self.mock_client)
+        self.mock_client.events.return_value = iter([
+            {
+                'status': status,
+                'from': 'example/image',
+                'id': 'abcde',
+                'time': 1420092061,
+                'timeNano': 14200920610000002000,
+            }
+            for status in ('create', 'start', 'die', 'stop', 'destroy')
+        ])
+        self.mock_client.inspect_container.return_value = {
+            'Id': 'abcde',
+            'Config': {'Labels': {LABEL_SERVICE: 'web'}},
+            'Name': '/test_web_1',
+        }
+
+        assert len(list(project.events())) == 5
+        self.mock_client.inspect_container.assert_called_once_with('abcde')
+
+    def test_events_follow_renames(self):
+        project = Project('test', [Service(name='web')], self.mock_client)
+
+        def event(status, name, **attributes):
+            return {
+                'status': status,
+                'id': 'abcde',
+                'time': 1420092061,
+                'timeNano': 14200920610000002000,
+                'Actor': {
+                    'ID': 'abcde',
+                    'Attributes': dict(attributes, **{
+                        'name': name,
+                        'image': 'example/image',
+                        'com.docker.compose.project': 'test',
+                        'com.docker.compose.service': 'web',
+                    }),
+                },
+            }
+
+        self.mock_client.events.return_value = iter([
+            event('create', 'test_web_1'),
+            event('rename', 'abcde_test_web_1', oldName='/test_web_1'),
+            event('stop', 'abcde_test_web_1'),
+        ])
+
+        events_list = list(project.events())
+        assert [e['attributes']['name'] for e in events_list] == [
+            'test_web_1', 'abcde_test_web_1', 'abcde_test_web_1']
+        assert events_list[0]['attributes']['image'] is None
+        assert events_list[0]['container'].image == 'example/image'
+        assert not self.mock_client.inspect_container.called
+
     def test_net_unset(self):
         project = Project.from_config(
             name='test',
@@ -491,6 +620,74 @@ class ProjectTest(unittest.TestCase):
         )
         self.assertEqual([c.id for c in project.containers()], ['1'])
 
+    def test_trimmed_containers_use_the_labels_of_the_list(self):
+        self.mock_client.containers.return_value = [{
+            'Image': 'busybox:latest',
+            'Id': '1',
+            'Names': ['/test_web_1'],
+            'Labels': {LABEL_SERVICE: 'web'},
+        }]
+        project = Project.from_config(
+            name='test',
+            client=self.mock_client,
+            config_data=Config(
+                version=None,
+                services=[{
+                    'name': 'web',
+                    'image': 'busybox:latest',
+                }],
+                networks=None,
+                volumes=None,
+            ),
+        )
+        containers = project.containers(trimmed=True)
+        assert [c.name for c in containers] == ['test_web_1']
+        assert containers[0].trimmed
+        assert not self.mock_client.inspect_container.called
+
+    def test_container_summaries(self):
+        def listed(name, service, one_off, state):
+            return {
+                'Id': name,
+                'Image': 'busybox:latest',
+                'Names': ['/' + name],
+                'State': state,
+                'Labels': {LABEL_SERVICE: service, LABEL_ONE_OFF: str(one_off)},
+            }
+
+        self.mock_client.containers.return_value = [
+            listed('test_web_2', 'web', False, 'exited'),
+            listed('test_web_1', 'web', False, 'running'),
+            listed('test_web_run_1', 'web', True, 'running'),
+            listed('test_web_run_2', 'web', True, 'exited'),
+            listed('test_db_1', 'db', False, 'running'),
+            listed('test_orphan_1', 'orphan', False, 'running'),
+        ]
+        project = Project.from_config(
+            name='test',
+            client=self.mock_client,
+            config_data=Config(
+                version=None,
+                services=[
+                    {'name': 'web', 'image': 'busybox:latest'},
+                    {'name': 'db', 'image': 'busybox:latest'},
+                ],
+                networks=None,
+                volumes=None,
+            ),
+        )
+
+        summaries = project.container_summaries()
+        assert [summary['name'] for summary in summaries] == [
+            'test_db_1', 'test_web_1', 'test_web_2', 'test_web_run_1']
+        summaries = project.container_summaries(service_names=['db'])
+        assert [summary['name'] for summary in summaries] == ['test_db_1']
+
+        self.mock_client.containers.assert_called_with(
+            all=True, filters={'label': ['com.docker.compose.project=test']})
+        assert self.mock_client.containers.call_count == 2
+        assert not self.mock_client.inspect_container.called
+
     def test_down_with_no_resources(self):
         project = Project.from_config(
             name='test',
@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from compose import tracing
+from compose.parallel import parallel_execute
+from tests import unittest
+
+
+class Named(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    @tracing.traced
+    def run(self, value):
+        return value * 2
+
+    @tracing.traced
+    def fail(self):
+        raise ValueError('boom')
+
+
+class TracingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'trace.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def spans(self, recorded):
+        return dict((span.name, span) for span in recorded.finished_spans())
+
+    def test_not_recording(self):
+        with tracing.span('outer'):
+            assert tracing.current_span() is None
+        assert Named('web').run(2) == 4
+
+    def test_nested_spans(self):
+        with tracing.record(self.filename) as recorded:
+            with tracing.span('outer', category='command'):
+                assert Named('web').run(2) == 4
+        assert tracing.tracer is None
+
+        spans = self.spans(recorded)
+        assert spans['outer'].parent_id is None
+        assert spans['Named.run'].parent_id == spans['outer'].span_id
+        assert spans['Named.run'].attributes == {'object': 'web'}
+        assert spans['Named.run'].end <= spans['outer'].end
+
+    def test_failed_span(self):
+        with tracing.record(self.filename) as recorded:
+            with pytest.raises(ValueError):
+                Named('web').fail()
+        assert self.spans(recorded)['Named.fail'].attributes['error'] == 'ValueError'
+
+    def test_parallel_tasks_are_nested(self):
+        with tracing.record(self.filename) as recorded:
+            with tracing.span('outer'):
+                results, errors = parallel_execute(
+                    [Named('web'), Named('db')],
+                    lambda obj: obj.run(1),
+                    lambda obj: obj.name,
+                    None)
+        assert results == [2, 2]
+
+        spans = recorded.finished_spans()
+        by_id = dict((span.span_id, span) for span in spans)
+        parallel = [span for span in spans if span.name == 'parallel_execute'][0]
+        for name in ('web', 'db'):
+            [task] = [span for span in spans if span.name == name]
+            assert task.parent_id == parallel.span_id
+            [run] = [
+                span for span in spans
+                if span.name == 'Named.run' and span.attributes['object'] == name]
+            assert by_id[run.parent_id] is task
+        assert by_id[parallel.parent_id].name == 'outer'
+
+    def test_write_chrome_trace(self):
+        with tracing.record(self.filename):
+            Named('web').run(1)
+        with open(self.filename) as fh:
+            trace = json.load(fh)
+
+        [event] = trace['traceEvents']
+        assert event['name'] == 'Named.run'
+        assert event['ph'] == 'X'
+        assert event['args']['object'] == 'web'
+
+    def test_write_otlp_trace(self):
+        with tracing.record(self.filename, 'otlp'):
+            with tracing.span('outer'):
+                Named('web').run(1)
+        with open(self.filename) as fh:
+            trace = json.load(fh)
+
+        [resource_spans] = trace['resourceSpans']
+        spans = dict(
+            (span['name'], span) for span in resource_spans['scopeSpans'][0]['spans'])
+        assert spans['Named.run']['parentSpanId'] == spans['outer']['spanId']
+        assert spans['outer']['parentSpanId'] == ''
+        assert len(spans['outer']['traceId']) == 32
+        assert {'key': 'object', 'value': {'stringValue': 'web'}} in spans['Named.run']['attributes']
+        assert int(spans['outer']['endTimeUnixNano']) >= int(spans['outer']['startTimeUnixNano'])
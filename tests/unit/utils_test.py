@@ -60,3 +60,19 @@ class TestJsonStream(object):
             {'three': 'four'},
             {'x': 2}
         ]
+
+
+class TestMemoize(object):
+    def test_calls_once_per_arguments(self):
+        calls = []
+
+        @utils.memoize
+        def double(value):
+            calls.append(value)
+            return value * 2
+
+        assert double(2) == 4
+        assert double(2) == 4
+        assert double(3) == 6
+        assert calls == [2, 3]
+        assert double.cache == {(2,): 4, (3,): 6}